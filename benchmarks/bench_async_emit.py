@@ -0,0 +1,80 @@
+"""
+Latency of ScoutOtelHandler.handle on the logging thread, with and without
+async mode, while the OTel side of the pipeline stalls periodically.
+
+    python -m benchmarks.bench_async_emit
+"""
+
+import logging
+import statistics
+import threading
+import time
+
+from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.log_queue import OverflowPolicy
+
+THREADS = 8
+RECORDS_PER_THREAD = 2_000
+STALL_EVERY = 200
+STALL_SECONDS = 0.005
+
+
+class StallingOtelHandler:
+    """Stands in for the OTel emitter, stalling like a backed-up exporter."""
+
+    def __init__(self):
+        self.count = 0
+
+    def emit(self, record, attributes=None, current_operation=None):
+        self.count += 1
+        if self.count % STALL_EVERY == 0:
+            time.sleep(STALL_SECONDS)
+
+
+def run(handler):
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def log():
+        own = []
+        for i in range(RECORDS_PER_THREAD):
+            record = logging.makeLogRecord({"msg": "Handled %s", "args": (i,)})
+            start = time.perf_counter()
+            handler.handle(record)
+            own.append(time.perf_counter() - start)
+        with latencies_lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=log) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    handler.flush()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return quantiles[49], quantiles[98], len(latencies) / elapsed
+
+
+def main():
+    ScoutOtelHandler.otel_handler = StallingOtelHandler()
+    handlers = {
+        "sync": ScoutOtelHandler(service_name="bench"),
+        "async": ScoutOtelHandler(
+            service_name="bench",
+            async_mode=True,
+            queue_size=THREADS * RECORDS_PER_THREAD,
+            overflow_policy=OverflowPolicy.DROP_NEWEST,
+        ),
+    }
+
+    print(f"{'mode':>6} {'p50 us':>8} {'p99 us':>8} {'records/s':>10}")
+    for name, handler in handlers.items():
+        p50, p99, rate = run(handler)
+        print(f"{name:>6} {p50 * 1e6:>8.1f} {p99 * 1e6:>8.1f} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
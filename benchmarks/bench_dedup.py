@@ -0,0 +1,95 @@
+"""
+Records exported and cost per record on a bursty workload, with and without
+duplicate collapsing.
+
+Most records come in bursts of the same warning, as from a retry loop, mixed
+with one-off records. Exported records go through the real OTel conversion and
+batch processor, into an in-memory exporter.
+
+    python -m benchmarks.bench_dedup
+"""
+
+import logging
+import random
+import time
+import warnings
+
+from opentelemetry.sdk._logs import LoggerProvider
+from opentelemetry.sdk._logs.export import (
+    BatchLogRecordProcessor,
+    InMemoryLogExporter,
+)
+
+from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.translate import OtelLogEmitter
+
+BURSTS = 1_000
+BURST_SIZE = 50
+ONE_OFFS_PER_BURST = 10
+
+
+def make_records():
+    rng = random.Random(0)
+    records = []
+    for burst in range(BURSTS):
+        host = f"db-{rng.randrange(5)}"
+        for _ in range(BURST_SIZE):
+            records.append(
+                logging.makeLogRecord(
+                    {
+                        "name": "bench.db",
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": "Connection refused to %s, retrying",
+                        "args": (host,),
+                    }
+                )
+            )
+        for i in range(ONE_OFFS_PER_BURST):
+            records.append(
+                logging.makeLogRecord(
+                    {
+                        "name": "bench.views",
+                        "levelno": logging.INFO,
+                        "levelname": "INFO",
+                        "msg": "Handled request %s",
+                        "args": (burst * ONE_OFFS_PER_BURST + i,),
+                    }
+                )
+            )
+    return records
+
+
+def run(handler):
+    exporter = InMemoryLogExporter()
+    logger_provider = LoggerProvider()
+    logger_provider.add_log_record_processor(
+        BatchLogRecordProcessor(exporter, max_queue_size=100_000)
+    )
+    ScoutOtelHandler.otel_handler = OtelLogEmitter(logger_provider)
+
+    records = make_records()
+    start = time.perf_counter()
+    for record in records:
+        handler.emit(record)
+    handler.flush()
+    elapsed = time.perf_counter() - start
+
+    logger_provider.shutdown()
+    return len(records), len(exporter.get_finished_logs()), elapsed / len(records)
+
+
+def main():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    handlers = {
+        "no dedup": ScoutOtelHandler(service_name="bench"),
+        "dedup 10s": ScoutOtelHandler(service_name="bench", dedup_window=10),
+    }
+    print(f"{'mode':>10} {'records':>8} {'exported':>9} {'us/record':>10}")
+    for name, handler in handlers.items():
+        records, exported, per_record = run(handler)
+        print(f"{name:>10} {records:>8} {exported:>9} {per_record * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
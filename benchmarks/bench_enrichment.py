@@ -0,0 +1,80 @@
+"""
+Per-record cost of ScoutOtelHandler.emit as the number of lines logged per
+TrackedRequest grows.
+
+The Scout attributes for a request are built on its first log line and reused
+for the rest, so the cost per record should fall as lines per request go up.
+Records are handed to a no-op handler instead of the OTLP exporter.
+
+    python -m benchmarks.bench_enrichment
+"""
+
+import logging
+import time
+from unittest.mock import patch
+
+from scout_apm.core.tracked_request import Span, TrackedRequest
+
+from scout_apm_logging.handler import ScoutOtelHandler
+
+LINES_PER_REQUEST = (1, 10, 50, 200)
+SPANS_PER_REQUEST = 200
+TAGS_PER_REQUEST = 10
+TOTAL_RECORDS = 20_000
+
+
+class NullEmitter:
+    def emit(self, record, attributes=None, current_operation=None):
+        pass
+
+
+def make_request():
+    request = TrackedRequest()
+    request.complete_spans = [
+        Span(request.request_id, f"SQL/Query/{i}") for i in range(SPANS_PER_REQUEST)
+    ]
+    request.complete_spans[0] = Span(request.request_id, "Controller/bench")
+    for i in range(TAGS_PER_REQUEST):
+        request.tag(f"tag_{i}", f"value_{i}")
+    return request
+
+
+def make_record():
+    return logging.LogRecord(
+        name="bench",
+        level=logging.INFO,
+        pathname=__file__,
+        lineno=0,
+        msg="Handled %s",
+        args=("item",),
+        exc_info=None,
+    )
+
+
+def run(lines_per_request):
+    handler = ScoutOtelHandler(service_name="bench")
+    requests = [make_request() for _ in range(TOTAL_RECORDS // lines_per_request)]
+    records = [make_record() for _ in range(len(requests) * lines_per_request)]
+    records_iter = iter(records)
+
+    with patch.object(TrackedRequest, "instance") as instance:
+        start = time.perf_counter()
+        for request in requests:
+            instance.return_value = request
+            for _ in range(lines_per_request):
+                handler.emit(next(records_iter))
+        elapsed = time.perf_counter() - start
+
+    return elapsed / len(records)
+
+
+def main():
+    ScoutOtelHandler.otel_handler = NullEmitter()
+    print(f"{'lines/request':>14} {'us/record':>10}")
+    for lines_per_request in LINES_PER_REQUEST:
+        per_record = run(lines_per_request)
+        print(f"{lines_per_request:>14} {per_record * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+An error storm: 10k records of the same exception, raised 40 frames deep and
+chained to another, through OtelLogEmitter with the default formatting, with
+the frames capped, and with fingerprinting.
+
+Records go to a processor that drops them, so the cost is the conversion, most
+of it formatting the traceback. The stack trace bytes are what would be
+exported.
+
+    python -m benchmarks.bench_exceptions
+"""
+
+import logging
+import sys
+import time
+
+from opentelemetry.sdk._logs import LoggerProvider
+
+from scout_apm_logging.tracebacks import EXCEPTION_STACKTRACE, TracebackFormatter
+from scout_apm_logging.translate import OtelLogEmitter
+
+RECORDS = 10_000
+DEPTH = 40
+
+
+class MeasuringProcessor:
+    def __init__(self):
+        self.stacktrace_bytes = 0
+
+    def on_emit(self, log_data):
+        stacktrace = log_data.log_record.attributes.get(EXCEPTION_STACKTRACE)
+        if stacktrace:
+            self.stacktrace_bytes += len(stacktrace.encode())
+
+    emit = on_emit
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis=30000):
+        return True
+
+
+def query(depth):
+    if depth:
+        return query(depth - 1)
+    raise ConnectionError("server closed the connection unexpectedly")
+
+
+def handle_request():
+    try:
+        query(DEPTH)
+    except ConnectionError as exc:
+        raise RuntimeError("Request failed") from exc
+
+
+def make_records():
+    records = []
+    for i in range(RECORDS):
+        try:
+            handle_request()
+        except RuntimeError:
+            exc_info = sys.exc_info()
+        records.append(
+            logging.makeLogRecord(
+                {
+                    "name": "bench.views",
+                    "levelno": logging.ERROR,
+                    "levelname": "ERROR",
+                    "msg": "Request %s failed",
+                    "args": (i,),
+                    "exc_info": exc_info,
+                }
+            )
+        )
+    return records
+
+
+def run(tracebacks):
+    processor = MeasuringProcessor()
+    provider = LoggerProvider()
+    provider.add_log_record_processor(processor)
+    emitter = OtelLogEmitter(provider, tracebacks=tracebacks)
+
+    records = make_records()
+    start = time.perf_counter()
+    for record in records:
+        emitter.emit(record)
+    elapsed = time.perf_counter() - start
+    provider.shutdown()
+    return elapsed / RECORDS, processor.stacktrace_bytes
+
+
+def main():
+    print(f"{'tracebacks':>12} {'us/record':>10} {'stack trace KB':>15}")
+    for name, tracebacks in (
+        ("full", TracebackFormatter()),
+        ("20 frames", TracebackFormatter(max_frames=20)),
+        ("fingerprint", TracebackFormatter(fingerprint_window=60)),
+    ):
+        per_record, stacktrace_bytes = run(tracebacks)
+        print(f"{name:>12} {per_record * 1e6:>10.1f} {stacktrace_bytes / 1024:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Throughput and bytes on the wire of each export preset, exporting to a
+stand-in OTLP collector through a proxy that counts the bytes it forwards.
+
+    python -m benchmarks.bench_export_presets
+"""
+
+import logging
+import selectors
+import socket
+import threading
+import time
+import warnings
+
+from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
+from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+
+from scout_apm_logging.export_settings import EXPORT_PRESETS, ExportSettings
+from tests.collector import StandInCollector
+
+RECORDS = 20_000
+
+
+class CountingProxy:
+    """Forwards TCP connections to ``port``, counting the bytes sent upstream."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.bytes_sent = 0
+        self._listener = socket.create_server(("localhost", 0))
+        self.listen_port = self._listener.getsockname()[1]
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        peers = {}
+        while not self._stopped:
+            for key, _ in self._selector.select(timeout=0.1):
+                if key.fileobj is self._listener:
+                    client, _ = self._listener.accept()
+                    upstream = socket.create_connection(("localhost", self.port))
+                    peers[client], peers[upstream] = upstream, client
+                    self._selector.register(client, selectors.EVENT_READ, True)
+                    self._selector.register(upstream, selectors.EVENT_READ, False)
+                    continue
+                source = key.fileobj
+                data = source.recv(65536)
+                if not data:
+                    other = peers.pop(source)
+                    peers.pop(other, None)
+                    for sock in (source, other):
+                        self._selector.unregister(sock)
+                        sock.close()
+                    continue
+                if key.data:
+                    self.bytes_sent += len(data)
+                peers[source].sendall(data)
+
+    def stop(self):
+        self._stopped = True
+        self._thread.join()
+
+
+def run(collector, settings):
+    proxy = CountingProxy(collector.port)
+    provider = LoggerProvider()
+    exporter = OTLPLogExporter(
+        endpoint=f"http://localhost:{proxy.listen_port}",
+        insecure=True,
+        **settings.exporter_kwargs(),
+    )
+    provider.add_log_record_processor(
+        BatchLogRecordProcessor(exporter, **settings.processor_kwargs())
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        handler = LoggingHandler(logger_provider=provider)
+
+    before = len(collector.records)
+    start = time.perf_counter()
+    for i in range(RECORDS):
+        handler.emit(
+            logging.makeLogRecord(
+                {
+                    "name": "bench",
+                    "levelno": logging.INFO,
+                    "levelname": "INFO",
+                    "msg": "Handled request %s for user %s",
+                    "args": (i, i % 100),
+                    "scout_transaction_id": f"req-{i // 10}",
+                }
+            )
+        )
+    provider.force_flush()
+    elapsed = time.perf_counter() - start
+    provider.shutdown()
+    proxy.stop()
+
+    return {
+        "records": len(collector.records) - before,
+        "records_per_sec": RECORDS / elapsed,
+        "bytes_on_wire": proxy.bytes_sent,
+    }
+
+
+def main():
+    presets = {"default": ExportSettings()}
+    presets.update((name, ExportSettings(preset=name)) for name in EXPORT_PRESETS)
+    # Keep everything, to compare the cost of sending it rather than drops.
+    for settings in presets.values():
+        settings.max_queue_size = max(settings.max_queue_size or 0, RECORDS)
+
+    print(
+        f"{'preset':>16} {'records':>8} {'records/s':>10} "
+        f"{'wire bytes':>11} {'bytes/record':>13}"
+    )
+    with StandInCollector() as collector:
+        for name, settings in presets.items():
+            result = run(collector, settings)
+            print(
+                f"{name:>16} {result['records']:>8} "
+                f"{result['records_per_sec']:>10.0f} {result['bytes_on_wire']:>11} "
+                f"{result['bytes_on_wire'] / RECORDS:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
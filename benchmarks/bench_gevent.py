@@ -0,0 +1,108 @@
+"""
+How late a gevent app's timers fire while its request greenlets log to a
+collector, with records exported from a real OS thread and from the SDK's
+batch worker, which is a greenlet once threading is patched.
+
+Each run is a fresh gevent-patched process, over each transport, with a
+monitor greenlet measuring how much later than asked its 1ms sleeps return.
+
+    python -m benchmarks.bench_gevent
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from tests.collector import StandInCollector, StandInHTTPCollector
+
+RECORDS = 5_000
+# Seconds the collector takes to answer each export.
+COLLECTOR_DELAY = 0.05
+INGEST_KEY = "bench-ingest-key"
+
+APP = f"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import json
+import logging
+import sys
+import time
+
+import gevent
+
+from scout_apm_logging.handler import ScoutOtelHandler
+
+lags = []
+
+
+def monitor():
+    while True:
+        start = time.perf_counter()
+        gevent.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+def request(index):
+    for i in range({RECORDS} // 10):
+        handler.emit(
+            logging.makeLogRecord(
+                {{"name": "app", "msg": f"request {{index}} step {{i}}", "levelno": 20}}
+            )
+        )
+        gevent.sleep(0.002)
+
+
+handler = ScoutOtelHandler(
+    service_name="bench", batch_size=256, real_thread_export=sys.argv[1] == "on"
+)
+watcher = gevent.spawn(monitor)
+gevent.joinall([gevent.spawn(request, index) for index in range(10)])
+handler.flush(timeout=10)
+watcher.kill()
+lags.sort()
+print(json.dumps([lags[len(lags) // 2], lags[int(len(lags) * 0.99)], lags[-1]]))
+"""
+
+
+def run(collector, transport, mode):
+    env = dict(
+        os.environ,
+        SCOUT_LOGS_INGEST_KEY=INGEST_KEY,
+        SCOUT_LOGS_REPORTING_ENDPOINT=collector.endpoint,
+        SCOUT_LOGS_TRANSPORT=transport,
+    )
+    received = len(collector.records)
+    result = subprocess.run(
+        [sys.executable, "-c", APP, mode],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout), len(collector.records) - received
+
+
+def main():
+    print(
+        f"{'transport':>9} {'real thread':>11} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'max ms':>8} {'records':>8}"
+    )
+    for collector_class, transport in (
+        (StandInCollector, "grpc"),
+        (StandInHTTPCollector, "http"),
+    ):
+        with collector_class(delay=COLLECTOR_DELAY) as collector:
+            for mode in ("on", "off"):
+                lags, received = run(collector, transport, mode)
+                p50, p99, worst = (lag * 1000 for lag in lags)
+                print(
+                    f"{transport:>9} {mode:>11} {p50:>8.2f} {p99:>8.2f} "
+                    f"{worst:>8.2f} {received:>8}"
+                )
+
+
+if __name__ == "__main__":
+    main()
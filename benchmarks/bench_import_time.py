@@ -0,0 +1,77 @@
+"""
+Import time and RSS of scout_apm_logging in a fresh interpreter: just
+importing it, as a process that only configures logging does, and going on to
+set up the exporter, as the first record does.
+
+    python -m benchmarks.bench_import_time
+"""
+
+import subprocess
+import sys
+
+RUNS = 5
+
+STAGES = {
+    "import": "import scout_apm_logging",
+    "initialize": (
+        "import os\n"
+        "os.environ['SCOUT_LOGS_INGEST_KEY'] = 'bench'\n"
+        "from scout_apm_logging import ScoutOtelHandler\n"
+        "ScoutOtelHandler(service_name='bench')._initialize()"
+    ),
+}
+
+RSS = (
+    "\nfor line in open('/proc/self/status'):\n"
+    "    if line.startswith('VmRSS:'):\n"
+    "        print(line.split()[1])\n"
+)
+
+
+def top_level_import_times(statement):
+    """
+    Cumulative import time in microseconds of each module ``statement``
+    imported directly, as reported by ``python -X importtime``.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented, and already counted in their parent's.
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    # Imported by the interpreter itself on startup
+    startup = set(top_level_import_times("pass"))
+
+    print(f"{'stage':>10} {'import ms':>10} {'RSS KB':>8}")
+    for stage, statement in STAGES.items():
+        total = min(
+            sum(
+                cumulative
+                for name, cumulative in top_level_import_times(statement).items()
+                if name not in startup
+            )
+            for _ in range(RUNS)
+        )
+        rss = subprocess.run(
+            [sys.executable, "-c", statement + RSS],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()[-1]
+        print(f"{stage:>10} {total / 1000:>10.1f} {rss:>8}")
+
+
+if __name__ == "__main__":
+    main()
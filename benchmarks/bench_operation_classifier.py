@@ -0,0 +1,71 @@
+"""
+Cost of finding a request's entrypoint from its spans, as a request grows one
+span per log line: scanning every span each time, against OperationClassifier
+scanning only the spans completed since the last line.
+
+The entrypoint is the request's first span, the worst case for the scan.
+
+    python -m benchmarks.bench_operation_classifier
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from scout_apm_logging.utils.operation_utils import (
+    OPERATION_PREFIXES,
+    OperationClassifier,
+    OperationDetail,
+)
+
+SPANS_PER_REQUEST = (10, 100, 500)
+REQUESTS = 20
+
+
+@dataclass
+class Span:
+    operation: str
+
+
+@dataclass
+class Request:
+    operation: None = None
+    complete_spans: List[Span] = field(default_factory=list)
+
+
+def scan_all(request):
+    # What get_operation_detail used to do.
+    for span in reversed(request.complete_spans):
+        for prefix, op_type in OPERATION_PREFIXES.items():
+            if span.operation.startswith(prefix):
+                return OperationDetail(name=span.operation[len(prefix) :], type=op_type)
+    return None
+
+
+def run(spans_per_request, incremental):
+    classifier = OperationClassifier()
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        request = Request(complete_spans=[Span("Controller/bench")])
+        known, scanned = None, 0
+        for i in range(spans_per_request):
+            request.complete_spans.append(Span(f"SQL/Query/{i % 20}"))
+            if incremental:
+                known = classifier.detail(request, known, scanned)
+                scanned = len(request.complete_spans)
+            else:
+                known = scan_all(request)
+            assert known is not None
+    return (time.perf_counter() - start) / (REQUESTS * spans_per_request)
+
+
+def main():
+    print(f"{'spans':>6} {'scan all us':>12} {'classifier us':>14}")
+    for spans_per_request in SPANS_PER_REQUEST:
+        scan = run(spans_per_request, incremental=False)
+        classified = run(spans_per_request, incremental=True)
+        print(f"{spans_per_request:>6} {scan * 1e6:>12.2f} {classified * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Export calls and bytes sent to a stand-in OTLP collector by a pool of worker
+processes, each exporting for itself versus all going through one shipper.
+
+    python -m benchmarks.bench_prefork
+"""
+
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from scout_apm_logging.handler import ScoutOtelHandler
+from tests.collector import StandInCollector
+
+WORKERS = 16
+RECORDS_PER_WORKER = 2_000
+# Records per second each worker logs, a busy but realistic rate.
+RATE_PER_WORKER = 250
+INGEST_KEY = "bench-ingest-key"
+
+
+def worker(prefork, socket_path, ready, go):
+    ScoutOtelHandler.otel_handler = None
+    handler = ScoutOtelHandler(
+        service_name="bench", prefork=prefork, shipper_socket=socket_path
+    )
+    logger = logging.getLogger(f"bench.{os.getpid()}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    # Start logging together once every worker has finished importing.
+    ready.release()
+    go.wait()
+    start = time.perf_counter()
+    for i in range(RECORDS_PER_WORKER):
+        logger.info("Handled item %s", i)
+        delay = start + (i + 1) / RATE_PER_WORKER - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    if handler.logger_provider:
+        handler.logger_provider.shutdown()
+    else:
+        ScoutOtelHandler.otel_handler.flush(timeout=30)
+
+
+def run(prefork):
+    total = WORKERS * RECORDS_PER_WORKER
+    socket_path = os.path.join(tempfile.gettempdir(), f"scout-bench-{os.getpid()}.sock")
+    with StandInCollector() as collector:
+        # Workers are spawned rather than forked from this process, which is
+        # running the collector's gRPC server, and pick these up from the env.
+        os.environ["SCOUT_LOGS_INGEST_KEY"] = INGEST_KEY
+        os.environ["SCOUT_LOGS_REPORTING_ENDPOINT"] = collector.endpoint
+        shipper = None
+        if prefork:
+            shipper = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "scout_apm_logging.shipper",
+                    socket_path,
+                    "--service-name",
+                    "bench",
+                ],
+            )
+            while not os.path.exists(socket_path):
+                time.sleep(0.01)
+
+        context = multiprocessing.get_context("spawn")
+        ready = context.Semaphore(0)
+        go = context.Event()
+        processes = [
+            context.Process(target=worker, args=(prefork, socket_path, ready, go))
+            for _ in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.acquire()
+
+        start = time.perf_counter()
+        go.set()
+        for process in processes:
+            process.join()
+        if shipper:
+            shipper.terminate()
+            shipper.wait()
+            os.unlink(f"{socket_path}.lock")
+        elapsed = time.perf_counter() - start
+
+        return {
+            "records": len(collector.records),
+            "lost": total - len(collector.records),
+            "export_calls": collector.export_calls,
+            "bytes": collector.bytes_received,
+            "bytes_per_sec": collector.bytes_received / elapsed,
+            "seconds": elapsed,
+        }
+
+
+def main():
+    print(
+        f"{'mode':>12} {'records':>8} {'lost':>6} {'exports':>8} "
+        f"{'bytes':>10} {'bytes/s':>10} {'seconds':>8}"
+    )
+    for name, prefork in (("per-process", False), ("shipper", True)):
+        result = run(prefork)
+        print(
+            f"{name:>12} {result['records']:>8} {result['lost']:>6} "
+            f"{result['export_calls']:>8} {result['bytes']:>10} "
+            f"{result['bytes_per_sec']:>10.0f} {result['seconds']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Bytes per record waiting in the handler's queues, as the LogRecord itself and
+as a QueuedRecord, for queues of 2048 records and more.
+
+Records come from requests that log LINES_PER_REQUEST lines each, with a few
+tags and an operation name of their own, so the Scout attributes are shared
+per request as they are in the handler. Memory is measured with tracemalloc,
+once the original LogRecords are gone.
+
+    python -m benchmarks.bench_queued_records
+"""
+
+import gc
+import logging
+import tracemalloc
+
+from scout_apm_logging.utils.log_record import QueuedRecord, interned
+from scout_apm_logging.utils.request_context import tag_attribute
+
+QUEUE_SIZES = (2048, 8192, 32768)
+LINES_PER_REQUEST = 10
+TAGS = ("user_id", "plan", "region", "path")
+
+logger = logging.getLogger("bench.views")
+
+
+def make_record(i):
+    return logger.makeRecord(
+        logger.name,
+        logging.INFO,
+        __file__,
+        i,
+        "Handled request %s for user %s",
+        (i, i % 100),
+        None,
+        func="view",
+    )
+
+
+def queue_records(size, compact):
+    queue = []
+    for request in range(size // LINES_PER_REQUEST + 1):
+        # Built per request, as the tags and operation of each request are.
+        operation = "/".join(("Controller", "users", str(request % 5)))
+        if compact:
+            attributes = {tag_attribute(key): "value" for key in TAGS}
+            operation = interned(operation)
+        else:
+            attributes = {f"scout_tag_{key}": "value" for key in TAGS}
+        for line in range(LINES_PER_REQUEST):
+            if len(queue) == size:
+                return queue
+            record = make_record(line)
+            if compact:
+                record = QueuedRecord(record)
+            queue.append((record, attributes, operation))
+    return queue
+
+
+def bytes_per_record(size, compact):
+    gc.collect()
+    tracemalloc.start()
+    queue = queue_records(size, compact)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del queue
+    return current / size
+
+
+def main():
+    print(f"{'queued':>8} {'LogRecord B':>12} {'QueuedRecord B':>15} {'saved':>6}")
+    for size in QUEUE_SIZES:
+        before = bytes_per_record(size, compact=False)
+        after = bytes_per_record(size, compact=True)
+        print(f"{size:>8} {before:>12.0f} {after:>15.0f} {1 - after / before:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Time spent logging on the request's own thread, and how many records carry the
+request's end time and duration, with and without request buffering.
+
+Each request logs a few lines inside a controller span, then finishes. Records
+are handed to an emitter that only notes their attributes, so the OTel
+conversion isn't measured.
+
+    python -m benchmarks.bench_request_buffers
+"""
+
+import logging
+import time
+
+from scout_apm.core.tracked_request import TrackedRequest
+
+from scout_apm_logging.handler import ScoutOtelHandler
+
+REQUESTS = 5_000
+LINES_PER_REQUEST = 10
+
+
+class CountingEmitter:
+    def __init__(self):
+        self.records = 0
+        self.complete = 0
+
+    def emit(self, record, attributes=None, current_operation=None):
+        self.records += 1
+        if attributes and "scout_duration" in attributes:
+            self.complete += 1
+
+    def close(self):
+        pass
+
+
+def run(handler):
+    record = logging.makeLogRecord(
+        {"levelno": logging.INFO, "levelname": "INFO", "msg": "Handled"}
+    )
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        request = TrackedRequest.instance()
+        request.start_span(operation="Controller/bench")
+        for _ in range(LINES_PER_REQUEST):
+            handler.emit(record)
+        request.stop_span()
+    elapsed = time.perf_counter() - start
+    handler.flush()
+    return elapsed / (REQUESTS * LINES_PER_REQUEST)
+
+
+def main():
+    print(f"{'buffering':>10} {'us/record':>10} {'with end time':>14}")
+    for name, kwargs in (
+        ("off", {}),
+        ("on", {"request_buffer_size": 256}),
+    ):
+        emitter = ScoutOtelHandler.otel_handler = CountingEmitter()
+        per_record = run(ScoutOtelHandler(service_name="bench", **kwargs))
+        share = emitter.complete / emitter.records
+        print(f"{name:>10} {per_record * 1e6:>10.2f} {share:>14.0%}")
+    ScoutOtelHandler.otel_handler = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-record cost of a record the sampler drops versus one that is exported.
+
+Exported records go through the real OTel conversion and batch processor, into
+an in-memory exporter.
+
+    python -m benchmarks.bench_sampling
+"""
+
+import logging
+import time
+import warnings
+
+from opentelemetry.sdk._logs import LoggerProvider
+from opentelemetry.sdk._logs.export import (
+    BatchLogRecordProcessor,
+    InMemoryLogExporter,
+)
+
+from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.translate import OtelLogEmitter
+
+RECORDS = 50_000
+
+
+def make_records():
+    return [
+        logging.LogRecord(
+            name="bench.views",
+            level=logging.DEBUG,
+            pathname=__file__,
+            lineno=0,
+            msg="Handled %s",
+            args=(i,),
+            exc_info=None,
+        )
+        for i in range(RECORDS)
+    ]
+
+
+def run(handler):
+    records = make_records()
+    start = time.perf_counter()
+    for record in records:
+        handler.emit(record)
+    return (time.perf_counter() - start) / RECORDS
+
+
+def main():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    logger_provider = LoggerProvider()
+    logger_provider.add_log_record_processor(
+        BatchLogRecordProcessor(InMemoryLogExporter(), max_queue_size=RECORDS)
+    )
+    ScoutOtelHandler.otel_handler = OtelLogEmitter(logger_provider)
+
+    handlers = {
+        "exported": ScoutOtelHandler(service_name="bench"),
+        "sampled out": ScoutOtelHandler(
+            service_name="bench", sample_rates={"bench": 0.0}
+        ),
+        "rate limited": ScoutOtelHandler(service_name="bench", rate_limit=1),
+    }
+    print(f"{'record':>13} {'us/record':>10}")
+    for name, handler in handlers.items():
+        print(f"{name:>13} {run(handler) * 1e6:>10.2f}")
+    logger_provider.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+How long a short-lived process, e.g. a cron job, takes to exit after logging,
+and how many of its records arrive, when the collector is slow to answer.
+
+Each run is a fresh process that logs and returns. It exits through the
+handler's exit hook with a few ``shutdown_timeout`` budgets, and through the
+OTel SDK's own exit hook, which waits on the exporter for as long as it takes.
+
+    python -m benchmarks.bench_shutdown
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from tests.collector import StandInCollector
+
+RECORDS = 1_000
+# Seconds the collector takes to answer each export.
+COLLECTOR_DELAY = 3.0
+INGEST_KEY = "bench-ingest-key"
+
+JOB = f"""
+import logging
+from scout_apm_logging.handler import ScoutOtelHandler
+
+handler = ScoutOtelHandler(service_name="bench", batch_size=512)
+for i in range({RECORDS}):
+    handler.emit(logging.makeLogRecord({{"msg": f"job step {{i}}", "levelno": 20}}))
+"""
+
+# The pipeline as it was built before the handler had an exit hook.
+SDK_JOB = f"""
+import logging
+from opentelemetry.sdk._logs import LoggerProvider
+from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+from scout_apm_logging.transport import create_log_exporter
+from scout_apm_logging.translate import OtelLogEmitter
+
+provider = LoggerProvider()
+provider.add_log_record_processor(
+    BatchLogRecordProcessor(
+        create_log_exporter("grpc", ENDPOINT, headers={{}}),
+        max_export_batch_size=512,
+    )
+)
+emitter = OtelLogEmitter(provider)
+for i in range({RECORDS}):
+    emitter.emit(logging.makeLogRecord({{"msg": f"job step {{i}}", "levelno": 20}}))
+"""
+
+
+def run(collector, job, shutdown_timeout=None):
+    env = dict(
+        os.environ,
+        SCOUT_LOGS_INGEST_KEY=INGEST_KEY,
+        SCOUT_LOGS_REPORTING_ENDPOINT=collector.endpoint,
+    )
+    if shutdown_timeout is not None:
+        env["SCOUT_LOGS_SHUTDOWN_TIMEOUT"] = str(shutdown_timeout)
+    received = len(collector.records)
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", f"ENDPOINT = {collector.endpoint!r}\n{job}"],
+        env=env,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    # Exports the process gave up on may still be answered.
+    time.sleep(COLLECTOR_DELAY)
+    return elapsed, len(collector.records) - received
+
+
+def main():
+    print(f"{'exit hook':>16} {'seconds':>8} {'records':>8}")
+    with StandInCollector(delay=COLLECTOR_DELAY) as collector:
+        elapsed, received = run(collector, SDK_JOB)
+        print(f"{'sdk':>16} {elapsed:>8.2f} {received:>8}")
+        for timeout in (0.5, 2.0, 10.0):
+            elapsed, received = run(collector, JOB, timeout)
+            name = f"handler {timeout:g}s"
+            print(f"{name:>16} {elapsed:>8.2f} {received:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Cost of ScoutOtelHandler's self-telemetry on emit: off, and on.
+
+Records are handed to a no-op emitter instead of OTel, so the difference is
+the telemetry alone.
+
+    python -m benchmarks.bench_telemetry
+"""
+
+import logging
+import time
+from unittest.mock import patch
+
+from scout_apm.core.tracked_request import TrackedRequest
+
+from scout_apm_logging.handler import ScoutOtelHandler
+
+RECORDS = 100_000
+ROUNDS = 5
+
+
+class NullEmitter:
+    def emit(self, record, attributes=None, current_operation=None):
+        pass
+
+
+def run(handler):
+    records = [
+        logging.makeLogRecord(
+            {"levelno": logging.INFO, "levelname": "INFO", "msg": "Handled %s"}
+        )
+        for _ in range(RECORDS)
+    ]
+    start = time.perf_counter()
+    for record in records:
+        handler.emit(record)
+    return (time.perf_counter() - start) / RECORDS
+
+
+def main():
+    ScoutOtelHandler.otel_handler = NullEmitter()
+    handlers = {
+        "off": ScoutOtelHandler(service_name="bench"),
+        "on": ScoutOtelHandler(service_name="bench", telemetry=True),
+    }
+
+    print(f"{'telemetry':>10} {'us/record':>10}")
+    with patch.object(TrackedRequest, "instance", return_value=None):
+        for name, handler in handlers.items():
+            per_record = min(run(handler) for _ in range(ROUNDS))
+            print(f"{name:>10} {per_record * 1e6:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cost per record of turning stdlib records into OTel ones: OTel's LoggingHandler,
+with the Scout attributes set on the record as the handler used to, against
+OtelLogEmitter, which is given them alongside it, with messages formatted and
+in structured mode.
+
+Records go to a processor that drops them, so only the conversion is measured.
+
+    python -m benchmarks.bench_translate
+"""
+
+import logging
+import time
+import tracemalloc
+import warnings
+
+from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+
+from scout_apm_logging.translate import OtelLogEmitter
+
+RECORDS = 50_000
+
+SCOUT_ATTRIBUTES = {
+    "service.name": "bench",
+    "scout_transaction_id": "req-1",
+    "scout_start_time": "2024-03-06T12:00:00",
+    "scout_end_time": "2024-03-06T12:00:01",
+    "scout_tag_user": "5",
+    "controller_entrypoint": "bench",
+}
+
+
+class DroppingProcessor:
+    def on_emit(self, log_data):
+        pass
+
+    emit = on_emit
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis=30000):
+        return True
+
+
+def make_records():
+    return [
+        logging.makeLogRecord(
+            {
+                "name": "bench",
+                "levelno": logging.INFO,
+                "levelname": "INFO",
+                "pathname": __file__,
+                "lineno": i,
+                "msg": "Handled request %s",
+                "args": (i,),
+            }
+        )
+        for i in range(RECORDS)
+    ]
+
+
+def logging_handler(provider):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        handler = LoggingHandler(logger_provider=provider)
+
+    def emit(record):
+        for key, value in SCOUT_ATTRIBUTES.items():
+            setattr(record, key, value)
+        record.scout_current_operation = "SQL/Query"
+        handler.emit(record)
+
+    return emit
+
+
+def otel_log_emitter(provider, structured=False):
+    emitter = OtelLogEmitter(provider, structured=structured)
+
+    def emit(record):
+        emitter.emit(record, SCOUT_ATTRIBUTES, "SQL/Query")
+
+    return emit
+
+
+def run(make_emit):
+    provider = LoggerProvider()
+    provider.add_log_record_processor(DroppingProcessor())
+    emit = make_emit(provider)
+
+    records = make_records()
+    start = time.perf_counter()
+    for record in records:
+        emit(record)
+    elapsed = time.perf_counter() - start
+
+    records = make_records()
+    tracemalloc.start()
+    for record in records:
+        emit(record)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    provider.shutdown()
+    return elapsed / RECORDS, peak
+
+
+def main():
+    print(f"{'translation':>16} {'us/record':>10} {'peak KB':>8}")
+    for name, make_emit in (
+        ("LoggingHandler", logging_handler),
+        ("OtelLogEmitter", otel_log_emitter),
+        ("structured", lambda provider: otel_log_emitter(provider, structured=True)),
+    ):
+        per_record, peak = run(make_emit)
+        print(f"{name:>16} {per_record * 1e6:>10.2f} {peak / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
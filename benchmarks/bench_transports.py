@@ -0,0 +1,116 @@
+"""
+Import time, memory and throughput of each transport, exporting to stand-in
+OTLP collectors. Every transport runs in a fresh interpreter, so what it
+imports is counted for it alone.
+
+    python -m benchmarks.bench_transports
+"""
+
+import json
+import logging
+import resource
+import subprocess
+import sys
+import time
+import warnings
+
+RECORDS = 20_000
+
+
+def rss_kb() -> int:
+    # The current resident set size on Linux, otherwise the peak.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(transport, endpoint):
+    from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+    from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+
+    from scout_apm_logging.transport import create_log_exporter
+
+    rss_before = rss_kb()
+    start = time.perf_counter()
+    # Imports the transport's exporter module, and grpcio for gRPC.
+    exporter = create_log_exporter(transport, endpoint, {"x-scout-key": "bench"})
+    import_seconds = time.perf_counter() - start
+
+    provider = LoggerProvider()
+    provider.add_log_record_processor(
+        BatchLogRecordProcessor(exporter, max_queue_size=RECORDS)
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        handler = LoggingHandler(logger_provider=provider)
+
+    start = time.perf_counter()
+    for i in range(RECORDS):
+        handler.emit(
+            logging.makeLogRecord(
+                {
+                    "name": "bench",
+                    "levelno": logging.INFO,
+                    "levelname": "INFO",
+                    "msg": "Handled request %s",
+                    "args": (i,),
+                }
+            )
+        )
+    provider.force_flush()
+    elapsed = time.perf_counter() - start
+    provider.shutdown()
+
+    rss_after = rss_kb()
+    print(
+        json.dumps(
+            {
+                "import_ms": import_seconds * 1000,
+                "records_per_sec": RECORDS / elapsed,
+                "rss_kb": rss_after,
+                "transport_rss_kb": rss_after - rss_before,
+            }
+        )
+    )
+
+
+def main():
+    from tests.collector import StandInCollector, StandInHTTPCollector
+
+    collectors = {"grpc": StandInCollector(), "http": StandInHTTPCollector()}
+    print(
+        f"{'transport':>9} {'records':>8} {'records/s':>10} {'import ms':>10} "
+        f"{'RSS KB':>8} {'+RSS KB':>8}"
+    )
+    for transport, collector in collectors.items():
+        with collector:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_transports",
+                    transport,
+                    collector.endpoint,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{transport:>9} {len(collector.records):>8} "
+                f"{result['records_per_sec']:>10.0f} {result['import_ms']:>10.1f} "
+                f"{result['rss_kb']:>8} {result['transport_rss_kb']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        child(*sys.argv[1:])
+    else:
+        main()
@@ -0,0 +1,403 @@
+"""
+The logging hot path, end to end, without the network: emit throughput with and
+without a TrackedRequest, how it scales with tags and spans and with logging
+threads, memory under sustained load, and how long records take to reach a
+stand-in collector.
+
+Results are printed and can be written as JSON, to compare with a run from
+another release:
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+
+``--quick`` runs a tenth of the records, and ``--only`` picks scenarios.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from importlib import metadata
+from typing import Any, Callable, Dict, List
+
+from opentelemetry.sdk._logs import LoggerProvider
+from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+from scout_apm.core.tracked_request import Span, TrackedRequest
+
+from scout_apm_logging.compat import LogRecordExporter, LogRecordExportResult
+from scout_apm_logging.export_settings import ExportPreset, ExportSettings
+from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.transport import Transport, create_log_exporter
+from scout_apm_logging.translate import OtelLogEmitter
+from tests.collector import StandInCollector
+
+RECORDS = 50_000
+THREADS = (1, 8, 32, 64)
+# Handler arguments of the modes compared under contention.
+CONTENTION_MODES = {
+    "default": {},
+    "thread_buffers": {"thread_buffer_size": 64},
+}
+TAGS = (0, 10, 100)
+SPANS = (0, 100, 1000)
+LINES_PER_REQUEST = 10
+# Records per second logged while measuring export latency, and how long for.
+LATENCY_RATE = 2_000
+LATENCY_SECONDS = 2.0
+
+
+class DiscardingExporter(LogRecordExporter):
+    """Stands in for the OTLP exporter, counting the records it's given."""
+
+    def __init__(self):
+        self.records = 0
+
+    def export(self, batch):
+        self.records += len(batch)
+        return LogRecordExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+    def shutdown(self, *args, **kwargs):
+        pass
+
+
+class TimedCollector(StandInCollector):
+    """Notes how long each record took from being logged to arriving."""
+
+    def __init__(self):
+        super().__init__()
+        self.latencies: List[float] = []
+
+    def receive(self, request):
+        now = time.time_ns()
+        self.latencies.extend(
+            (now - record.time_unix_nano) / 1e9
+            for resource_logs in request.resource_logs
+            for scope_logs in resource_logs.scope_logs
+            for record in scope_logs.log_records
+        )
+        super().receive(request)
+
+
+class Pipeline:
+    """A handler exporting through the real batch processor to ``exporter``."""
+
+    def __init__(self, exporter, settings=None, **handler_kwargs):
+        settings = settings or ExportSettings(max_queue_size=RECORDS * 2)
+        self.provider = LoggerProvider()
+        self.provider.add_log_record_processor(
+            BatchLogRecordProcessor(exporter, **settings.processor_kwargs())
+        )
+        ScoutOtelHandler.otel_handler = OtelLogEmitter(self.provider)
+        self.handler = ScoutOtelHandler(service_name="bench", **handler_kwargs)
+
+    def close(self):
+        self.provider.shutdown()
+        ScoutOtelHandler.otel_handler = None
+
+
+def rss_kb() -> int:
+    # The current resident set size on Linux, otherwise the peak.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def make_record(i: int) -> logging.LogRecord:
+    return logging.LogRecord(
+        name="bench.views",
+        level=logging.INFO,
+        pathname=__file__,
+        lineno=i,
+        msg="Handled request %s for user %s",
+        args=(i, i % 100),
+        exc_info=None,
+    )
+
+
+def make_request(tags: int = 10, spans: int = 20) -> TrackedRequest:
+    request = TrackedRequest()
+    request.complete_spans = [
+        Span(request.request_id, f"SQL/Query/{i % 20}") for i in range(spans)
+    ]
+    if spans:
+        request.complete_spans[0] = Span(request.request_id, "Controller/bench")
+    for i in range(tags):
+        request.tag(f"tag_{i}", f"value_{i}")
+    return request
+
+
+def use_requests(make: Callable[[], Any], records: int):
+    """
+    Make TrackedRequest.instance() return the next of enough requests from
+    ``make`` for ``records`` every LINES_PER_REQUEST calls, as if each request
+    logged that many lines. The requests are made up front, so making them
+    isn't timed.
+    """
+    requests = [make() for _ in range(records // LINES_PER_REQUEST + 1)]
+    # TrackedRequests are per thread, so each thread goes through them on its own.
+    state = threading.local()
+
+    def instance():
+        lines = getattr(state, "lines", LINES_PER_REQUEST)
+        if lines == LINES_PER_REQUEST:
+            state.index = getattr(state, "index", -1) + 1
+            lines = 0
+        state.lines = lines + 1
+        return requests[state.index % len(requests)]
+
+    original = TrackedRequest.__dict__["instance"]
+    TrackedRequest.instance = staticmethod(instance)  # type: ignore[method-assign]
+    return lambda: setattr(TrackedRequest, "instance", original)
+
+
+def emit_rate(handler, records) -> float:
+    start = time.perf_counter()
+    for record in records:
+        handler.emit(record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def throughput(scale: float) -> Dict[str, Any]:
+    records = int(RECORDS * scale)
+    results = {}
+    for name, make in (
+        ("no_request", lambda: None),
+        ("request", make_request),
+    ):
+        pipeline = Pipeline(DiscardingExporter())
+        restore = use_requests(make, records)
+        try:
+            rate = emit_rate(pipeline.handler, [make_record(i) for i in range(records)])
+        finally:
+            restore()
+            pipeline.close()
+        results[f"{name}_records_per_sec"] = rate
+    return results
+
+
+def scaling(scale: float) -> Dict[str, Any]:
+    records = int(RECORDS * scale / 5)
+    results = {}
+    for dimension, values in (("tags", TAGS), ("spans", SPANS)):
+        for value in values:
+            make = (
+                (lambda v=value: make_request(tags=v, spans=20))
+                if dimension == "tags"
+                else (lambda v=value: make_request(tags=10, spans=v))
+            )
+            batch = [make_record(i) for i in range(records)]
+            pipeline = Pipeline(DiscardingExporter())
+            restore = use_requests(make, records)
+            try:
+                rate = emit_rate(pipeline.handler, batch)
+            finally:
+                restore()
+                pipeline.close()
+            results[f"{dimension}_{value}_us_per_record"] = 1e6 / rate
+    return results
+
+
+def contention(scale: float) -> Dict[str, Any]:
+    records = int(RECORDS * scale)
+    results = {}
+    for mode, handler_kwargs in CONTENTION_MODES.items():
+        for threads in THREADS:
+            pipeline = Pipeline(DiscardingExporter(), **handler_kwargs)
+            restore = use_requests(make_request, records)
+            latencies: List[float] = []
+            lock = threading.Lock()
+
+            def log(count):
+                own = []
+                handle = pipeline.handler.handle
+                for i in range(count):
+                    record = make_record(i)
+                    start = time.perf_counter()
+                    handle(record)
+                    own.append(time.perf_counter() - start)
+                with lock:
+                    latencies.extend(own)
+
+            workers = [
+                threading.Thread(target=log, args=(records // threads,))
+                for _ in range(threads)
+            ]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            # Buffered records only count once they're handed to OTel.
+            pipeline.handler.flush()
+            elapsed = time.perf_counter() - start
+            restore()
+            pipeline.close()
+
+            quantiles = statistics.quantiles(latencies, n=100)
+            # The default mode keeps the names of earlier releases' results.
+            key = f"threads_{threads}"
+            if mode != "default":
+                key = f"{mode}_{key}"
+            results[f"{key}_records_per_sec"] = len(latencies) / elapsed
+            results[f"{key}_p99_us"] = quantiles[98] * 1e6
+    return results
+
+
+def memory(scale: float) -> Dict[str, Any]:
+    records = int(RECORDS * 4 * scale)
+    exporter = DiscardingExporter()
+    pipeline = Pipeline(exporter, ExportSettings())
+    restore = use_requests(make_request, LINES_PER_REQUEST * 100)
+    gc.collect()
+    start_kb = peak_kb = rss_kb()
+    try:
+        for i in range(records):
+            pipeline.handler.emit(make_record(i))
+            if i % 5_000 == 0:
+                peak_kb = max(peak_kb, rss_kb())
+        pipeline.provider.force_flush()
+    finally:
+        restore()
+        pipeline.close()
+    gc.collect()
+    end_kb = rss_kb()
+    return {
+        "records": records,
+        "rss_start_kb": start_kb,
+        "rss_peak_kb": max(peak_kb, end_kb),
+        "rss_growth_kb": end_kb - start_kb,
+    }
+
+
+def export_latency(scale: float) -> Dict[str, Any]:
+    results = {}
+    records = int(LATENCY_RATE * LATENCY_SECONDS * max(scale, 0.25))
+    for name, settings in (
+        ("default", ExportSettings()),
+        (ExportPreset.LOW_LATENCY, ExportSettings(preset=ExportPreset.LOW_LATENCY)),
+    ):
+        with TimedCollector() as collector:
+            exporter = create_log_exporter(
+                Transport.GRPC,
+                collector.endpoint,
+                {"x-scout-key": "bench"},
+                **settings.exporter_kwargs(),
+            )
+            pipeline = Pipeline(exporter, settings)
+            restore = use_requests(make_request, records)
+            try:
+                start = time.perf_counter()
+                for i in range(records):
+                    # Pace the records, so batches go out on the schedule.
+                    delay = start + i / LATENCY_RATE - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pipeline.handler.emit(make_record(i))
+                collector.wait_for_records(records, timeout=30)
+            finally:
+                restore()
+                pipeline.close()
+            quantiles = statistics.quantiles(collector.latencies, n=100)
+        key = name.replace("-", "_")
+        results[f"{key}_p50_ms"] = quantiles[49] * 1e3
+        results[f"{key}_p99_ms"] = quantiles[98] * 1e3
+        results[f"{key}_delivered"] = len(collector.latencies) / records
+    return results
+
+
+SCENARIOS: Dict[str, Callable[[float], Dict[str, Any]]] = {
+    "throughput": throughput,
+    "scaling": scaling,
+    "contention": contention,
+    "memory": memory,
+    "export_latency": export_latency,
+}
+
+
+def environment() -> Dict[str, Any]:
+    def version(package):
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "scout_apm_logging": version("scout-apm-logging"),
+        "commit": commit,
+        "opentelemetry_sdk": version("opentelemetry-sdk"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline):
+    print(f"\n{'metric':<44} {'baseline':>12} {'current':>12} {'change':>8}")
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get(scenario, {}).get(metric)
+            if not isinstance(before, (int, float)) or not before:
+                continue
+            change = (value - before) / before * 100
+            print(
+                f"{scenario + '.' + metric:<44} {before:>12.2f} {value:>12.2f} "
+                f"{change:>+7.1f}%"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args(argv)
+
+    scale = 0.1 if args.quick else 1.0
+    results = {}
+    for name in args.only:
+        results[name] = SCENARIOS[name](scale)
+        for metric, value in results[name].items():
+            print(f"{name + '.' + metric:<44} {value:>12.2f}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(
+                {
+                    "environment": environment(),
+                    "quick": args.quick,
+                    "results": results,
+                },
+                output,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline)["results"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,2 @@
+from scout_apm_logging.async_handler import AsyncScoutOtelHandler
 from scout_apm_logging.handler import ScoutOtelHandler
@@ -0,0 +1,64 @@
+from contextvars import ContextVar
+from typing import Any
+
+from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.log_queue import OverflowPolicy
+
+
+class ContextLocal:
+    """
+    Stands in for a ``threading.local()`` with a ``value``, kept in a
+    ContextVar instead, so each asyncio task has its own as well as each
+    thread.
+    """
+
+    __slots__ = ("_var",)
+
+    def __init__(self, name: str):
+        self._var: ContextVar[Any] = ContextVar(name)
+
+    @property
+    def value(self):
+        try:
+            return self._var.get()
+        except LookupError:
+            raise AttributeError("value") from None
+
+    @value.setter
+    def value(self, value):
+        self._var.set(value)
+
+
+class AsyncScoutOtelHandler(ScoutOtelHandler):
+    """
+    A ScoutOtelHandler for asyncio apps, e.g. under uvicorn.
+
+    The reentrancy guard and the cached Scout context are kept per task rather
+    than per thread, so tasks interleaving on the event loop don't rebuild
+    each other's context. Records are always queued for the handler's worker
+    thread, which does the OTel conversion and hands them to the batch
+    processor's thread for export, so emit never waits on either. A full
+    queue drops records rather than blocking the loop.
+
+    The exporter pipeline is set up on the worker too, so the loop doesn't
+    wait on importing OTel when the first record is logged.
+    """
+
+    def __init__(self, service_name, **kwargs):
+        overflow_policy = kwargs.setdefault(
+            "overflow_policy", OverflowPolicy.DROP_NEWEST
+        )
+        if overflow_policy == OverflowPolicy.BLOCK:
+            raise ValueError("AsyncScoutOtelHandler can't block the event loop")
+        kwargs["async_mode"] = True
+        super().__init__(service_name, **kwargs)
+        self._handling_log = ContextLocal("scout_handling_log")
+        self._request_context = ContextLocal("scout_request_context")
+
+    def _initialize_for_emit(self):
+        # Left to the worker, see _consume.
+        return True
+
+    def _consume(self, item):
+        if ScoutOtelHandler.otel_handler or super()._initialize_for_emit():
+            super()._consume(item)
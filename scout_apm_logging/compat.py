@@ -0,0 +1,16 @@
+"""
+Names that moved between opentelemetry-sdk releases, under their current ones.
+"""
+
+try:
+    from opentelemetry.sdk._logs.export import (
+        LogRecordExporter,
+        LogRecordExportResult,
+    )
+except ImportError:  # Older opentelemetry-sdk
+    from opentelemetry.sdk._logs.export import (  # type: ignore[assignment]
+        LogExporter as LogRecordExporter,
+        LogExportResult as LogRecordExportResult,
+    )
+
+__all__ = ["LogRecordExporter", "LogRecordExportResult"]
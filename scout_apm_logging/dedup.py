@@ -0,0 +1,200 @@
+import datetime as dt
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from scout_apm_logging.fork import reset_after_fork
+from scout_apm_logging.tracebacks import EXCEPTION_MESSAGE, EXCEPTION_TYPE
+from scout_apm_logging.utils.log_record import QueuedRecord
+
+REPEAT_COUNT = "scout_repeat_count"
+FIRST_SEEN = "scout_first_seen"
+LAST_SEEN = "scout_last_seen"
+
+# The attributes and current operation a repeated record would have been
+# exported with.
+Context = Tuple[Optional[Dict[str, Any]], Optional[str]]
+# A summary record, and the attributes and current operation to export it with.
+Summary = Tuple[QueuedRecord, Dict[str, Any], Optional[str]]
+
+# How often the flusher looks for windows that are over, at most.
+_FLUSHER_TICK = 1.0
+
+
+class _Repeats:
+    __slots__ = ("first_seen", "last_seen", "count", "record", "context")
+
+    def __init__(self, created: float):
+        self.first_seen = created
+        self.last_seen = created
+        self.count = 0
+        self.record: Optional[QueuedRecord] = None
+        self.context: Context = (None, None)
+
+
+def _isoformat(created: float) -> str:
+    return dt.datetime.fromtimestamp(created, dt.timezone.utc).isoformat()
+
+
+class LogDeduplicator:
+    """
+    Collapses bursts of identical records, such as retry loops.
+
+    The first record of a kind is exported as usual, and identical ones seen
+    within ``window`` seconds of it are only counted. Once the window is over,
+    a copy of the first repeat is exported, as of the last, with
+    ``scout_repeat_count``, ``scout_first_seen`` and ``scout_last_seen``
+    attributes. Records are alike when they have the same logger, level,
+    message template, args and Scout operation. The copy has the exception's
+    type and message but not its traceback, which would keep every frame of
+    it alive for the window; the first record of the kind has that.
+
+    At most ``max_keys`` kinds of record are tracked. Beyond that the least
+    recently seen is reported early to make room.
+
+    Summaries are taken with ``pop_summaries``. Given ``report``, a background
+    flusher also passes it the summaries of windows that are over, so that
+    they're exported even if nothing else is logged.
+    """
+
+    def __init__(
+        self,
+        window: float = 10.0,
+        max_keys: int = 1024,
+        structured: bool = False,
+        report: Optional[Callable[[Summary], None]] = None,
+        on_flusher_start: Optional[Callable[[], None]] = None,
+    ):
+        self.window = window
+        self.max_keys = max_keys
+        self.structured = structured
+        self.report = report
+        self.on_flusher_start = on_flusher_start
+        self.dropped = 0
+        self._reset()
+
+        reset_after_fork(self)
+
+    def _reset(self):
+        self._repeats: "OrderedDict[Hashable, _Repeats]" = OrderedDict()
+        self._summaries: List[Summary] = []
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _reset_after_fork(self):
+        # The child leaves the parent's repeats to the parent.
+        self._reset()
+
+    def keep(
+        self,
+        record: logging.LogRecord,
+        operation: Optional[str] = None,
+        context: Optional[Callable[[], Context]] = None,
+    ) -> bool:
+        """
+        Return True if ``record`` should be exported now, False if it was
+        counted as a repeat. ``context`` gives the attributes and current
+        operation the first repeat is summarized with.
+        """
+        key = self._key(record, operation)
+        created = record.created
+        with self._lock:
+            repeats = self._repeats.get(key)
+            if repeats is None or created - repeats.first_seen >= self.window:
+                if repeats is not None:
+                    # The window is over, so this record starts a new one.
+                    self._summarize(repeats)
+                self._repeats[key] = _Repeats(created)
+                self._repeats.move_to_end(key)
+                if len(self._repeats) > self.max_keys:
+                    _, evicted = self._repeats.popitem(last=False)
+                    self._summarize(evicted)
+                return True
+
+            repeats.count += 1
+            repeats.last_seen = created
+            self._repeats.move_to_end(key)
+            if repeats.record is None:
+                # Made under the lock, so that the window can't be summarized,
+                # or the key evicted, before its first repeat is set.
+                repeats.record, repeats.context = self._snapshot(record, context)
+                if self.report is not None and self._flusher is None:
+                    self._flusher = threading.Thread(
+                        target=self._run, name="scout-log-dedup", daemon=True
+                    )
+                    self._flusher.start()
+        return False
+
+    def _snapshot(
+        self, record: logging.LogRecord, context: Optional[Callable[[], Context]]
+    ) -> Tuple[QueuedRecord, Context]:
+        summary_record = QueuedRecord(record, self.structured, tracebacks=None)
+        summary_context = context() if context is not None else (None, None)
+        attributes = dict(summary_context[0] or {})
+        if record.exc_info and record.exc_info[0] is not None:
+            exc_type, exc_value, _ = record.exc_info
+            attributes[EXCEPTION_TYPE] = exc_type.__name__
+            if exc_value is not None and exc_value.args:
+                attributes[EXCEPTION_MESSAGE] = str(exc_value.args[0])
+        return summary_record, (attributes, summary_context[1])
+
+    def pop_summaries(self, now: float, flush: bool = False) -> List[Summary]:
+        """
+        Return the summary records of every window that has ended by ``now``,
+        or of all of them if ``flush`` is set, each with the attributes and
+        current operation to export it with.
+        """
+        with self._lock:
+            # Least recently seen first, so stop at the first one still active.
+            while self._repeats:
+                key, repeats = next(iter(self._repeats.items()))
+                if not flush and now - repeats.last_seen < self.window:
+                    break
+                del self._repeats[key]
+                self._summarize(repeats)
+
+            summaries, self._summaries = self._summaries, []
+        return summaries
+
+    def _summarize(self, repeats: _Repeats):
+        record = repeats.record
+        if record is None:
+            # It was never repeated, there's nothing to report.
+            return
+        record.created = repeats.last_seen
+        attributes, current_operation = repeats.context
+        attributes = {
+            **(attributes or {}),
+            REPEAT_COUNT: repeats.count,
+            FIRST_SEEN: _isoformat(repeats.first_seen),
+            LAST_SEEN: _isoformat(repeats.last_seen),
+        }
+        self._summaries.append((record, attributes, current_operation))
+
+    def _run(self):
+        if self.on_flusher_start:
+            self.on_flusher_start()
+        tick = min(self.window, _FLUSHER_TICK)
+        while True:
+            time.sleep(tick)
+            for summary in self.pop_summaries(time.time()):
+                try:
+                    self.report(summary)
+                except Exception:
+                    self.dropped += 1
+
+    @staticmethod
+    def _key(record: logging.LogRecord, operation: Optional[str]) -> Hashable:
+        args: Any = record.args
+        try:
+            hash(args)
+        except TypeError:
+            args = repr(args)
+        try:
+            hash(record.msg)
+            msg = record.msg
+        except TypeError:
+            msg = repr(record.msg)
+        return (record.name, record.levelno, msg, args, operation)
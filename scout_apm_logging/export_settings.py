@@ -0,0 +1,112 @@
+from typing import Any, Dict, Optional
+
+
+class ExportPreset:
+    LOW_LATENCY = "low-latency"
+    HIGH_THROUGHPUT = "high-throughput"
+
+
+# Times are in milliseconds, as for the OTEL_BLRP_* variables.
+EXPORT_PRESETS: Dict[str, Dict[str, Any]] = {
+    # Small batches sent often, and not compressed, so records show up quickly
+    # and a lost batch is a small one.
+    ExportPreset.LOW_LATENCY: {
+        "batch_size": 128,
+        "max_queue_size": 2048,
+        "schedule_delay": 200,
+        "export_timeout": 5000,
+        "compression": "none",
+    },
+    # Large gzipped batches, for apps that log a lot and can wait a few
+    # seconds to see it.
+    ExportPreset.HIGH_THROUGHPUT: {
+        "batch_size": 2048,
+        "max_queue_size": 32768,
+        "schedule_delay": 5000,
+        "export_timeout": 30000,
+        "compression": "gzip",
+    },
+}
+
+COMPRESSIONS = ("gzip", "none")
+
+
+class ExportSettings:
+    """
+    How records are batched and sent: a preset, if any, with individual
+    settings on top of it. Anything left unset is up to the OTel SDK, which
+    reads the standard OTEL_BLRP_* and OTEL_EXPORTER_OTLP_* variables.
+    """
+
+    __slots__ = (
+        "batch_size",
+        "max_queue_size",
+        "schedule_delay",
+        "export_timeout",
+        "compression",
+    )
+
+    def __init__(
+        self,
+        preset: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        schedule_delay: Optional[float] = None,
+        export_timeout: Optional[float] = None,
+        compression: Optional[str] = None,
+    ):
+        if preset is not None and preset not in EXPORT_PRESETS:
+            raise ValueError(f"Unknown export preset: {preset}")
+        defaults = EXPORT_PRESETS.get(preset, {}) if preset else {}
+
+        self.batch_size = _int(batch_size, defaults.get("batch_size"))
+        self.max_queue_size = _int(max_queue_size, defaults.get("max_queue_size"))
+        if (
+            self.batch_size is not None
+            and self.max_queue_size is not None
+            and self.batch_size > self.max_queue_size
+        ):
+            raise ValueError(
+                f"batch_size ({self.batch_size}, logs_batch_size in the Scout "
+                f"config) can't be more than max_queue_size "
+                f"({self.max_queue_size}, logs_max_queue_size)"
+            )
+        self.schedule_delay = _float(schedule_delay, defaults.get("schedule_delay"))
+        self.export_timeout = _float(export_timeout, defaults.get("export_timeout"))
+
+        compression = compression or defaults.get("compression")
+        if compression is not None:
+            compression = compression.lower()
+            if compression not in COMPRESSIONS:
+                raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+
+    def processor_kwargs(self) -> Dict[str, Any]:
+        """Arguments for the BatchLogRecordProcessor."""
+        kwargs = {
+            "max_export_batch_size": self.batch_size,
+            "max_queue_size": self.max_queue_size,
+            "schedule_delay_millis": self.schedule_delay,
+            "export_timeout_millis": self.export_timeout,
+        }
+        return {key: value for key, value in kwargs.items() if value is not None}
+
+    def exporter_kwargs(self) -> Dict[str, Any]:
+        """Arguments for the transport's log exporter."""
+        kwargs: Dict[str, Any] = {}
+        if self.export_timeout is not None:
+            kwargs["timeout"] = self.export_timeout / 1000
+        if self.compression is not None:
+            kwargs["compression"] = self.compression
+        return kwargs
+
+
+def _int(value, default) -> Optional[int]:
+    # Values from the Scout config may come from environment variables.
+    value = default if value is None else value
+    return None if value is None else int(value)
+
+
+def _float(value, default) -> Optional[float]:
+    value = default if value is None else value
+    return None if value is None else float(value)
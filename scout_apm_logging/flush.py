@@ -0,0 +1,124 @@
+"""
+Flushing and shutting down the export pipeline within a deadline.
+
+The OTel SDK's flush and shutdown wait on the exporter for as long as it takes,
+and its exit hook can hold up a short-lived process for the whole export
+timeout. Here each pipeline is flushed on a thread of its own, so they're sent
+in parallel, and whatever hasn't been sent by the deadline is given up on and
+counted as abandoned.
+"""
+
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from scout_apm_logging.green import thread_class
+
+# Seconds the handler's exit hook has to flush and shut down the pipeline.
+DEFAULT_SHUTDOWN_TIMEOUT = 5.0
+
+
+class FlushResult:
+    """
+    How many records a flush or shutdown got exported, and how many it left
+    behind, unsent or failed, by its deadline.
+    """
+
+    __slots__ = ("flushed", "abandoned")
+
+    def __init__(self, flushed: int = 0, abandoned: int = 0):
+        self.flushed = flushed
+        self.abandoned = abandoned
+
+    def __repr__(self):
+        return f"FlushResult(flushed={self.flushed}, abandoned={self.abandoned})"
+
+
+class ExportPipeline:
+    """
+    A LoggerProvider with the batch processor it exports through (or the
+    BatchingLogExporter that batches records in its place), and the
+    CountingLogExporter that batches are handed to. ``record_processor`` is
+    the processor on the LoggerProvider, which providers for other resources
+    share.
+    """
+
+    __slots__ = ("logger_provider", "processor", "exporter", "record_processor")
+
+    def __init__(
+        self,
+        logger_provider: Any,
+        processor: Any,
+        exporter: Any,
+        record_processor: Any = None,
+    ):
+        self.logger_provider = logger_provider
+        self.processor = processor
+        self.exporter = exporter
+        self.record_processor = record_processor or processor
+
+    def pending(self) -> int:
+        """
+        Records the processor holds, queued or in a batch being exported.
+        """
+        # The SDK has no public count of a processor's queue. Before 1.33 the
+        # queue was on the processor itself, as it is on BatchingLogExporter.
+        processor = self._batch_processor()
+        try:
+            queued = len(getattr(processor, "_queue", ()))
+        except TypeError:
+            queued = 0
+        return queued + self.exporter.in_flight
+
+    def abandon_after_fork(self):
+        """
+        Keep a forked child from running the inherited processor. The SDK
+        starts its worker again in the child, after the handler has dropped
+        the pipeline, and it would otherwise run for as long as the child
+        does, in every child forked since.
+        """
+        processor = self._batch_processor()
+        if hasattr(processor, "_shutdown"):
+            # Its worker stops as soon as it starts, without exporting, or
+            # shutting down the exporter and its broken channel.
+            processor._shutdown = True
+
+    def _batch_processor(self) -> Any:
+        return getattr(self.processor, "_batch_processor", self.processor)
+
+
+def deadline_after(timeout: float) -> float:
+    return time.monotonic() + timeout
+
+
+def remaining(deadline: float) -> float:
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def run_until(
+    calls: Iterable[Callable[[], Any]],
+    deadline: float,
+    on_thread_start: Optional[Callable[[], None]] = None,
+) -> bool:
+    """
+    Run each of ``calls`` on a daemon thread of its own, and wait for them
+    until ``deadline``. Returns whether they all finished in time. Calls still
+    running are left to finish on their own, without holding up exit. When
+    threading is monkey-patched, they're real OS threads, so an export can't
+    hold up the hub, or the wait for it.
+    """
+
+    def run(call):
+        if on_thread_start:
+            on_thread_start()
+        call()
+
+    thread_type = thread_class()
+    threads = [
+        thread_type(target=run, args=(call,), name="scout-flush", daemon=True)
+        for call in calls
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(remaining(deadline))
+    return not any(thread.is_alive() for thread in threads)
@@ -0,0 +1,44 @@
+"""
+Counts what the exporter the batch processor hands batches to has sent, for
+flushes to report on.
+"""
+
+import threading
+
+from scout_apm_logging.compat import LogRecordExporter, LogRecordExportResult
+
+
+class CountingLogExporter(LogRecordExporter):
+    """
+    Keeps count of the records ``exporter`` exported and failed to export, and
+    of those in batches it is still exporting.
+    """
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.exported = 0
+        self.failed = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def export(self, batch):
+        count = len(batch)
+        with self._lock:
+            self.in_flight += count
+        result = LogRecordExportResult.FAILURE
+        try:
+            result = self.exporter.export(batch)
+        finally:
+            with self._lock:
+                self.in_flight -= count
+                if result == LogRecordExportResult.SUCCESS:
+                    self.exported += count
+                else:
+                    self.failed += count
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter.force_flush(timeout_millis)
+
+    def shutdown(self, *args, **kwargs):
+        return self.exporter.shutdown(*args, **kwargs)
@@ -0,0 +1,28 @@
+"""
+Resetting, in a forked child, the objects whose threads and locks don't
+survive the fork: the handler's pipelines, and its queues and buffers.
+"""
+
+import os
+import weakref
+
+_resettable: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def reset_after_fork(obj):
+    """
+    Call ``obj._reset_after_fork()`` in the child after every fork, for as
+    long as ``obj`` is alive. It's only held weakly, and one fork hook serves
+    every object, so a queue or buffer dropped with its handler costs nothing
+    once it's gone.
+    """
+    _resettable.add(obj)
+
+
+def _reset_all():
+    for obj in list(_resettable):
+        obj._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_all)
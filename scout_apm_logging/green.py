@@ -0,0 +1,245 @@
+"""
+Real OS threads for apps whose threading is monkey-patched by gevent or
+eventlet.
+
+Once threading is patched, every thread the handler or the OTel SDK starts is
+a greenlet, and the protobuf serialization and export I/O done on them runs on
+the hub, holding up every request greenlet until it's done. The threads here
+are started and woken with the original, unpatched ``_thread`` functions, so
+that work runs alongside the hub instead. Greenlets only ever append to their
+queues, and wait on them by polling with the (patched, cooperative) sleep.
+"""
+
+import sys
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+
+from scout_apm_logging.fork import reset_after_fork
+from scout_apm_logging.log_queue import OverflowPolicy
+
+# How often a greenlet waiting on a real thread checks whether it's done.
+_POLL_INTERVAL = 0.005
+
+# How often a RealThreadQueue's worker calls on_tick when there's nothing to
+# consume.
+DEFAULT_TICK = 0.1
+
+
+def threading_patched() -> bool:
+    """
+    Whether gevent or eventlet has monkey-patched threading.
+    """
+    gevent_monkey = sys.modules.get("gevent.monkey")
+    if gevent_monkey is not None and gevent_monkey.is_module_patched("threading"):
+        return True
+    eventlet_patcher = sys.modules.get("eventlet.patcher")
+    if eventlet_patcher is not None and eventlet_patcher.is_monkey_patched("thread"):
+        return True
+    return False
+
+
+def _original_thread_function(name: str) -> Callable:
+    # The _thread function as it was before any monkey-patching.
+    gevent_monkey = sys.modules.get("gevent.monkey")
+    if gevent_monkey is not None and gevent_monkey.is_module_patched("_thread"):
+        return gevent_monkey.get_original("_thread", name)
+    eventlet_patcher = sys.modules.get("eventlet.patcher")
+    if eventlet_patcher is not None and eventlet_patcher.is_monkey_patched("thread"):
+        return getattr(eventlet_patcher.original("_thread"), name)
+    import _thread
+
+    return getattr(_thread, name)
+
+
+def allocate_lock():
+    """
+    A lock that blocks the OS thread waiting on it, not just its greenlet.
+    """
+    return _original_thread_function("allocate_lock")()
+
+
+class RealThread:
+    """
+    A daemon OS thread, even when threading is monkey-patched, running
+    ``target(*args)``. Has the parts of ``threading.Thread``'s interface that
+    the handler uses; ``join`` polls, so a greenlet joining it doesn't block
+    the hub.
+    """
+
+    def __init__(self, target: Callable, args: tuple = (), **kwargs: Any):
+        # Names and daemon flags are threading's, which doesn't know of these.
+        self._target = target
+        self._args = args
+        self._started = False
+        self._done = False
+
+    def start(self):
+        self._started = True
+        _original_thread_function("start_new_thread")(self._run, ())
+
+    def _run(self):
+        try:
+            self._target(*self._args)
+        finally:
+            self._done = True
+
+    def is_alive(self) -> bool:
+        return self._started and not self._done
+
+    def join(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_alive():
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(_POLL_INTERVAL)
+
+
+def thread_class():
+    """
+    RealThread when threading is monkey-patched, threading.Thread otherwise.
+    """
+    if threading_patched():
+        return RealThread
+    import threading
+
+    return threading.Thread
+
+
+class _Signal:
+    # A wake-up call to a real thread that greenlets can make without
+    # blocking: a lock that's held while there's nothing to do.
+
+    def __init__(self):
+        self._lock = allocate_lock()
+        self._lock.acquire()
+
+    def set(self):
+        try:
+            self._lock.release()
+        except RuntimeError:
+            pass  # Already set
+
+    def wait(self, timeout: float) -> bool:
+        return self._lock.acquire(True, timeout)
+
+
+class RealThreadQueue:
+    """
+    A bounded handoff from greenlets to a worker on a real OS thread, which
+    passes each item to ``consume``, and calls ``on_tick`` after each round of
+    items, or every ``tick`` seconds when there are none.
+
+    It's a LogQueue for monkey-patched apps: ``put`` only appends to a deque,
+    and ``flush`` waits for the worker without blocking the hub. Records can
+    be dropped when it's full, but not waited for.
+    """
+
+    def __init__(
+        self,
+        consume: Callable[[Any], None],
+        maxsize: int = 2048,
+        overflow_policy: str = OverflowPolicy.DROP_NEWEST,
+        tick: float = DEFAULT_TICK,
+        on_tick: Optional[Callable[[], None]] = None,
+        on_worker_start: Optional[Callable[[], None]] = None,
+    ):
+        if overflow_policy not in (
+            OverflowPolicy.DROP_OLDEST,
+            OverflowPolicy.DROP_NEWEST,
+        ):
+            raise ValueError(f"Unsupported overflow policy: {overflow_policy}")
+
+        self.consume = consume
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.tick = tick
+        self.on_tick = on_tick
+        self.on_worker_start = on_worker_start
+        self.dropped = 0
+
+        self._items: Deque[Any] = deque(
+            maxlen=maxsize if overflow_policy == OverflowPolicy.DROP_OLDEST else None
+        )
+        self._reset()
+
+        reset_after_fork(self)
+
+    def _reset(self):
+        self._signal = _Signal()
+        self._busy = False
+        self._lock = allocate_lock()
+        self._worker: Optional[RealThread] = None
+
+    def _reset_after_fork(self):
+        # As for LogQueue, the child leaves what the parent queued to it.
+        self._items.clear()
+        self._reset()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item) -> bool:
+        """
+        Queue ``item`` for the worker. Returns False if it was dropped.
+        """
+        if self._worker is None:
+            self._start_worker()
+
+        if len(self._items) >= self.maxsize:
+            self._count_dropped()
+            if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                return False
+
+        self._items.append(item)
+        self._signal.set()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the worker has consumed everything queued so far.
+        """
+        if self._worker is None:
+            return not self._items
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._signal.set()
+        while self._items or self._busy:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(_POLL_INTERVAL)
+        return True
+
+    def _count_dropped(self):
+        with self._lock:
+            self.dropped += 1
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = RealThread(self._run)
+        self._worker.start()
+
+    def _run(self):
+        if self.on_worker_start:
+            self.on_worker_start()
+        while True:
+            self._signal.wait(self.tick)
+            self._busy = True
+            while self._items:
+                try:
+                    item = self._items.popleft()
+                except IndexError:
+                    break
+                try:
+                    self.consume(item)
+                except Exception:
+                    self._count_dropped()
+            if self.on_tick:
+                try:
+                    self.on_tick()
+                except Exception:
+                    # Whatever it was doing is retried on the next tick.
+                    pass
+            self._busy = False
@@ -0,0 +1,123 @@
+"""
+Batching for pipelines exported from a real OS thread, in place of the batch
+processor's, whose worker would be a greenlet once threading is monkey-patched.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Optional
+
+from opentelemetry.sdk._logs.export import SimpleLogRecordProcessor
+
+from scout_apm_logging.compat import LogRecordExporter, LogRecordExportResult
+from scout_apm_logging.green import allocate_lock
+
+# The batch processor's defaults, and the OTEL_BLRP_* variables that set them.
+_DEFAULTS = {
+    "max_export_batch_size": ("OTEL_BLRP_MAX_EXPORT_BATCH_SIZE", 512),
+    "max_queue_size": ("OTEL_BLRP_MAX_QUEUE_SIZE", 2048),
+    "schedule_delay_millis": ("OTEL_BLRP_SCHEDULE_DELAY", 1000),
+}
+
+
+def _setting(name: str, value: Optional[float]) -> float:
+    if value is not None:
+        return value
+    variable, default = _DEFAULTS[name]
+    return float(os.environ.get(variable, default))
+
+
+class BatchingLogExporter(LogRecordExporter):
+    """
+    Collects the records it's given, and sends them to ``exporter`` in batches
+    of ``max_export_batch_size``, or once the oldest has waited
+    ``schedule_delay_millis``, on the thread that hands it records or calls
+    ``send_due``, ``force_flush`` or ``shutdown``. Records beyond
+    ``max_queue_size`` are dropped.
+    """
+
+    def __init__(
+        self,
+        exporter,
+        max_export_batch_size: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        schedule_delay_millis: Optional[float] = None,
+        export_timeout_millis: Optional[float] = None,
+    ):
+        # The export timeout is the exporter's own.
+        self.exporter = exporter
+        self.max_export_batch_size = int(
+            _setting("max_export_batch_size", max_export_batch_size)
+        )
+        self.max_queue_size = int(_setting("max_queue_size", max_queue_size))
+        self.schedule_delay = (
+            _setting("schedule_delay_millis", schedule_delay_millis) / 1000
+        )
+        self.dropped = 0
+        # Named as the batch processor's is, for ExportPipeline.pending.
+        self._queue: Deque[Any] = deque()
+        self._since = 0.0
+        self._send_lock = allocate_lock()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def export(self, batch):
+        if len(self._queue) + len(batch) > self.max_queue_size:
+            self.dropped += len(batch)
+            return LogRecordExportResult.FAILURE
+        if not self._queue:
+            self._since = time.monotonic()
+        self._queue.extend(batch)
+        # On the real thread, a full batch holds up only that thread, so the
+        # RealThreadQueue in front of it fills up, rather than this queue.
+        while len(self._queue) >= self.max_export_batch_size:
+            self._send_batch()
+        return LogRecordExportResult.SUCCESS
+
+    def send_due(self):
+        """
+        Send every full batch, and the rest if the oldest record is due.
+        """
+        while self._queue and (
+            len(self._queue) >= self.max_export_batch_size
+            or time.monotonic() - self._since >= self.schedule_delay
+        ):
+            self._send_batch()
+
+    def _send_batch(self):
+        with self._send_lock:
+            batch = []
+            while len(batch) < self.max_export_batch_size:
+                try:
+                    batch.append(self._queue.popleft())
+                except IndexError:
+                    break
+            # Near enough: the rest were queued no earlier than now.
+            self._since = time.monotonic()
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception:
+                    # Counted as failed by the CountingLogExporter.
+                    pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        while self._queue:
+            self._send_batch()
+        return True
+
+    def shutdown(self, *args, **kwargs):
+        self.force_flush()
+        return self.exporter.shutdown(*args, **kwargs)
+
+
+class RealThreadLogRecordProcessor(SimpleLogRecordProcessor):
+    """
+    Hands each record to a BatchingLogExporter on the thread that emits it,
+    converted as the SDK converts them for any exporter.
+    """
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._exporter.force_flush(timeout_millis)
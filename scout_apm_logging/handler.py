@@ -1,118 +1,1011 @@
+import atexit
 import logging
 import os
 import threading
+import time
+import weakref
+from functools import partial
 
-from opentelemetry import _logs
-from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
-from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
-from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
-from opentelemetry.sdk.resources import Resource
 from scout_apm.core import scout_config
 from scout_apm.core.tracked_request import TrackedRequest
 
-from scout_apm_logging.utils.operation_utils import get_operation_detail
+from scout_apm_logging.dedup import LogDeduplicator
+from scout_apm_logging.export_settings import ExportSettings
+from scout_apm_logging.fork import reset_after_fork
+from scout_apm_logging.flush import (
+    DEFAULT_SHUTDOWN_TIMEOUT,
+    ExportPipeline,
+    FlushResult,
+    deadline_after,
+    remaining,
+    run_until,
+)
+from scout_apm_logging.green import RealThreadQueue, threading_patched
+from scout_apm_logging.log_queue import (
+    DEFAULT_FLUSH_TIMEOUT,
+    LogQueue,
+    OverflowPolicy,
+)
+from scout_apm_logging.resource import create_resource, resource_attributes
+from scout_apm_logging.request_buffer import (
+    DEFAULT_MAX_BUFFERED_REQUESTS,
+    RequestBuffers,
+    in_request,
+)
+from scout_apm_logging.routing import Router, RoutingEmitter
+from scout_apm_logging.sampling import LogSampler
+from scout_apm_logging.spool import (
+    DEFAULT_SEGMENT_BYTES,
+    DEFAULT_SPOOL_MAX_BYTES,
+    SegmentSpool,
+)
+from scout_apm_logging.telemetry import (
+    EmitTelemetry,
+    ExportTelemetry,
+    register_metrics,
+)
+from scout_apm_logging.thread_buffer import (
+    DEFAULT_BUFFER_INTERVAL,
+    ThreadBuffers,
+)
+from scout_apm_logging.tracebacks import DEFAULT_FORMATTER, TracebackFormatter
+from scout_apm_logging.transport import (
+    DEFAULT_ENDPOINTS,
+    TRANSPORTS,
+    Transport,
+    create_log_exporter,
+)
+from scout_apm_logging.utils.log_record import QueuedRecord, interned
+from scout_apm_logging.utils.operation_utils import (
+    DEFAULT_CLASSIFIER,
+    OperationClassifier,
+)
+from scout_apm_logging.utils.request_context import RequestContext
+from scout_apm_logging.utils.tag_limits import TagLimits
 
 
 class ScoutOtelHandler(logging.Handler):
     _initialization_lock = threading.Lock()
+    _logger_provider = None
+    _route_logger_providers: tuple = ()
+    _pipelines: tuple = ()
+    _export_telemetry = None
+    _exit_hook = None
+    # The resource attributes, emitter key and routes of the handler that
+    # built the pipelines, and emitters through them for other handlers'
+    # resources and conversion settings, by emitter key.
+    _resource_attributes = None
+    _emitter_key = None
+    _router = None
+    _service_emitters: dict = {}
+    # Every handler in the process, whose queues and buffers a shutdown
+    # flushes into the pipelines they share.
+    _instances: "weakref.WeakSet" = weakref.WeakSet()
     otel_handler = None
 
-    def __init__(self, service_name):
+    def __init__(
+        self,
+        service_name,
+        async_mode=False,
+        queue_size=2048,
+        overflow_policy=OverflowPolicy.DROP_NEWEST,
+        block_timeout=0.1,
+        prefork=False,
+        shipper_socket=None,
+        sample_rates=None,
+        rate_limit=None,
+        rate_limit_burst=None,
+        summary_interval=60.0,
+        dedup_window=None,
+        dedup_max_keys=1024,
+        spool_dir=None,
+        spool_max_bytes=DEFAULT_SPOOL_MAX_BYTES,
+        spool_segment_bytes=DEFAULT_SEGMENT_BYTES,
+        export_preset=None,
+        batch_size=None,
+        max_queue_size=None,
+        schedule_delay=None,
+        export_timeout=None,
+        compression=None,
+        transport=None,
+        operation_prefixes=None,
+        telemetry=False,
+        telemetry_meter_provider=None,
+        structured=False,
+        thread_buffer_size=None,
+        thread_buffer_interval=DEFAULT_BUFFER_INTERVAL,
+        request_buffer_size=None,
+        max_buffered_requests=DEFAULT_MAX_BUFFERED_REQUESTS,
+        routes=None,
+        exception_max_frames=None,
+        exception_max_length=None,
+        exception_fingerprint_window=None,
+        max_tags=None,
+        max_tag_length=None,
+        tag_allowlist=None,
+        tag_denylist=None,
+        shutdown_timeout=None,
+        real_thread_export=None,
+        environment=None,
+    ):
         super().__init__()
         self.logger_provider = None
         self.service_name = service_name
+        # The deployment environment, from the Scout config if not given. It
+        # goes on the resource, along with the service name, host, and git
+        # SHA and container ID if they're set.
+        self.environment = environment
+        self.resource_attributes = None
+        # The resource, and the settings records are converted with, that an
+        # emitter is built for: handlers only share one if they share all of it.
+        self.emitter_key = None
+        self._resource = None
+        # In pre-fork mode records go to the host's shipper process, which
+        # does the exporting for every worker.
+        self.prefork = prefork
+        self.shipper_socket = shipper_socket
+        # Batches the endpoint doesn't take are kept on disk under spool_dir
+        # and sent once it's back.
+        self.spool_dir = spool_dir
+        self.spool_max_bytes = spool_max_bytes
+        self.spool_segment_bytes = spool_segment_bytes
+        # Batching and compression, each falling back to the Scout config and
+        # then to the preset.
+        self.export_preset = export_preset
+        self.batch_size = batch_size
+        self.max_queue_size = max_queue_size
+        self.schedule_delay = schedule_delay
+        self.export_timeout = export_timeout
+        self.compression = compression
+        # "grpc" or "http", from the Scout config if not given.
+        self.transport = transport
+        # Seconds the exit hook has to flush and shut down the pipeline, from
+        # the Scout config if not given.
+        self.shutdown_timeout = shutdown_timeout
+        # In structured mode messages aren't formatted: the body is the
+        # template, and args and extras are sent as typed attributes.
+        self.structured = structured
+        # Exceptions are formatted when records are converted, keeping the
+        # innermost exception_max_frames frames and the last
+        # exception_max_length characters. With a fingerprint window, only the
+        # first record of a traceback in the window carries its stack trace.
+        self.tracebacks = DEFAULT_FORMATTER
+        if exception_max_frames or exception_max_length or exception_fingerprint_window:
+            self.tracebacks = TracebackFormatter(
+                max_frames=exception_max_frames,
+                max_length=exception_max_length,
+                fingerprint_window=exception_fingerprint_window,
+            )
+        # Operation prefixes, e.g. {"Task/": "task"}, that mark an entrypoint
+        # as well as Scout's own "Controller/", "Job/" and "Custom/".
+        self.operation_classifier = DEFAULT_CLASSIFIER
+        if operation_prefixes:
+            self.operation_classifier = OperationClassifier(operation_prefixes)
+        # Request tags added to records: only the allowed keys (glob patterns)
+        # that aren't denied, at most max_tags of them, with their values cut
+        # to max_tag_length. Applied once per request context, not per record.
+        self.tag_limits = None
+        if (
+            max_tags is not None
+            or max_tag_length is not None
+            or tag_allowlist is not None
+            or tag_denylist is not None
+        ):
+            self.tag_limits = TagLimits(
+                max_tags=max_tags,
+                max_value_length=max_tag_length,
+                allow=tag_allowlist,
+                deny=tag_denylist,
+            )
         self._handling_log = threading.local()
+        self._request_context = threading.local()
+
+        # Routes send the records of some loggers and levels through pipelines
+        # of their own, e.g. errors through a low-latency one, so they don't
+        # wait behind other records.
+        self.router = None
+        if routes:
+            if prefork:
+                raise ValueError("routes can't be used with prefork")
+            self.router = Router(routes)
+
+        # With telemetry on, the handler keeps counts and timings of its own
+        # work for stats(), and reports them as OTel metrics through
+        # telemetry_meter_provider, or the global meter provider.
+        self.telemetry = None
+        if telemetry:
+            self.telemetry = EmitTelemetry()
+            register_metrics(self.stats, telemetry_meter_provider)
+
+        # Under gevent or eventlet, threads are greenlets, so the exporter's
+        # serialization and I/O would run on the hub and hold up every request
+        # greenlet. With real_thread_export, on by default when threading is
+        # monkey-patched, emit only queues records, and a real OS thread per
+        # pipeline converts, batches and exports them.
+        if real_thread_export is None:
+            real_thread_export = threading_patched() and not prefork
+        if real_thread_export:
+            if prefork:
+                raise ValueError("real_thread_export can't be used with prefork")
+            if overflow_policy == OverflowPolicy.BLOCK:
+                raise ValueError(
+                    "The block overflow policy can't be used with real_thread_export"
+                )
+        self.real_thread_export = real_thread_export
+
+        # In async mode emit only queues the record and its Scout context, and
+        # a worker thread does the OTel conversion.
+        # Each route has a queue of its own, so records of other routes can't
+        # fill it.
+        self.log_queue = None
+        self.route_queues = ()
+        if async_mode or real_thread_export:
+
+            def log_queue(index):
+                if real_thread_export:
+                    return RealThreadQueue(
+                        self._consume,
+                        maxsize=queue_size,
+                        overflow_policy=overflow_policy,
+                        on_tick=lambda: self._send_due_batches(index),
+                        on_worker_start=self._start_handling_log,
+                    )
+                return LogQueue(
+                    self._consume,
+                    maxsize=queue_size,
+                    overflow_policy=overflow_policy,
+                    block_timeout=block_timeout,
+                    on_worker_start=self._start_handling_log,
+                )
+
+            # Pipelines are in the same order: the handler's, then the routes'.
+            self.log_queue = log_queue(0)
+            if self.router is not None:
+                self.route_queues = tuple(
+                    log_queue(index) for index in range(1, len(self.router.routes) + 1)
+                )
+
+        # With thread buffers each thread keeps its enriched records, and
+        # exports them thread_buffer_size at a time, once they're
+        # thread_buffer_interval seconds old, or once their request is over.
+        self.thread_buffers = None
+        if thread_buffer_size:
+            if async_mode:
+                raise ValueError("thread_buffer_size can't be used with async_mode")
+            if real_thread_export:
+                raise ValueError(
+                    "thread_buffer_size can't be used with real_thread_export"
+                )
+            self.thread_buffers = ThreadBuffers(
+                self._consume,
+                size=thread_buffer_size,
+                interval=thread_buffer_interval,
+                on_flusher_start=self._start_handling_log,
+            )
+
+        # With request buffers the records logged during a TrackedRequest are
+        # held until it finishes, then exported together with its complete
+        # Scout attributes. Records beyond request_buffer_size for a request, or
+        # beyond max_buffered_requests requests, are exported straight away.
+        self.request_buffers = None
+        if request_buffer_size:
+            self.request_buffers = RequestBuffers(
+                self._export_request,
+                max_records=request_buffer_size,
+                max_requests=max_buffered_requests,
+                on_flusher_start=self._start_handling_log,
+            )
+
+        # Sampling drops records before any enrichment or OTel work is done.
+        self.sampler = None
+        if sample_rates or rate_limit:
+            self.sampler = LogSampler(
+                sample_rates=sample_rates,
+                rate_limit=rate_limit,
+                rate_limit_burst=rate_limit_burst,
+                summary_interval=summary_interval,
+            )
+
+        # Identical records within dedup_window seconds are counted instead of
+        # exported, and reported once with their repeat count.
+        self.deduplicator = None
+        if dedup_window:
+            self.deduplicator = LogDeduplicator(
+                window=dedup_window,
+                max_keys=dedup_max_keys,
+                structured=self.structured,
+                report=self._report_repeats,
+                on_flusher_start=self._start_handling_log,
+            )
+
+        # Only once it's built, so a shutdown never flushes a handler whose
+        # settings were rejected halfway through.
+        ScoutOtelHandler._instances.add(self)
 
     def _initialize(self):
         with self._initialization_lock:
             if ScoutOtelHandler.otel_handler:
                 return
 
-            self.service_name = self._get_service_name(self.service_name)
+            self._resolve_resource_attributes()
             self.ingest_key = self._get_ingest_key()
+            self.transport = self._get_transport()
             self.endpoint = self._get_endpoint()
+            self.export_settings = self._get_export_settings()
+            self.shutdown_timeout = self._get_shutdown_timeout()
             self.setup_otel_handler()
+            self._register_exit_hook()
 
     def setup_otel_handler(self):
-        self.logger_provider = LoggerProvider(
-            resource=Resource.create(
-                {
-                    "service.name": self.service_name,
-                    "service.instance.id": os.uname().nodename,
-                }
-            )
+        if self.prefork:
+            ScoutOtelHandler._resource_attributes = self.resource_attributes
+            ScoutOtelHandler._emitter_key = self.emitter_key
+            ScoutOtelHandler._service_emitters = {}
+            ScoutOtelHandler.otel_handler = self._create_shipper_client()
+            return
+
+        # OTel is only imported once there's a record to export, so processes
+        # that configure logging but never log don't pay for it.
+        from opentelemetry import _logs
+
+        resource = self._get_resource()
+        export_telemetry = None
+        if self.telemetry is not None:
+            export_telemetry = ExportTelemetry()
+
+        pipeline = self._create_pipeline(
+            resource,
+            self.transport,
+            self.endpoint,
+            self.ingest_key,
+            self.export_settings,
+            self.spool_dir,
+            export_telemetry,
         )
+        pipelines = [pipeline]
+        self.logger_provider = pipeline.logger_provider
         _logs.set_logger_provider(self.logger_provider)
 
-        otlp_exporter = OTLPLogExporter(
-            headers={"x-scout-key": self.ingest_key},
+        if self.router is not None:
+            route_pipelines = []
+            for route in self.router.routes:
+                transport = route.transport or self.transport
+                route_pipelines.append(
+                    self._create_pipeline(
+                        resource,
+                        transport,
+                        route.endpoint or self._get_endpoint(transport),
+                        route.ingest_key or self.ingest_key,
+                        route.export_settings,
+                        self.spool_dir
+                        and os.path.join(self.spool_dir, "routes", route.name),
+                        export_telemetry,
+                        gauge_prefix=f"{route.name}_",
+                    )
+                )
+            pipelines += route_pipelines
+            route_providers = [pipeline.logger_provider for pipeline in route_pipelines]
+            ScoutOtelHandler._route_logger_providers = tuple(route_providers)
+
+        ScoutOtelHandler._export_telemetry = export_telemetry
+        ScoutOtelHandler._pipelines = tuple(pipelines)
+        ScoutOtelHandler._logger_provider = self.logger_provider
+        ScoutOtelHandler._resource_attributes = self.resource_attributes
+        ScoutOtelHandler._emitter_key = self.emitter_key
+        ScoutOtelHandler._router = self.router
+        ScoutOtelHandler._service_emitters = {}
+        ScoutOtelHandler.otel_handler = self._create_emitter(
+            [pipeline.logger_provider for pipeline in pipelines]
+        )
+
+    def _create_emitter(self, providers):
+        # An emitter through the providers of the pipelines, in the same
+        # order, routing records as the handler that built them does.
+        from scout_apm_logging.translate import OtelLogEmitter
+
+        emitters = [
+            OtelLogEmitter(
+                provider, structured=self.structured, tracebacks=self.tracebacks
+            )
+            for provider in providers
+        ]
+        if ScoutOtelHandler._router is None:
+            return emitters[0]
+        return RoutingEmitter(ScoutOtelHandler._router, emitters[1:], emitters[0])
+
+    def _service_emitter(self):
+        """
+        The emitter for a handler whose resource, or whose ``structured`` and
+        exception settings, aren't those of the handler the pipelines were
+        built by, e.g. one with another ``service_name``. Its records go
+        through the same pipelines, from LoggerProviders with its resource,
+        converted with its own settings. In pre-fork mode they go to a shipper
+        client of its own, which converts them the same way.
+        """
+        otel_handler = ScoutOtelHandler.otel_handler
+        if self.emitter_key is None:
+            self._resolve_resource_attributes()
+            if self.emitter_key == ScoutOtelHandler._emitter_key:
+                return otel_handler
+
+        emitter_key = self.emitter_key
+        emitter = ScoutOtelHandler._service_emitters.get(emitter_key)
+        if emitter is not None:
+            return emitter
+        with self._initialization_lock:
+            emitter = ScoutOtelHandler._service_emitters.get(emitter_key)
+            if emitter is None and self.prefork and otel_handler is not None:
+                self.ingest_key = self._get_ingest_key()
+                self.transport = self._get_transport()
+                self.endpoint = self._get_endpoint()
+                emitter = self._create_shipper_client()
+                ScoutOtelHandler._service_emitters[emitter_key] = emitter
+            elif emitter is None and ScoutOtelHandler._pipelines:
+                pipelines = ScoutOtelHandler._pipelines
+                if self.resource_attributes is ScoutOtelHandler._resource_attributes:
+                    # Only the conversion settings differ.
+                    providers = [pipeline.logger_provider for pipeline in pipelines]
+                else:
+                    providers = self._create_providers(pipelines)
+                emitter = self._create_emitter(providers)
+                ScoutOtelHandler._service_emitters[emitter_key] = emitter
+        return emitter or otel_handler
+
+    def _create_providers(self, pipelines):
+        from opentelemetry.sdk._logs import LoggerProvider
+
+        resource = self._get_resource()
+        providers = []
+        for pipeline in pipelines:
+            provider = LoggerProvider(resource=resource, shutdown_on_exit=False)
+            # The pipeline's processor is shared, and shut down with it.
+            provider.add_log_record_processor(pipeline.record_processor)
+            providers.append(provider)
+        return providers
+
+    def _create_shipper_client(self):
+        # Imported here so the shipper module can run as __main__ cleanly.
+        from scout_apm_logging.shipper import ShipperClient, default_socket_path
+
+        # The shipper exports with the resource it was started with, so each
+        # service has a shipper, and a socket, of its own.
+        return ShipperClient(
+            self.shipper_socket
+            or default_socket_path(
+                self.service_name, self.ingest_key, self.endpoint, self.environment
+            ),
+            service_name=self.service_name,
+            ingest_key=self.ingest_key,
             endpoint=self.endpoint,
+            spool_dir=self.spool_dir,
+            transport=self.transport,
+            structured=self.structured,
+            tracebacks=self.tracebacks,
+            environment=self.environment,
         )
-        self.logger_provider.add_log_record_processor(
-            BatchLogRecordProcessor(otlp_exporter)
+
+    def _create_pipeline(
+        self,
+        resource,
+        transport,
+        endpoint,
+        ingest_key,
+        export_settings,
+        spool_dir,
+        export_telemetry,
+        gauge_prefix="",
+    ):
+        """
+        A LoggerProvider with a batch processor and exporter of its own, to
+        ``endpoint``.
+        """
+        from opentelemetry.sdk._logs import LoggerProvider
+        from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+
+        from scout_apm_logging.flush_exporter import CountingLogExporter
+        from scout_apm_logging.spool_exporter import SpoolingLogExporter
+
+        # Shut down by the handler's own exit hook, within shutdown_timeout.
+        logger_provider = LoggerProvider(resource=resource, shutdown_on_exit=False)
+        otlp_exporter = create_log_exporter(
+            transport,
+            endpoint=endpoint,
+            headers={"x-scout-key": ingest_key},
+            **export_settings.exporter_kwargs(),
         )
+        if export_telemetry is not None:
+            otlp_exporter.on_sent = export_telemetry.add_bytes_sent
+        if spool_dir:
+            spool = SegmentSpool.claim(
+                spool_dir,
+                max_bytes=self.spool_max_bytes,
+                segment_bytes=self.spool_segment_bytes,
+            )
+            otlp_exporter = SpoolingLogExporter(otlp_exporter, spool)
+            if export_telemetry is not None:
+                export_telemetry.gauges.update(
+                    {
+                        f"{gauge_prefix}spool_batches": spool.__len__,
+                        f"{gauge_prefix}spool_bytes": spool.size_bytes,
+                        f"{gauge_prefix}spool_dropped_batches": lambda: spool.dropped,
+                    }
+                )
+        if export_telemetry is not None:
+            from scout_apm_logging.telemetry_exporter import InstrumentedLogExporter
 
-        ScoutOtelHandler.otel_handler = LoggingHandler(
-            level=logging.NOTSET, logger_provider=self.logger_provider
+            otlp_exporter = InstrumentedLogExporter(otlp_exporter, export_telemetry)
+        exporter = CountingLogExporter(otlp_exporter)
+        if self.real_thread_export:
+            from scout_apm_logging.green_exporter import (
+                BatchingLogExporter,
+                RealThreadLogRecordProcessor,
+            )
+
+            # Batches are sent by the pipeline's RealThreadQueue, rather than
+            # by the batch processor's worker, which would be a greenlet.
+            batches = BatchingLogExporter(
+                exporter, **export_settings.processor_kwargs()
+            )
+            record_processor = RealThreadLogRecordProcessor(batches)
+            logger_provider.add_log_record_processor(record_processor)
+            return ExportPipeline(logger_provider, batches, exporter, record_processor)
+
+        processor = BatchLogRecordProcessor(
+            exporter, **export_settings.processor_kwargs()
         )
+        logger_provider.add_log_record_processor(processor)
+        return ExportPipeline(logger_provider, processor, exporter)
+
+    @staticmethod
+    def _send_due_batches(index):
+        pipelines = ScoutOtelHandler._pipelines
+        if index < len(pipelines):
+            pipelines[index].processor.send_due()
+
+    def _register_exit_hook(self):
+        # One hook for the process, from the handler that built the pipeline,
+        # in place of the LoggerProvider's own, which could hold up exit for
+        # as long as the exporter keeps retrying.
+        if ScoutOtelHandler._exit_hook is not None:
+            atexit.unregister(ScoutOtelHandler._exit_hook)
+        ScoutOtelHandler._exit_hook = self._shutdown_at_exit
+        atexit.register(self._shutdown_at_exit)
+
+    def _shutdown_at_exit(self):
+        self.shutdown(self.shutdown_timeout)
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """
+        The batch processor's thread and the exporter's gRPC channel don't
+        survive a fork, so a child process drops the inherited pipeline and
+        builds its own on its next emit, the same way the first one was built.
+        """
+        if cls._exit_hook is not None:
+            # Shutting down the parent's providers at exit would only try to
+            # export over their broken channels.
+            atexit.unregister(cls._exit_hook)
+            cls._exit_hook = None
+        for pipeline in cls._pipelines:
+            pipeline.abandon_after_fork()
+        cls._logger_provider = None
+        cls._route_logger_providers = ()
+        cls._pipelines = ()
+        cls._export_telemetry = None
+        cls._close_service_emitters()
+        if cls.otel_handler is not None:
+            cls.otel_handler.close()
+            cls.otel_handler = None
+        # In case another thread held it at the time of the fork
+        cls._initialization_lock = threading.Lock()
+
+    def handle(self, record):
+        if self.log_queue is None and self.thread_buffers is None:
+            return super().handle(record)
+
+        # Queueing and the thread buffers are thread safe on their own, so skip
+        # the handler lock that would otherwise serialize every logging thread.
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
 
     def emit(self, record):
-        if not ScoutOtelHandler.otel_handler:
-            try:
-                self._initialize()
-            except Exception as e:
-                print(f"Failed to initialize ScoutOtelHandler: {e}")
-                return
+        if not ScoutOtelHandler.otel_handler and not self._initialize_for_emit():
+            return
 
         if getattr(self._handling_log, "value", False):
             # We're already handling a log message, don't get the TrackedRequest
-            return ScoutOtelHandler.otel_handler.emit(record)
+            if ScoutOtelHandler.otel_handler:
+                ScoutOtelHandler.otel_handler.emit(record)
+            return
+        telemetry = self.telemetry
+        if telemetry is not None:
+            start = time.perf_counter()
+            telemetry.records.add("handled")
         try:
             self._handling_log.value = True
             scout_request = TrackedRequest.instance()
 
-            if scout_request:
-                operation_detail = get_operation_detail(scout_request)
-                if operation_detail:
-                    setattr(
-                        record,
-                        operation_detail.entrypoint_attribute,
-                        operation_detail.name,
-                    )
-
-                # Add Scout-specific attributes to the log record
-                record.scout_transaction_id = scout_request.request_id
-                record.scout_start_time = scout_request.start_time.isoformat()
-                # Add duration if the request is completed
-                if scout_request.end_time:
-                    record.scout_end_time = scout_request.end_time.isoformat()
-                    record.scout_duration = (
-                        scout_request.end_time - scout_request.start_time
-                    ).total_seconds()
-
-                setattr(record, "service.name", self.service_name)
+            if self.sampler is not None:
+                summary = self.sampler.pop_summary()
+                if summary is not None:
+                    self._dispatch(summary, None, None)
+                if not self.sampler.keep(record, scout_request):
+                    if telemetry is not None:
+                        telemetry.records.add("suppressed")
+                    return
 
-                # Add tags
-                for key, value in scout_request.tags.items():
-                    setattr(record, f"scout_tag_{key}", value)
+            if self.deduplicator is not None:
+                for summary in self.deduplicator.pop_summaries(time.time()):
+                    self._dispatch(*summary)
+                operation = scout_request.operation if scout_request else None
+                if not self.deduplicator.keep(
+                    record, operation, lambda: self._repeat_context(scout_request)
+                ):
+                    if telemetry is not None:
+                        telemetry.records.add("collapsed")
+                    return
 
+            attributes = None
+            current_operation = None
+            buffered = False
+            if scout_request:
                 # Add the current span's operation if available
                 current_span = scout_request.current_span()
                 if current_span:
-                    record.scout_current_operation = current_span.operation
+                    current_operation = current_span.operation
+
+                if (
+                    self.request_buffers is not None
+                    and in_request(scout_request)
+                    and self._route_index(record) is None
+                ):
+                    buffered = self.request_buffers.add(
+                        scout_request,
+                        (
+                            QueuedRecord(record, self.structured, self.tracebacks),
+                            interned(current_operation),
+                        ),
+                    )
+                if not buffered:
+                    attributes = self._get_request_context(scout_request).attributes
 
-            ScoutOtelHandler.otel_handler.emit(record)
+            if telemetry is not None:
+                telemetry.enrichment.record(time.perf_counter() - start)
+            if not buffered:
+                self._dispatch(record, attributes, current_operation, scout_request)
         finally:
             self._handling_log.value = False
 
+    def _report_repeats(self, summary):
+        # Summaries of windows that are over when nothing else is logged.
+        self._dispatch(*summary)
+
+    def _repeat_context(self, scout_request):
+        # What a repeated record is summarized with: the request it was
+        # logged in, as of its first repeat.
+        if not scout_request:
+            return None, None
+        current_span = scout_request.current_span()
+        current_operation = current_span.operation if current_span else None
+        return self._get_request_context(scout_request).attributes, current_operation
+
+    def _initialize_for_emit(self):
+        try:
+            self._initialize()
+        except Exception as e:
+            print(f"Failed to initialize ScoutOtelHandler: {e}")
+            return False
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Hand the records the handler holds in its queues and buffers over to
+        the export pipelines. logging calls this too, e.g. in
+        ``logging.shutdown()`` and when ``dictConfig`` replaces handlers, so on
+        its own it doesn't wait on the network.
+
+        With ``timeout``, it then waits up to that many seconds in all for the
+        pipelines to send them, routes' in parallel. Returns a FlushResult of
+        the records exported during the flush, and of those still unsent, or
+        failed, once the time ran out. Without one, only the records the
+        handler still holds are counted as unsent.
+        """
+        if timeout is None:
+            # Only the queues' workers are waited on, to convert what's queued.
+            return self._flush(deadline_after(DEFAULT_FLUSH_TIMEOUT), send=False)
+        return self._flush(deadline_after(timeout))
+
+    def shutdown(self, timeout=DEFAULT_SHUTDOWN_TIMEOUT):
+        """
+        Flush every handler's queues and buffers, then shut down the export
+        pipelines, within ``timeout`` seconds in all, e.g. at the end of a cron
+        job or serverless invocation. Returns a FlushResult as ``flush`` does.
+
+        The pipelines are shared by every ScoutOtelHandler in the process, and
+        built again on the next record logged. This is what the handler's exit
+        hook does, within ``shutdown_timeout``.
+        """
+        return self._flush(deadline_after(timeout), shutdown=True)
+
+    def _flush(self, deadline, shutdown=False, send=True):
+        pipelines = ScoutOtelHandler._pipelines
+        exported_before = sum(pipeline.exporter.exported for pipeline in pipelines)
+        failed_before = sum(pipeline.exporter.failed for pipeline in pipelines)
+
+        handlers = [self]
+        if shutdown:
+            # Their queues' workers and buffers' flushers are daemon threads,
+            # with no exit hooks of their own. Whichever handler shuts the
+            # pipelines down, at exit or otherwise, sends what every handler
+            # holds into them first.
+            handlers += [
+                handler
+                for handler in list(ScoutOtelHandler._instances)
+                if handler is not self
+            ]
+        for handler in handlers:
+            handler._flush_held(deadline)
+        if not send:
+            exported = sum(pipeline.exporter.exported for pipeline in pipelines)
+            return FlushResult(
+                flushed=exported - exported_before, abandoned=self._held()
+            )
+
+        otel_handler = ScoutOtelHandler.otel_handler
+        shipper_clients = ()
+        if shutdown:
+            with self._initialization_lock:
+                if self.prefork:
+                    # Flushed before they're closed, below.
+                    shipper_clients = tuple(ScoutOtelHandler._service_emitters.values())
+                    ScoutOtelHandler._service_emitters = {}
+                otel_handler = self._detach_pipelines()
+        elif self.prefork:
+            shipper_clients = tuple(ScoutOtelHandler._service_emitters.values())
+        if self.prefork:
+            if otel_handler is not None:
+                shipper_clients = (otel_handler, *shipper_clients)
+            # Records sent to the shippers are theirs to export.
+            calls = [
+                partial(self._flush_shipper, shipper_client, deadline, shutdown)
+                for shipper_client in shipper_clients
+            ]
+        elif shutdown:
+            calls = [pipeline.logger_provider.shutdown for pipeline in pipelines]
+            if otel_handler is not None:
+                otel_handler.close()
+        else:
+            calls = [pipeline.logger_provider.force_flush for pipeline in pipelines]
+        # Each pipeline is flushed on a thread of its own, so a slow endpoint
+        # only holds up its own records.
+        run_until(calls, deadline, on_thread_start=self._start_handling_log)
+
+        abandoned = sum(handler._held() for handler in handlers)
+        for pipeline in pipelines:
+            abandoned += pipeline.pending()
+        exported = sum(pipeline.exporter.exported for pipeline in pipelines)
+        failed = sum(pipeline.exporter.failed for pipeline in pipelines)
+        return FlushResult(
+            flushed=exported - exported_before,
+            abandoned=abandoned + failed - failed_before,
+        )
+
+    def _flush_held(self, deadline):
+        # Summaries, then requests' records, go through the queues or thread
+        # buffers, so those are flushed last.
+        if self.sampler is not None and ScoutOtelHandler.otel_handler:
+            # The counts since the last interval would otherwise be lost.
+            summary = self.sampler.pop_summary(flush=True)
+            if summary is not None:
+                self._dispatch(summary, None, None)
+        if self.deduplicator is not None and ScoutOtelHandler.otel_handler:
+            for summary in self.deduplicator.pop_summaries(time.time(), flush=True):
+                self._dispatch(*summary)
+        if self.request_buffers is not None and ScoutOtelHandler.otel_handler:
+            self.request_buffers.flush()
+        if self.log_queue is not None:
+            for log_queue in (self.log_queue, *self.route_queues):
+                log_queue.flush(remaining(deadline))
+        if self.thread_buffers is not None:
+            self.thread_buffers.flush()
+
+    def _held(self):
+        held = 0
+        if self.log_queue is not None:
+            held += sum(map(len, (self.log_queue, *self.route_queues)))
+        if self.thread_buffers is not None:
+            held += len(self.thread_buffers)
+        if self.request_buffers is not None:
+            held += len(self.request_buffers)
+        return held
+
+    def _flush_shipper(self, shipper_client, deadline, close=False):
+        shipper_client.flush(remaining(deadline))
+        if close:
+            shipper_client.close()
+
+    @classmethod
+    def _detach_pipelines(cls):
+        # Records logged from now on go to pipelines built afresh.
+        otel_handler = cls.otel_handler
+        cls.otel_handler = None
+        cls._logger_provider = None
+        cls._route_logger_providers = ()
+        cls._pipelines = ()
+        cls._export_telemetry = None
+        cls._close_service_emitters()
+        if cls._exit_hook is not None:
+            atexit.unregister(cls._exit_hook)
+            cls._exit_hook = None
+        return otel_handler
+
+    @classmethod
+    def _close_service_emitters(cls):
+        for emitter in cls._service_emitters.values():
+            emitter.close()
+        cls._service_emitters = {}
+        cls._resource_attributes = None
+        cls._emitter_key = None
+        cls._router = None
+
+    def _route_index(self, record):
+        if self.router is None:
+            return None
+        return self.router.index(record.name, record.levelno)
+
+    def _dispatch(self, record, attributes, current_operation, scout_request=None):
+        # Routed records, e.g. errors sent out in small batches straight
+        # away, don't wait in the request or thread buffers.
+        route_index = self._route_index(record)
+        if self.log_queue is None and (
+            self.thread_buffers is None or route_index is not None
+        ):
+            self._export(record, attributes, current_operation)
+            return
+
+        # Queued records are kept in a compact form, without the LogRecord's
+        # __dict__, and share one copy of their operation names.
+        if not isinstance(record, QueuedRecord):
+            record = QueuedRecord(record, self.structured, self.tracebacks)
+        item = (record, attributes, interned(current_operation))
+        if self.log_queue is not None:
+            log_queue = self.log_queue
+            if route_index is not None:
+                log_queue = self.route_queues[route_index]
+            log_queue.put(item)
+        else:
+            self.thread_buffers.add(item, scout_request)
+
+    def _export_request(self, scout_request, items):
+        # Built once the request is over, so its end time, duration and final
+        # operation are on every record it logged.
+        attributes = RequestContext(
+            scout_request,
+            self.operation_classifier,
+            tag_limits=self.tag_limits,
+        ).attributes
+        for record, current_operation in items:
+            self._dispatch(record, attributes, current_operation)
+
+    def _consume(self, item):
+        self._export(*item)
+
+    def _export(self, record, attributes, current_operation):
+        # The Scout attributes go along with the record rather than on it, so
+        # other handlers don't see them.
+        otel_handler = ScoutOtelHandler.otel_handler
+        if self.emitter_key != ScoutOtelHandler._emitter_key:
+            otel_handler = self._service_emitter()
+        telemetry = self.telemetry
+        if otel_handler is None:
+            # The pipelines were shut down since the record was queued or
+            # buffered. Those built for the next record logged don't take
+            # records from before the shutdown.
+            if telemetry is not None:
+                telemetry.records.add("shutdown_dropped")
+            return
+        if telemetry is None:
+            try:
+                otel_handler.emit(record, attributes, current_operation)
+            except Exception:
+                self.handleError(record)
+            return
+        start = time.perf_counter()
+        try:
+            otel_handler.emit(record, attributes, current_operation)
+        except Exception:
+            self.handleError(record)
+            return
+        telemetry.conversion.record(time.perf_counter() - start)
+        telemetry.records.add("converted")
+
+    def stats(self):
+        """
+        The handler's telemetry, or an empty dict if ``telemetry`` is off:
+
+        - ``enrichment_seconds`` and ``conversion_seconds``: histograms of the
+          time emit spends on sampling, collapsing and the Scout attributes,
+          and on handing the record to OTel (or the shipper).
+        - ``records``: how many were handled, suppressed by sampling or rate
+          limiting, collapsed as repeats, converted, dropped by the async
+          queue, the thread or request buffers, the real thread export's
+          batches or for want of a shipper, or after a shutdown, and
+          spilled, i.e. exported without waiting for their request to finish
+          for want of room in the request buffers.
+        - ``tags``: request tags left off records by the tag limits, and tag
+          values truncated, counted once per request and again if its tags change.
+        - ``queue_depth``: records waiting in the async queues.
+        - ``buffered``: records waiting in the thread buffers.
+        - ``request_buffered``: records waiting for their request to finish.
+        - ``export``: batch sizes and export durations, records exported and
+          failed, and bytes sent, for the pipeline this process exports
+          through, routes included. With a spool, batches it takes count as
+          exported, and its size is reported here too.
+        """
+        if self.telemetry is None:
+            return {}
+        stats = self.telemetry.snapshot()
+        records = stats["records"]
+        if self.log_queue is not None:
+            log_queues = (self.log_queue, *self.route_queues)
+            stats["queue_depth"] = sum(map(len, log_queues))
+            records["queue_dropped"] = sum(queue.dropped for queue in log_queues)
+        if self.real_thread_export:
+            records["batch_dropped"] = sum(
+                pipeline.processor.dropped for pipeline in ScoutOtelHandler._pipelines
+            )
+        if self.thread_buffers is not None:
+            stats["buffered"] = len(self.thread_buffers)
+            records["buffer_dropped"] = self.thread_buffers.dropped
+        if self.request_buffers is not None:
+            stats["request_buffered"] = len(self.request_buffers)
+            records["request_spilled"] = self.request_buffers.spilled
+            records["request_buffer_dropped"] = self.request_buffers.dropped
+        if self.tag_limits is not None:
+            stats["tags"] = {
+                "dropped": self.tag_limits.dropped_tags,
+                "truncated": self.tag_limits.truncated_values,
+            }
+        if self.prefork and ScoutOtelHandler.otel_handler is not None:
+            records["shipper_dropped"] = ScoutOtelHandler.otel_handler.dropped + sum(
+                client.dropped for client in ScoutOtelHandler._service_emitters.values()
+            )
+        if ScoutOtelHandler._export_telemetry is not None:
+            stats["export"] = ScoutOtelHandler._export_telemetry.snapshot()
+        return stats
+
+    def _start_handling_log(self):
+        # Logs from the queue's worker or the buffers' flusher (e.g. the
+        # exporter's) go straight to OTel.
+        self._handling_log.value = True
+
+    def _get_request_context(self, scout_request):
+        # TrackedRequests are thread local, so each thread only needs to keep
+        # the context for the request it is currently logging from.
+        context = getattr(self._request_context, "value", None)
+        if context is None or not context.matches(scout_request):
+            context = RequestContext(
+                scout_request,
+                self.operation_classifier,
+                previous=context,
+                tag_limits=self.tag_limits,
+            )
+            self._request_context.value = context
+        return context
+
     def close(self):
         """
         We intentionally don't shutdown the LoggerProvider here because:
         1. We use a singleton pattern - the LoggerProvider is shared between instances.
         2. Django calls close() during configuration, not just on shutdown.
 
-        The LoggerProvider manages its own lifecycle and will call shutdown() when the
-        application exits.
+        The LoggerProviders are built with ``shutdown_on_exit=False``: the
+        handler's exit hook flushes and shuts them down when the application
+        exits, within ``shutdown_timeout``, or ``shutdown()`` does earlier.
         """
         super().close()
 
@@ -130,13 +1023,64 @@ class ScoutOtelHandler(logging.Handler):
 
         return "unnamed-service"
 
-    def _get_endpoint(self):
-        return (
-            scout_config.value("logs_reporting_endpoint") or "otlp.scoutotel.com:4317"
+    def _resolve_resource_attributes(self):
+        self.service_name = self._get_service_name(self.service_name)
+        self.resource_attributes = resource_attributes(
+            self.service_name,
+            hostname=scout_config.value("hostname"),
+            environment=self.environment or scout_config.value("logs_environment"),
+            revision_sha=scout_config.value("revision_sha"),
+            container_id=scout_config.value("logs_container_id"),
+        )
+        self.emitter_key = (self.resource_attributes, self.structured, self.tracebacks)
+
+    def _get_resource(self):
+        # Built once per handler, and kept for pipelines rebuilt after a fork
+        # or a shutdown.
+        if self._resource is None:
+            self._resource = create_resource(self.resource_attributes)
+        return self._resource
+
+    def _get_transport(self):
+        transport = (
+            self.transport or scout_config.value("logs_transport") or Transport.GRPC
+        )
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {transport}")
+        return transport
+
+    def _get_endpoint(self, transport=None):
+        return scout_config.value("logs_reporting_endpoint") or DEFAULT_ENDPOINTS.get(
+            transport or self.transport, DEFAULT_ENDPOINTS[Transport.GRPC]
+        )
+
+    def _get_export_settings(self):
+        def setting(name):
+            value = getattr(self, name)
+            if value is None:
+                value = scout_config.value(f"logs_{name}")
+            return value
+
+        return ExportSettings(
+            preset=setting("export_preset"),
+            batch_size=setting("batch_size"),
+            max_queue_size=setting("max_queue_size"),
+            schedule_delay=setting("schedule_delay"),
+            export_timeout=setting("export_timeout"),
+            compression=setting("compression"),
         )
 
+    def _get_shutdown_timeout(self):
+        timeout = self.shutdown_timeout
+        if timeout is None:
+            timeout = scout_config.value("logs_shutdown_timeout")
+        return DEFAULT_SHUTDOWN_TIMEOUT if timeout is None else float(timeout)
+
     def _get_ingest_key(self):
         ingest_key = scout_config.value("logs_ingest_key")
         if not ingest_key:
             raise ValueError("SCOUT_LOGS_INGEST_KEY is not set")
         return ingest_key
+
+
+reset_after_fork(ScoutOtelHandler)
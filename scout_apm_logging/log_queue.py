@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+
+from scout_apm_logging.fork import reset_after_fork
+
+# How long a flush waits for the workers to drain the queues, by default.
+DEFAULT_FLUSH_TIMEOUT = 5.0
+
+
+class OverflowPolicy:
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+
+OVERFLOW_POLICIES = (
+    OverflowPolicy.DROP_OLDEST,
+    OverflowPolicy.DROP_NEWEST,
+    OverflowPolicy.BLOCK,
+)
+
+
+class LogQueue:
+    """
+    A bounded handoff between the threads that log and a background worker.
+
+    ``put`` only appends to a deque, which is atomic under the GIL, so logging
+    threads never wait on each other or on the exporter. A lock is only taken
+    when a record has to be dropped. The worker thread is started on the first
+    ``put`` and passes each item to ``consume``.
+    """
+
+    def __init__(
+        self,
+        consume: Callable[[Any], None],
+        maxsize: int = 2048,
+        overflow_policy: str = OverflowPolicy.DROP_NEWEST,
+        block_timeout: float = 0.1,
+        on_worker_start: Optional[Callable[[], None]] = None,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.consume = consume
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.on_worker_start = on_worker_start
+        self.dropped = 0
+
+        # With a maxlen the deque discards its oldest item itself on append.
+        self._items: Deque[Any] = deque(
+            maxlen=maxsize if overflow_policy == OverflowPolicy.DROP_OLDEST else None
+        )
+        self._reset()
+
+        reset_after_fork(self)
+
+    def _reset(self):
+        self._not_empty = threading.Event()
+        self._not_full = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._drop_lock = threading.Lock()
+        self._worker_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def _reset_after_fork(self):
+        # The worker thread doesn't survive a fork. The child starts its own on
+        # its next put, and leaves whatever the parent had queued to the parent.
+        self._items.clear()
+        self._reset()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item) -> bool:
+        """
+        Queue ``item`` for the worker. Returns False if it was dropped.
+        """
+        if self._worker is None:
+            self._start_worker()
+
+        if len(self._items) >= self.maxsize:
+            if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                self._count_dropped()
+                return False
+            elif self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                self._count_dropped()
+            elif not self._wait_not_full():
+                self._count_dropped()
+                return False
+
+        self._items.append(item)
+        self._idle.clear()
+        self._not_empty.set()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the worker has consumed everything queued so far.
+        """
+        if self._worker is None:
+            return not self._items
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if not self._idle.wait(remaining):
+                return False
+            if not self._items:
+                return True
+            # Something was queued while the worker was going idle.
+            self._idle.clear()
+            self._not_empty.set()
+
+    def _count_dropped(self):
+        with self._drop_lock:
+            self.dropped += 1
+
+    def _wait_not_full(self) -> bool:
+        deadline = time.monotonic() + self.block_timeout
+        while len(self._items) >= self.maxsize:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._not_full.clear()
+            # Re-check regularly in case the worker freed space before the clear.
+            self._not_full.wait(min(remaining, 0.005))
+        return True
+
+    def _start_worker(self):
+        with self._worker_lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(
+                target=self._run, name="scout-log-queue", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        if self.on_worker_start:
+            self.on_worker_start()
+        while True:
+            self._not_empty.wait()
+            self._not_empty.clear()
+            while self._items:
+                try:
+                    item = self._items.popleft()
+                except IndexError:
+                    break
+                self._not_full.set()
+                try:
+                    self.consume(item)
+                except Exception:
+                    self._count_dropped()
+            if not self._items:
+                self._idle.set()
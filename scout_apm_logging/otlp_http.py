@@ -0,0 +1,101 @@
+"""
+The OTLP/HTTP (protobuf) log exporter, only imported when ``logs_transport`` is
+"http". It doesn't need grpcio, so it's lighter to import and works under
+gevent and eventlet workers.
+"""
+
+import gzip
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from opentelemetry.exporter.otlp.proto.common._log_encoder import encode_logs
+from opentelemetry.exporter.otlp.proto.http import Compression
+from opentelemetry.exporter.otlp.proto.http._log_exporter import OTLPLogExporter
+from opentelemetry.proto.collector.logs.v1.logs_service_pb2 import (
+    ExportLogsServiceRequest,
+)
+from requests.adapters import HTTPAdapter
+
+LOGS_PATH = "/v1/logs"
+
+# Connections kept open to the endpoint. Exports come from the batch
+# processor's thread and the spool's, so a couple are enough.
+POOL_SIZE = 2
+
+DEFAULT_TIMEOUT = 10.0
+
+
+def logs_url(endpoint: str) -> str:
+    """
+    The URL to post logs to, for an endpoint that may be given as a bare
+    ``host:port`` like the gRPC one.
+    """
+    if "://" not in endpoint:
+        endpoint = f"https://{endpoint}"
+    if urlsplit(endpoint).path in ("", "/"):
+        endpoint = endpoint.rstrip("/") + LOGS_PATH
+    return endpoint
+
+
+def create_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HttpLogExporter(OTLPLogExporter):
+    """
+    An OTLPLogExporter that keeps its connections to the endpoint alive
+    between exports, and can also send a request that was already encoded,
+    such as one read back from the spool.
+
+    ``on_sent``, if set, is called with the size of each request body that
+    was exported, after compression. Failed requests aren't counted.
+    """
+
+    on_sent: Optional[Callable[[int], None]] = None
+
+    def __init__(
+        self,
+        endpoint: str,
+        headers: Dict[str, str],
+        timeout: Optional[float] = None,
+        compression: Optional[str] = None,
+    ):
+        self.session = create_session()
+        self.session.hooks["response"].append(self._count_sent)
+        self.url = logs_url(endpoint)
+        self.headers = headers
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        self.compress = compression == "gzip"
+        super().__init__(
+            endpoint=self.url,
+            headers=headers,
+            timeout=timeout,
+            compression=Compression(compression) if compression else None,
+            session=self.session,
+        )
+
+    def _count_sent(self, response, *args, **kwargs):
+        if self.on_sent is not None and response.ok:
+            self.on_sent(len(response.request.body or b""))
+
+    def encode(self, batch) -> bytes:
+        return encode_logs(batch).SerializeToString()
+
+    def send(self, request: ExportLogsServiceRequest) -> bool:
+        data = request.SerializeToString()
+        headers = {"Content-Type": "application/x-protobuf", **self.headers}
+        if self.compress:
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        try:
+            response = self.session.post(
+                self.url, data=data, headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException:
+            return False
+        return response.ok
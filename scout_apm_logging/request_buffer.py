@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from scout_apm_logging.fork import reset_after_fork
+
+# Records kept for one request, and how many requests are kept at once.
+DEFAULT_REQUEST_BUFFER_SIZE = 256
+DEFAULT_MAX_BUFFERED_REQUESTS = 1024
+# Requests that haven't finished after this many seconds are exported as they
+# are, in case they never do.
+DEFAULT_MAX_AGE = 60.0
+
+# How often the flusher looks for finished requests.
+_FLUSHER_TICK = 0.1
+
+
+def in_request(request) -> bool:
+    """
+    Whether ``request`` is one that finishes. TrackedRequest.instance() makes
+    an empty request for code running outside of any, e.g. at startup, in a
+    cron job or on a background thread, and it never ends.
+    """
+    return bool(
+        request.is_real_request or request.active_spans or request.complete_spans
+    )
+
+
+class _RequestBuffer:
+    __slots__ = ("request", "items", "since", "closed")
+
+    def __init__(self, request):
+        self.request = request
+        self.items: Deque[Any] = deque()
+        self.since = time.monotonic()
+        self.closed = False
+
+
+class RequestBuffers:
+    """
+    Holds the items logged during each TrackedRequest until it finishes, then
+    passes the request and all of its items to ``export`` at once.
+
+    ``add`` refuses items for a request that already has ``max_records``, or
+    for a new request once ``max_requests`` are buffered, so the caller can
+    send them on straight away. A background flusher looks for requests with
+    an end time, and exports requests older than ``max_age`` seconds as they
+    are.
+    """
+
+    def __init__(
+        self,
+        export: Callable[[Any, List[Any]], None],
+        max_records: int = DEFAULT_REQUEST_BUFFER_SIZE,
+        max_requests: int = DEFAULT_MAX_BUFFERED_REQUESTS,
+        max_age: float = DEFAULT_MAX_AGE,
+        on_flusher_start: Optional[Callable[[], None]] = None,
+    ):
+        self.export = export
+        self.max_records = max_records
+        self.max_requests = max_requests
+        self.max_age = max_age
+        self.on_flusher_start = on_flusher_start
+        self.spilled = 0
+        self.dropped = 0
+        self._reset()
+
+        reset_after_fork(self)
+
+    def _reset(self):
+        self._buffers: Dict[str, _RequestBuffer] = {}
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _reset_after_fork(self):
+        # The child's requests are its own.
+        self._reset()
+
+    def __len__(self):
+        return sum(len(buffer.items) for buffer in list(self._buffers.values()))
+
+    def add(self, request, item) -> bool:
+        """
+        Buffer ``item`` until ``request`` finishes. Returns False if it wasn't,
+        for want of room.
+        """
+        buffer = self._buffers.get(request.request_id)
+        if buffer is None:
+            if len(self._buffers) >= self.max_requests:
+                self._count("spilled")
+                return False
+            with self._lock:
+                buffer = self._buffers.setdefault(
+                    request.request_id, _RequestBuffer(request)
+                )
+                if self._flusher is None:
+                    self._start_flusher()
+
+        if len(buffer.items) >= self.max_records:
+            self._count("spilled")
+            return False
+        buffer.items.append(item)
+        if buffer.closed:
+            # The flusher took the request while this item was added, and may
+            # have missed it.
+            self._drain(buffer)
+        return True
+
+    def flush(self):
+        """
+        Export every buffered request, finished or not, on the calling thread.
+        """
+        for buffer in list(self._buffers.values()):
+            self._close(buffer)
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(
+            target=self._run, name="scout-request-buffers", daemon=True
+        )
+        self._flusher.start()
+
+    def _count(self, name: str, count: int = 1):
+        with self._count_lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def _close(self, buffer: _RequestBuffer):
+        buffer.closed = True
+        with self._lock:
+            if self._buffers.get(buffer.request.request_id) is buffer:
+                del self._buffers[buffer.request.request_id]
+        self._drain(buffer)
+
+    def _drain(self, buffer: _RequestBuffer):
+        # Items are popped one by one, so a thread draining a late item and the
+        # flusher never export the same one twice.
+        items = []
+        while True:
+            try:
+                items.append(buffer.items.popleft())
+            except IndexError:
+                break
+        if not items:
+            return
+        try:
+            self.export(buffer.request, items)
+        except Exception:
+            self._count("dropped", len(items))
+
+    def _run(self):
+        if self.on_flusher_start:
+            self.on_flusher_start()
+        while True:
+            time.sleep(_FLUSHER_TICK)
+            now = time.monotonic()
+            for buffer in list(self._buffers.values()):
+                if (
+                    buffer.request.end_time is not None
+                    or now - buffer.since >= self.max_age
+                ):
+                    self._close(buffer)
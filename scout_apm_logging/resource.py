@@ -0,0 +1,60 @@
+"""
+The attributes of the process a handler's records come from, sent once per
+batch as the OTel resource rather than on every record.
+
+Handlers with the same settings share one tuple of attributes for as long as
+the process runs, so they can tell whether they share a resource by identity.
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+SERVICE_NAME = "service.name"
+SERVICE_INSTANCE_ID = "service.instance.id"
+HOST_NAME = "host.name"
+DEPLOYMENT_ENVIRONMENT = "deployment.environment.name"
+VCS_REVISION = "vcs.ref.head.revision"
+CONTAINER_ID = "container.id"
+
+ResourceAttributes = Tuple[Tuple[str, str], ...]
+
+_interned: Dict[ResourceAttributes, ResourceAttributes] = {}
+
+
+def resource_attributes(
+    service_name: str,
+    hostname: Optional[str] = None,
+    environment: Optional[str] = None,
+    revision_sha: Optional[str] = None,
+    container_id: Optional[str] = None,
+) -> ResourceAttributes:
+    """
+    The resource attributes for these settings, as a tuple of pairs that's
+    the same object for the same settings. Settings that aren't set are left
+    out.
+    """
+    nodename = os.uname().nodename
+    pairs = [
+        (SERVICE_NAME, service_name),
+        (SERVICE_INSTANCE_ID, nodename),
+        (HOST_NAME, hostname or nodename),
+    ]
+    if environment:
+        pairs.append((DEPLOYMENT_ENVIRONMENT, environment))
+    if revision_sha:
+        pairs.append((VCS_REVISION, revision_sha))
+    if container_id:
+        pairs.append((CONTAINER_ID, container_id))
+    attributes = tuple(pairs)
+    return _interned.setdefault(attributes, attributes)
+
+
+def create_resource(attributes: ResourceAttributes):
+    """
+    The OTel Resource for ``attributes``, merged with the SDK's own and any
+    set through ``OTEL_RESOURCE_ATTRIBUTES``, which they take precedence over.
+    """
+    # OTel is only imported once there's a record to export.
+    from opentelemetry.sdk.resources import Resource
+
+    return Resource.create(dict(attributes))
@@ -0,0 +1,134 @@
+import logging
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Union
+
+from scout_apm_logging.export_settings import ExportSettings
+from scout_apm_logging.transport import TRANSPORTS
+
+# (logger, level) pairs routed by each router, keeping the most recently used.
+DEFAULT_CACHE_SIZE = 1024
+
+
+def _level(value: Union[int, str]) -> int:
+    level = logging.getLevelName(value.upper()) if isinstance(value, str) else value
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown level: {value}")
+    return level
+
+
+class Route:
+    """
+    Records of the ``loggers`` given (and their children), at levels from
+    ``min_level`` up to ``max_level``, exported through a pipeline of their
+    own: a batch processor and exporter with the route's batching settings,
+    to its own endpoint and ingest key if it has them. Without ``loggers``
+    the route takes records of every logger.
+    """
+
+    __slots__ = (
+        "name",
+        "loggers",
+        "min_level",
+        "max_level",
+        "endpoint",
+        "ingest_key",
+        "transport",
+        "export_settings",
+        "_prefixes",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        loggers: Union[str, Sequence[str]] = (),
+        min_level: Union[int, str] = logging.NOTSET,
+        max_level: Optional[Union[int, str]] = None,
+        endpoint: Optional[str] = None,
+        ingest_key: Optional[str] = None,
+        transport: Optional[str] = None,
+        export_preset: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        schedule_delay: Optional[float] = None,
+        export_timeout: Optional[float] = None,
+        compression: Optional[str] = None,
+    ):
+        if transport is not None and transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {transport}")
+
+        self.name = name
+        self.loggers = (loggers,) if isinstance(loggers, str) else tuple(loggers)
+        self.min_level = _level(min_level)
+        self.max_level = None if max_level is None else _level(max_level)
+        self.endpoint = endpoint
+        self.ingest_key = ingest_key
+        self.transport = transport
+        self.export_settings = ExportSettings(
+            preset=export_preset,
+            batch_size=batch_size,
+            max_queue_size=max_queue_size,
+            schedule_delay=schedule_delay,
+            export_timeout=export_timeout,
+            compression=compression,
+        )
+        self._prefixes = tuple(f"{logger}." for logger in self.loggers)
+
+    def matches(self, name: str, levelno: int) -> bool:
+        if levelno < self.min_level:
+            return False
+        if self.max_level is not None and levelno > self.max_level:
+            return False
+        return (
+            not self.loggers or name in self.loggers or name.startswith(self._prefixes)
+        )
+
+
+class Router:
+    """
+    Picks the first of ``routes`` that a record matches, by its logger and
+    level, or None for the handler's own pipeline. Routes may be given as
+    Routes or as dicts of their arguments, e.g. from ``dictConfig``.
+    """
+
+    def __init__(
+        self,
+        routes: Iterable[Union[Route, Mapping[str, Any]]],
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.routes: List[Route] = [
+            route if isinstance(route, Route) else Route(**route) for route in routes
+        ]
+        names = [route.name for route in self.routes]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Route names must be unique: {names}")
+        self.index = lru_cache(maxsize=cache_size)(self._index)
+
+    def _index(self, name: str, levelno: int) -> Optional[int]:
+        for index, route in enumerate(self.routes):
+            if route.matches(name, levelno):
+                return index
+        return None
+
+
+class RoutingEmitter:
+    """
+    Hands each record to the emitter of its route, or to ``default``.
+    """
+
+    def __init__(self, router: Router, emitters: Sequence[Any], default: Any):
+        self.router = router
+        self.emitters = list(emitters)
+        self.default = default
+
+    def emit(self, record, attributes=None, current_operation=None):
+        index = self.router.index(record.name, record.levelno)
+        emitter = self.default if index is None else self.emitters[index]
+        emitter.emit(record, attributes, current_operation)
+
+    def flush(self):
+        for emitter in (*self.emitters, self.default):
+            emitter.flush()
+
+    def close(self):
+        for emitter in (*self.emitters, self.default):
+            emitter.close()
@@ -0,0 +1,181 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+# Rate limiting keeps a bucket per (logger name, message template). Templates
+# built with f-strings are all different, so the buckets are dropped and
+# started over once there are this many.
+MAX_RATE_LIMIT_KEYS = 10_000
+
+SampleRates = Mapping[str, Union[float, Mapping[str, float]]]
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+    def take(self, rate: float, burst: float, now: float) -> bool:
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LogSampler:
+    """
+    Decides whether a record is worth exporting, before any Scout enrichment or
+    OTel conversion is done for it.
+
+    ``sample_rates`` maps logger names to the fraction of their records to keep,
+    either for every level or per level name, e.g.
+    ``{"myapp.db": 0.1, "myapp.cache": {"DEBUG": 0.01, "INFO": 0.5}}``. As with
+    logging levels, a logger without a rate of its own uses its parent's, and
+    ``""`` sets a rate for every logger.
+
+    ``rate_limit`` caps the records per second kept for each message template of
+    each logger, allowing bursts of up to ``rate_limit_burst``, at least 1 and
+    by default ``rate_limit`` or 1, whichever is more.
+
+    Records at ``keep_level`` or above, and records logged during a request
+    once it has been tagged as an error, are always kept. The decision is made
+    as each record is logged, so records the request logged before it was
+    tagged may have been dropped. The number of
+    records suppressed is reported by ``pop_summary`` every ``summary_interval``
+    seconds. ``keep`` is called from every logging thread at once, without the
+    handler's lock, so the counts and buckets have a lock of their own.
+    """
+
+    def __init__(
+        self,
+        sample_rates: Optional[SampleRates] = None,
+        rate_limit: Optional[float] = None,
+        rate_limit_burst: Optional[float] = None,
+        keep_level: int = logging.ERROR,
+        summary_interval: float = 60.0,
+    ):
+        self.sample_rates = self._parse_sample_rates(sample_rates or {})
+        if rate_limit_burst is None:
+            rate_limit_burst = max(1.0, rate_limit or 0)
+        elif rate_limit_burst < 1:
+            # The bucket could never hold a whole token.
+            raise ValueError(
+                f"rate_limit_burst must be at least 1, not {rate_limit_burst}"
+            )
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst
+        self.keep_level = keep_level
+        self.summary_interval = summary_interval
+
+        self.sampled_out = 0
+        self.rate_limited = 0
+        self._rates: Dict[Tuple[str, int], float] = {}
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._next_summary = time.monotonic() + summary_interval
+        self._lock = threading.Lock()
+
+    def keep(self, record: logging.LogRecord, scout_request=None) -> bool:
+        levelno = record.levelno
+        if levelno >= self.keep_level:
+            return True
+        if scout_request is not None and scout_request.tags.get("error"):
+            return True
+
+        rate = self._rates.get((record.name, levelno))
+        if rate is None:
+            rate = self._resolve_rate(record.name, levelno)
+        if rate < 1.0 and random.random() >= rate:
+            with self._lock:
+                self.sampled_out += 1
+            return False
+
+        if self.rate_limit is not None:
+            key = (record.name, str(record.msg))
+            with self._lock:
+                now = time.monotonic()
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    if len(self._buckets) >= MAX_RATE_LIMIT_KEYS:
+                        self._buckets.clear()
+                    bucket = self._buckets[key] = TokenBucket(
+                        self.rate_limit_burst, now
+                    )
+                if not bucket.take(self.rate_limit, self.rate_limit_burst, now):
+                    self.rate_limited += 1
+                    return False
+
+        return True
+
+    def pop_summary(self, flush: bool = False) -> Optional[logging.LogRecord]:
+        """
+        Once every ``summary_interval``, or right away if ``flush`` is set,
+        return a record reporting how many records were suppressed since the
+        last one, if any were.
+        """
+        now = time.monotonic()
+        if now < self._next_summary and not flush:
+            return None
+        with self._lock:
+            if now < self._next_summary and not flush:
+                # Another thread took it.
+                return None
+            self._next_summary = now + self.summary_interval
+            sampled_out, self.sampled_out = self.sampled_out, 0
+            rate_limited, self.rate_limited = self.rate_limited, 0
+        if not sampled_out and not rate_limited:
+            return None
+
+        record = logging.LogRecord(
+            name="scout_apm_logging",
+            level=logging.INFO,
+            pathname=__file__,
+            lineno=0,
+            msg="Suppressed %d log records (%d sampled out, %d rate limited)",
+            args=(sampled_out + rate_limited, sampled_out, rate_limited),
+            exc_info=None,
+        )
+        record.scout_suppressed_sampled = sampled_out
+        record.scout_suppressed_rate_limited = rate_limited
+        return record
+
+    def _resolve_rate(self, name: str, levelno: int) -> float:
+        level_name = logging.getLevelName(levelno)
+        logger_name: Optional[str] = name
+        rate = 1.0
+        while logger_name is not None:
+            rates = self.sample_rates.get(logger_name)
+            if rates is not None and (level_name in rates or None in rates):
+                rate = rates.get(level_name, rates.get(None, 1.0))
+                break
+            logger_name = self._parent_name(logger_name)
+
+        self._rates[(name, levelno)] = rate
+        return rate
+
+    @staticmethod
+    def _parent_name(name: str) -> Optional[str]:
+        if not name:
+            return None
+        return name.rpartition(".")[0]
+
+    @staticmethod
+    def _parse_sample_rates(
+        sample_rates: SampleRates,
+    ) -> Dict[str, Dict[Optional[str], float]]:
+        parsed: Dict[str, Dict[Optional[str], float]] = {}
+        for logger_name, rates in sample_rates.items():
+            # The root logger can be given as "root", as in dictConfig.
+            logger_name = "" if logger_name == "root" else logger_name
+            if isinstance(rates, Mapping):
+                parsed[logger_name] = {
+                    level.upper(): float(rate) for level, rate in rates.items()
+                }
+            else:
+                parsed[logger_name] = {None: float(rates)}
+        return parsed
@@ -0,0 +1,531 @@
+"""
+Pre-fork support: one shipper process per host exports the logs of every worker.
+
+Workers hand their enriched records to the shipper over a Unix socket instead
+of each running its own LoggerProvider, batch processor and gRPC
+channel. The shipper can be started on its own with::
+
+    python -m scout_apm_logging.shipper /path/to/socket --service-name my-app
+
+otherwise the first worker that finds no shipper listening starts one. A lock
+file next to the socket makes sure only one of them keeps running.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import select
+import selectors
+import signal
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import IO, Any, Dict, List, Mapping, Optional
+
+from scout_apm_logging.tracebacks import DEFAULT_FORMATTER, TracebackFormatter
+from scout_apm_logging.transport import TRANSPORTS
+from scout_apm_logging.utils.log_record import (
+    exception_attributes,
+    extra_attributes,
+    structured_message,
+)
+
+# Fields of the stdlib LogRecord the OTel conversion reads.
+RECORD_FIELDS = (
+    "name",
+    "levelno",
+    "levelname",
+    "created",
+    "pathname",
+    "funcName",
+    "lineno",
+)
+
+# Don't try to start a shipper more often than this, in seconds.
+SPAWN_INTERVAL = 5.0
+
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+# The shipper batches for the whole host, so it queues and exports more per
+# batch than a single process would by default. Set through the standard OTel
+# variables, which still take precedence when they're set.
+SHIPPER_BATCH_DEFAULTS = {
+    "OTEL_BLRP_MAX_QUEUE_SIZE": "32768",
+    "OTEL_BLRP_MAX_EXPORT_BATCH_SIZE": "2048",
+}
+
+# Each record is sent as a 4 byte big-endian length followed by its JSON.
+FRAME_HEADER = struct.Struct("!I")
+
+# Bytes a worker holds on to while the shipper's socket is full, or while
+# there's no shipper to connect to yet, before it starts dropping records.
+MAX_PENDING_BYTES = 1024 * 1024
+
+
+def default_socket_path(
+    service_name: str,
+    ingest_key: str,
+    endpoint: str,
+    environment: Optional[str] = None,
+) -> str:
+    # Apps on the same host only share a shipper if they'd export the same way,
+    # with the same resource.
+    key = f"{service_name}\0{ingest_key}\0{endpoint}"
+    if environment:
+        key += f"\0{environment}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(private_dir(), f"{digest}.sock")
+
+
+def private_dir() -> str:
+    """
+    The directory for this user's shipper sockets and their lock files, made
+    readable by this user only, so nobody else can connect to a shipper, or
+    put a socket or symlink where one is expected.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"scout-logs-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or stat.S_IMODE(info.st_mode) & 0o077
+    ):
+        raise PermissionError(f"{path} isn't a directory private to this user")
+    return path
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def encode_record(
+    record: logging.LogRecord,
+    attributes: Optional[Mapping[str, Any]] = None,
+    current_operation: Optional[str] = None,
+    structured: bool = False,
+    tracebacks: TracebackFormatter = DEFAULT_FORMATTER,
+) -> bytes:
+    data = {field: getattr(record, field) for field in RECORD_FIELDS}
+    if structured:
+        # Already typed attributes, which JSON keeps as they are.
+        data["msg"], extras = structured_message(record)
+    else:
+        data["msg"] = record.getMessage()
+        extras = {
+            key: _json_value(value) for key, value in extra_attributes(record).items()
+        }
+    if attributes:
+        extras.update((key, _json_value(value)) for key, value in attributes.items())
+    if current_operation:
+        extras["scout_current_operation"] = current_operation
+    extras.update(exception_attributes(record, tracebacks))
+    data["extras"] = extras
+
+    payload = json.dumps(data, separators=(",", ":")).encode()
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_record(payload: bytes) -> logging.LogRecord:
+    fields = json.loads(payload)
+    extras = fields.pop("extras")
+    record = logging.makeLogRecord(fields)
+    record.__dict__.update(extras)
+    return record
+
+
+def split_frames(buffer: bytearray) -> List[bytes]:
+    """
+    Take the complete frames off the front of ``buffer`` and return their
+    payloads, leaving any partial frame behind.
+    """
+    payloads = []
+    offset = 0
+    while len(buffer) - offset >= FRAME_HEADER.size:
+        (length,) = FRAME_HEADER.unpack_from(buffer, offset)
+        end = offset + FRAME_HEADER.size + length
+        if len(buffer) < end:
+            break
+        payloads.append(bytes(buffer[offset + FRAME_HEADER.size : end]))
+        offset = end
+    del buffer[:offset]
+    return payloads
+
+
+class ShipperClient(logging.Handler):
+    """
+    Stands in for the OTel LoggingHandler in a worker, sending each record to
+    the host's shipper. Sending never blocks: what the socket can't take right
+    away, or what's logged while there's no shipper listening, e.g. while one
+    is being started, is kept up to MAX_PENDING_BYTES and sent once it can be.
+    Past that records are dropped and counted.
+
+    When ``structured``, records are sent with their message unformatted and
+    their args and extras as typed attributes. Exceptions are turned into
+    attributes by ``tracebacks`` before they're sent.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        service_name: str,
+        ingest_key: str,
+        endpoint: str,
+        spawn_shipper: bool = True,
+        spool_dir: Optional[str] = None,
+        transport: Optional[str] = None,
+        structured: bool = False,
+        tracebacks: TracebackFormatter = DEFAULT_FORMATTER,
+        environment: Optional[str] = None,
+    ):
+        super().__init__()
+        self.socket_path = socket_path
+        self.service_name = service_name
+        self.ingest_key = ingest_key
+        self.endpoint = endpoint
+        self.spawn_shipper = spawn_shipper
+        self.spool_dir = spool_dir
+        self.transport = transport
+        self.environment = environment
+        self.structured = structured
+        self.tracebacks = tracebacks
+        self.dropped = 0
+        self.shipper_process: Optional[subprocess.Popen] = None
+        self._last_spawn = 0.0
+        self._socket: Optional[socket.socket] = None
+        self._socket_pid = os.getpid()
+        # Whole frames, but for the first _frame_remaining bytes: the rest of
+        # a frame that was partly sent.
+        self._pending = bytearray()
+        self._frame_remaining = 0
+        self._send_lock = threading.Lock()
+
+    def emit(self, record, attributes=None, current_operation=None):
+        frame = encode_record(
+            record,
+            attributes,
+            current_operation,
+            structured=self.structured,
+            tracebacks=self.tracebacks,
+        )
+        with self._send_lock:
+            connected = self._connect()
+            if len(self._pending) + len(frame) > MAX_PENDING_BYTES:
+                self.dropped += 1
+            else:
+                self._pending += frame
+            if connected:
+                self._send_pending()
+
+    def flush(self, timeout: float = 1.0):
+        """
+        Send what's pending, waiting up to ``timeout`` seconds for the socket,
+        or for a shipper to connect to.
+        """
+        deadline = time.monotonic() + timeout
+        with self._send_lock:
+            while self._pending:
+                if self._connect():
+                    self._send_pending()
+                    if not self._pending or self._socket is None:
+                        continue
+                    wait = [self._socket]
+                else:
+                    wait = []
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if wait:
+                    select.select([], wait, [], remaining)
+                else:
+                    time.sleep(min(remaining, 0.05))
+
+    def _connect(self) -> bool:
+        pid = os.getpid()
+        if self._socket_pid != pid:
+            # Inherited across fork(): the connection, and what's pending, are
+            # the parent's.
+            self._socket = None
+            self._pending.clear()
+            self._frame_remaining = 0
+            self._socket_pid = pid
+        if self._socket is not None:
+            return True
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(self.socket_path)
+        except OSError:
+            self._socket.close()
+            self._socket = None
+            self._start_shipper()
+            return False
+        self._socket.setblocking(False)
+        return True
+
+    def _send_pending(self):
+        try:
+            sent = self._socket.send(self._pending)
+        except BlockingIOError:
+            return
+        except OSError:
+            # The shipper went away. What it got of a frame is lost, the whole
+            # frames after it are sent to the next one.
+            self._disconnect()
+            return
+        # Find where the frame the send stopped in ends.
+        end = self._frame_remaining
+        while end < sent:
+            (length,) = FRAME_HEADER.unpack_from(self._pending, end)
+            end += FRAME_HEADER.size + length
+        self._frame_remaining = end - sent
+        del self._pending[:sent]
+
+    def _disconnect(self):
+        self._socket.close()
+        self._socket = None
+        if self._frame_remaining:
+            del self._pending[: self._frame_remaining]
+            self._frame_remaining = 0
+            self.dropped += 1
+
+    def _drop_pending(self):
+        offset = self._frame_remaining
+        while offset < len(self._pending):
+            (length,) = FRAME_HEADER.unpack_from(self._pending, offset)
+            offset += FRAME_HEADER.size + length
+            self.dropped += 1
+        self._pending.clear()
+        self._frame_remaining = 0
+
+    def _start_shipper(self):
+        now = time.monotonic()
+        if not self.spawn_shipper or now - self._last_spawn < SPAWN_INTERVAL:
+            return
+        self._last_spawn = now
+
+        env = dict(
+            os.environ,
+            SCOUT_LOGS_INGEST_KEY=self.ingest_key,
+            SCOUT_LOGS_REPORTING_ENDPOINT=self.endpoint,
+        )
+        args = [
+            sys.executable,
+            "-m",
+            "scout_apm_logging.shipper",
+            self.socket_path,
+            "--service-name",
+            self.service_name,
+        ]
+        if self.spool_dir:
+            args += ["--spool-dir", self.spool_dir]
+        if self.transport:
+            args += ["--transport", self.transport]
+        if self.environment:
+            args += ["--environment", self.environment]
+        self.shipper_process = subprocess.Popen(
+            args,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    def close(self):
+        with self._send_lock:
+            # After a fork, the connection and what's pending are the parent's.
+            if self._socket_pid == os.getpid():
+                if self._socket is not None:
+                    self._disconnect()
+                self._drop_pending()
+        super().close()
+
+
+class LogShipper:
+    """
+    Receives records from every worker on the host and exports them through a
+    single LoggerProvider. Exits once no worker has been connected, and nothing
+    has arrived, for ``idle_timeout`` seconds, so it doesn't outlive the
+    workers that started it.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        service_name: str,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        spool_dir: Optional[str] = None,
+        transport: Optional[str] = None,
+        environment: Optional[str] = None,
+    ):
+        self.socket_path = socket_path
+        self.service_name = service_name
+        self.idle_timeout = idle_timeout
+        self.spool_dir = spool_dir
+        self.transport = transport
+        self.environment = environment
+        self.received = 0
+        self._stopped = threading.Event()
+        self._lock_file: Optional[IO[str]] = None
+        self._socket: Optional[socket.socket] = None
+
+    def acquire(self) -> bool:
+        """
+        Take the host-wide shipper lock and bind the socket. Returns False if
+        another shipper already holds it.
+        """
+        # Not through a symlink someone else left in the socket's place.
+        lock_fd = os.open(
+            f"{self.socket_path}.lock",
+            os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW | os.O_CLOEXEC,
+            0o600,
+        )
+        lock_file = os.fdopen(lock_fd, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+
+        # Left behind by a shipper that didn't exit cleanly.
+        if os.path.lexists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only this user can connect, from the moment the socket exists.
+        umask = os.umask(0o177)
+        try:
+            self._socket.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        self._socket.listen(128)
+        self._socket.setblocking(False)
+        return True
+
+    def run(self):
+        from scout_apm_logging.handler import ScoutOtelHandler
+
+        handler = ScoutOtelHandler(
+            service_name=self.service_name,
+            spool_dir=self.spool_dir,
+            transport=self.transport,
+            environment=self.environment,
+        )
+        handler._initialize()
+        otel_handler = ScoutOtelHandler.otel_handler
+
+        selector = selectors.DefaultSelector()
+        selector.register(self._socket, selectors.EVENT_READ)
+        buffers: Dict[socket.socket, bytearray] = {}
+        last_received = time.monotonic()
+        try:
+            while True:
+                # Once stopped, keep going only until the sockets are drained.
+                stopped = self._stopped.is_set()
+                events = selector.select(timeout=0.1 if stopped else 0.5)
+                if not events:
+                    # Workers that are still connected may log again at any
+                    # time, so it's only idle once they're all gone.
+                    idle = (
+                        not buffers
+                        and time.monotonic() - last_received > self.idle_timeout
+                    )
+                    if stopped or idle:
+                        break
+                    continue
+                last_received = time.monotonic()
+
+                for key, _ in events:
+                    if key.fileobj is self._socket:
+                        connection, _ = self._socket.accept()
+                        connection.setblocking(False)
+                        selector.register(connection, selectors.EVENT_READ)
+                        buffers[connection] = bytearray()
+                        continue
+
+                    connection = key.fileobj
+                    try:
+                        data = connection.recv(65536)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        data = b""
+                    if not data:
+                        selector.unregister(connection)
+                        connection.close()
+                        del buffers[connection]
+                        continue
+
+                    buffer = buffers[connection]
+                    buffer += data
+                    for payload in split_frames(buffer):
+                        self.received += 1
+                        try:
+                            otel_handler.emit(decode_record(payload))
+                        except Exception:
+                            continue
+        finally:
+            for connection in buffers:
+                connection.close()
+            selector.close()
+            self.release()
+            if handler.logger_provider:
+                handler.logger_provider.shutdown()
+
+    def stop(self):
+        self._stopped.set()
+
+    def release(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scout APM log shipper")
+    parser.add_argument("socket_path")
+    parser.add_argument("--service-name", default=None)
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT)
+    parser.add_argument("--spool-dir", default=None)
+    parser.add_argument("--transport", choices=TRANSPORTS, default=None)
+    parser.add_argument("--environment", default=None)
+    args = parser.parse_args(argv)
+
+    for name, value in SHIPPER_BATCH_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+
+    shipper = LogShipper(
+        args.socket_path,
+        args.service_name,
+        idle_timeout=args.idle_timeout,
+        spool_dir=args.spool_dir,
+        transport=args.transport,
+        environment=args.environment,
+    )
+    if not shipper.acquire():
+        return
+    signal.signal(signal.SIGTERM, lambda signum, frame: shipper.stop())
+    shipper.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+A disk spool for the log batches the exporter can't deliver right away.
+
+Batches are kept as serialized OTLP requests in memory-mapped segment files, so
+an outage of the logs endpoint grows files on disk instead of the heap, and the
+batches are sent once it's back, in the order they were logged. The spool
+never takes more than its ``max_bytes``: past that, the oldest segments are
+dropped.
+
+Each segment starts with the offset up to which it has been delivered, followed
+by the batches, each a 4 byte big-endian length and its payload. The rest of
+the file is zeroes, and a zero length marks the end.
+"""
+
+import fcntl
+import itertools
+import mmap
+import os
+import struct
+import threading
+from collections import deque
+from typing import IO, Deque, Optional, Tuple
+
+DEFAULT_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+
+SEGMENT_HEADER = struct.Struct("!Q")
+FRAME_HEADER = struct.Struct("!I")
+SEGMENT_SUFFIX = ".seg"
+
+# Where a batch is in the spool: its segment's sequence number and offset.
+SpoolPosition = Tuple[int, int]
+
+
+class _Segment:
+    __slots__ = ("sequence", "path", "map", "read_offset", "write_offset", "frames")
+
+    def __init__(self, sequence: int, path: str, size: Optional[int] = None):
+        self.sequence = sequence
+        self.path = path
+        with open(path, "r+b" if size is None else "w+b") as segment_file:
+            if size is not None:
+                segment_file.truncate(size)
+            self.map = mmap.mmap(segment_file.fileno(), 0)
+
+        (read_offset,) = SEGMENT_HEADER.unpack_from(self.map)
+        if size is not None or not SEGMENT_HEADER.size <= read_offset <= self.size:
+            read_offset = SEGMENT_HEADER.size
+            SEGMENT_HEADER.pack_into(self.map, 0, read_offset)
+        self.read_offset = read_offset
+        self.write_offset = SEGMENT_HEADER.size
+        self.frames = 0
+        self._scan()
+
+    @property
+    def size(self) -> int:
+        return len(self.map)
+
+    def _scan(self):
+        # Find where the batches end, and count those not yet delivered.
+        offset = SEGMENT_HEADER.size
+        while offset + FRAME_HEADER.size <= self.size:
+            (length,) = FRAME_HEADER.unpack_from(self.map, offset)
+            end = offset + FRAME_HEADER.size + length
+            if not length or end > self.size:
+                break
+            if offset >= self.read_offset:
+                self.frames += 1
+            offset = end
+        self.write_offset = offset
+        self.read_offset = min(self.read_offset, offset)
+
+    def fits(self, length: int) -> bool:
+        return self.write_offset + FRAME_HEADER.size + length <= self.size
+
+    def append(self, payload: bytes):
+        start = self.write_offset + FRAME_HEADER.size
+        # The payload goes in before its length, so a crash halfway through
+        # leaves the zero length that marks the end.
+        self.map[start : start + len(payload)] = payload
+        FRAME_HEADER.pack_into(self.map, self.write_offset, len(payload))
+        self.write_offset = start + len(payload)
+        self.frames += 1
+
+    def read(self) -> bytes:
+        (length,) = FRAME_HEADER.unpack_from(self.map, self.read_offset)
+        start = self.read_offset + FRAME_HEADER.size
+        return self.map[start : start + length]
+
+    def advance(self):
+        (length,) = FRAME_HEADER.unpack_from(self.map, self.read_offset)
+        self.read_offset += FRAME_HEADER.size + length
+        SEGMENT_HEADER.pack_into(self.map, 0, self.read_offset)
+        self.frames -= 1
+
+    def close(self, delete: bool = False):
+        self.map.close()
+        if delete:
+            os.unlink(self.path)
+
+
+class SegmentSpool:
+    """
+    A queue of serialized batches in ``directory``, kept in segment files of
+    ``segment_bytes`` each and at most ``max_bytes`` in all. When it's full the
+    oldest segment is dropped, and the batches in it are counted in
+    ``dropped``. Batches left over from a previous run are picked up again.
+
+    Only one process can use a directory at a time, see ``claim``.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_SPOOL_MAX_BYTES,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = min(segment_bytes, max_bytes)
+        self.dropped = 0
+        self._segments: Deque[_Segment] = deque()
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file: Optional[IO[str]] = open(
+            os.path.join(directory, "spool.lock"), "w"
+        )
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise
+        self._load()
+
+    @classmethod
+    def claim(cls, directory: str, **kwargs) -> "SegmentSpool":
+        """
+        Open the first spool under ``directory`` no other process is using, so
+        forked workers each get their own and a restarted one picks up what
+        its predecessor left.
+        """
+        for slot in itertools.count():
+            try:
+                return cls(os.path.join(directory, str(slot)), **kwargs)
+            except BlockingIOError:
+                continue
+        raise AssertionError("unreachable")
+
+    def __len__(self):
+        with self._lock:
+            return sum(segment.frames for segment in self._segments)
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._size_bytes()
+
+    def append(self, payload: bytes) -> bool:
+        """
+        Add a batch to the end of the spool. Returns False if it was dropped
+        for being larger than the whole spool.
+        """
+        with self._lock:
+            if self._lock_file is None:
+                return False
+            segment = self._segments[-1] if self._segments else None
+            if segment is None or not segment.fits(len(payload)):
+                size = max(
+                    self.segment_bytes,
+                    SEGMENT_HEADER.size + FRAME_HEADER.size + len(payload),
+                )
+                if size > self.max_bytes:
+                    self.dropped += 1
+                    return False
+                if segment is not None and not segment.frames:
+                    self._segments.pop().close(delete=True)
+                self._make_room(size)
+                segment = self._new_segment(size)
+            segment.append(payload)
+            return True
+
+    def peek(self) -> Optional[Tuple[SpoolPosition, bytes]]:
+        """
+        Return the oldest batch and its position, or None if the spool is empty.
+        """
+        with self._lock:
+            for segment in self._segments:
+                if segment.frames:
+                    return (segment.sequence, segment.read_offset), segment.read()
+            return None
+
+    def commit(self, position: SpoolPosition):
+        """
+        Remove the batch at ``position`` once it's been delivered. Does nothing
+        if it was dropped in the meantime.
+        """
+        with self._lock:
+            while self._segments and not self._segments[0].frames:
+                if len(self._segments) == 1:
+                    return
+                self._segments.popleft().close(delete=True)
+            if not self._segments:
+                return
+            segment = self._segments[0]
+            if (segment.sequence, segment.read_offset) != position:
+                return
+            segment.advance()
+            if not segment.frames and len(self._segments) > 1:
+                self._segments.popleft().close(delete=True)
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments:
+                segment.map.flush()
+                segment.close()
+            self._segments.clear()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _load(self):
+        names = sorted(
+            name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                sequence = int(name[: -len(SEGMENT_SUFFIX)])
+                segment = _Segment(sequence, path)
+            except (ValueError, OSError):
+                # Not one of ours, or cut short before it could be mapped.
+                continue
+            if segment.frames:
+                self._segments.append(segment)
+            else:
+                segment.close(delete=True)
+        self._make_room(0)
+
+    def _make_room(self, size: int):
+        while self._segments and self._size_bytes() + size > self.max_bytes:
+            segment = self._segments.popleft()
+            self.dropped += segment.frames
+            segment.close(delete=True)
+
+    def _size_bytes(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    def _new_segment(self, size: int) -> _Segment:
+        sequence = self._segments[-1].sequence + 1 if self._segments else 0
+        path = os.path.join(self.directory, f"{sequence:016d}{SEGMENT_SUFFIX}")
+        segment = _Segment(sequence, path, size)
+        self._segments.append(segment)
+        return segment
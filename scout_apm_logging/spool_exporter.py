@@ -0,0 +1,101 @@
+"""
+Puts the disk spool between the batch processor and the transport's exporter.
+"""
+
+import threading
+
+from google.protobuf.message import DecodeError
+from opentelemetry.proto.collector.logs.v1.logs_service_pb2 import (
+    ExportLogsServiceRequest,
+)
+
+from scout_apm_logging.compat import LogRecordExporter, LogRecordExportResult
+from scout_apm_logging.spool import SegmentSpool
+
+# How long to wait before retrying the endpoint, doubling up to the maximum
+# while it stays down.
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+class SpoolingLogExporter(LogRecordExporter):
+    """
+    Exports batches straight through ``exporter`` while the endpoint is up.
+    Once a batch fails, it and every batch after it go to ``spool``, and a
+    background thread sends them from there, backing off while the endpoint
+    stays down. The batch processor never waits on the retries, and nothing
+    it hands over is kept in memory.
+
+    ``exporter`` is the transport's exporter, which can also ``encode`` a batch
+    for the spool and ``send`` one read back from it.
+    """
+
+    def __init__(
+        self,
+        exporter,
+        spool: SegmentSpool,
+        min_backoff: float = MIN_BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+    ):
+        self.exporter = exporter
+        self.spool = spool
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._spooled = threading.Event()
+        self._stopped = threading.Event()
+        self._drainer = threading.Thread(
+            target=self._drain, name="scout-log-spool", daemon=True
+        )
+        self._drainer.start()
+        if len(spool):
+            # Left over from a previous run
+            self._spooled.set()
+
+    def export(self, batch):
+        if not len(self.spool):
+            result = self.exporter.export(batch)
+            if result == LogRecordExportResult.SUCCESS:
+                return result
+
+        self.spool.append(self.exporter.encode(batch))
+        self._spooled.set()
+        return LogRecordExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        # Spooled batches are kept on disk until the endpoint is back, so
+        # there's nothing to wait for here.
+        return True
+
+    def shutdown(self, timeout_millis: float = 30000, **kwargs):
+        self._stopped.set()
+        self._spooled.set()
+        self._drainer.join(timeout_millis / 1000)
+        self.exporter.shutdown()
+        self.spool.close()
+
+    def _drain(self):
+        backoff = self.min_backoff
+        while not self._stopped.is_set():
+            entry = self.spool.peek()
+            if entry is None:
+                self._spooled.wait()
+                self._spooled.clear()
+                continue
+
+            position, payload = entry
+            try:
+                request = ExportLogsServiceRequest.FromString(payload)
+            except DecodeError:
+                # Nothing will ever make it through, so don't hold up the rest.
+                self.spool.commit(position)
+                continue
+            try:
+                sent = self.exporter.send(request)
+            except Exception:
+                sent = False
+            if sent:
+                self.spool.commit(position)
+                backoff = self.min_backoff
+            else:
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
@@ -0,0 +1,192 @@
+"""
+What the handler measures about itself with ``telemetry=True``: where the time
+goes in emit, what happens to records on their way to the exporter, and how
+exports go. Nothing here is touched with telemetry off.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# Upper bounds of the histogram buckets: 1us to about 1s for durations, and 1 to
+# 8192 records for batch sizes. Anything larger goes in one more bucket.
+LATENCY_BOUNDS = tuple(1e-6 * 2**i for i in range(21))
+BATCH_SIZE_BOUNDS = tuple(2**i for i in range(14))
+
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+class Histogram:
+    """
+    Counts of values by bucket. Quantiles are the upper bound of the bucket
+    they fall in, or the largest value seen for the last bucket.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max", "_lock")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self.counts)
+            count, total, largest = self.count, self.sum, self.max
+        snapshot: Dict[str, Any] = {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "max": largest,
+        }
+        for name, quantile in QUANTILES.items():
+            snapshot[name] = self._quantile(counts, count * quantile, largest)
+        return snapshot
+
+    def _quantile(self, counts, rank, largest) -> float:
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if bucket_count and seen >= rank:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], largest)
+                break
+        return largest
+
+
+class Counters:
+    """Named counters, only created once they're first incremented."""
+
+    __slots__ = ("_values", "_lock")
+
+    def __init__(self):
+        self._values: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, amount: int = 1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+
+class EmitTelemetry:
+    """
+    Per-handler: time spent in emit on enrichment (sampling, collapsing and
+    the Scout attributes) and on converting records for OTel, and what became
+    of the records handled.
+    """
+
+    __slots__ = ("enrichment", "conversion", "records")
+
+    def __init__(self):
+        self.enrichment = Histogram(LATENCY_BOUNDS)
+        self.conversion = Histogram(LATENCY_BOUNDS)
+        self.records = Counters()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enrichment_seconds": self.enrichment.snapshot(),
+            "conversion_seconds": self.conversion.snapshot(),
+            "records": self.records.snapshot(),
+        }
+
+
+class ExportTelemetry:
+    """
+    For the exporter pipeline: batch sizes and durations, records exported or
+    failed, and bytes sent. ``gauges`` are read when a snapshot is taken.
+    """
+
+    __slots__ = ("batch_size", "duration", "counters", "gauges")
+
+    def __init__(self):
+        self.batch_size = Histogram(BATCH_SIZE_BOUNDS)
+        self.duration = Histogram(LATENCY_BOUNDS)
+        self.counters = Counters()
+        self.gauges: Dict[str, Callable[[], int]] = {}
+
+    def add_bytes_sent(self, amount: int):
+        self.counters.add("bytes_sent", amount)
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = {
+            "batch_size": self.batch_size.snapshot(),
+            "duration_seconds": self.duration.snapshot(),
+            **self.counters.snapshot(),
+        }
+        for name, gauge in self.gauges.items():
+            snapshot[name] = gauge()
+        return snapshot
+
+
+def register_metrics(
+    stats: Callable[[], Dict[str, Any]], meter_provider: Optional[Any] = None
+):
+    """
+    Report ``stats`` as OTel metrics through ``meter_provider``, or the global
+    one, which does nothing unless the app has set one up. They're read each
+    time the meter provider collects.
+    """
+    from opentelemetry.metrics import CallbackOptions, Observation, get_meter
+
+    meter = get_meter("scout_apm_logging", meter_provider=meter_provider)
+
+    def records(options: CallbackOptions):
+        current = stats()
+        outcomes = dict(current.get("records", {}))
+        export = current.get("export", {})
+        for outcome in ("exported", "failed"):
+            if f"records_{outcome}" in export:
+                outcomes[outcome] = export[f"records_{outcome}"]
+        return [
+            Observation(count, {"outcome": outcome})
+            for outcome, count in outcomes.items()
+        ]
+
+    def bytes_sent(options: CallbackOptions):
+        return [Observation(stats().get("export", {}).get("bytes_sent", 0))]
+
+    def queue_depth(options: CallbackOptions):
+        return [Observation(stats().get("queue_depth", 0))]
+
+    def durations(options: CallbackOptions):
+        current = stats()
+        stages = {
+            "enrichment": current.get("enrichment_seconds"),
+            "conversion": current.get("conversion_seconds"),
+            "export": current.get("export", {}).get("duration_seconds"),
+        }
+        return [
+            Observation(histogram["p99"], {"stage": stage})
+            for stage, histogram in stages.items()
+            if histogram and histogram["count"]
+        ]
+
+    meter.create_observable_counter(
+        "scout_logs.records", callbacks=[records], unit="{record}"
+    )
+    meter.create_observable_counter(
+        "scout_logs.bytes_sent", callbacks=[bytes_sent], unit="By"
+    )
+    meter.create_observable_gauge(
+        "scout_logs.queue_depth", callbacks=[queue_depth], unit="{record}"
+    )
+    meter.create_observable_gauge(
+        "scout_logs.duration.p99", callbacks=[durations], unit="s"
+    )
+    return meter
@@ -0,0 +1,39 @@
+"""
+Puts telemetry around the exporter the batch processor hands batches to.
+"""
+
+import time
+
+from scout_apm_logging.compat import LogRecordExporter, LogRecordExportResult
+from scout_apm_logging.telemetry import ExportTelemetry
+
+
+class InstrumentedLogExporter(LogRecordExporter):
+    """Records each export of ``exporter`` in ``telemetry``."""
+
+    def __init__(self, exporter, telemetry: ExportTelemetry):
+        self.exporter = exporter
+        self.telemetry = telemetry
+
+    def export(self, batch):
+        telemetry = self.telemetry
+        start = time.perf_counter()
+        try:
+            result = self.exporter.export(batch)
+        except Exception:
+            telemetry.counters.add("records_failed", len(batch))
+            raise
+        finally:
+            telemetry.duration.record(time.perf_counter() - start)
+            telemetry.batch_size.record(len(batch))
+        if result == LogRecordExportResult.SUCCESS:
+            telemetry.counters.add("records_exported", len(batch))
+        else:
+            telemetry.counters.add("records_failed", len(batch))
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter.force_flush(timeout_millis)
+
+    def shutdown(self, *args, **kwargs):
+        return self.exporter.shutdown(*args, **kwargs)
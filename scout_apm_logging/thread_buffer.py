@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from scout_apm_logging.fork import reset_after_fork
+
+# Records a thread keeps before exporting them, and how long it keeps them.
+DEFAULT_BUFFER_SIZE = 64
+DEFAULT_BUFFER_INTERVAL = 0.5
+
+# How often the flusher looks for buffers that are due, at most.
+_FLUSHER_TICK = 0.1
+
+
+class _Buffer:
+    __slots__ = ("items", "since", "request", "thread", "lock")
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.since = 0.0
+        self.request = None
+        self.thread = threading.current_thread()
+        # Only ever contended by the flusher, or by a flush from another thread.
+        self.lock = threading.Lock()
+
+
+class ThreadBuffers:
+    """
+    Per-thread buffers of items, each passed to ``consume`` in chunks.
+
+    ``add`` appends to the calling thread's own buffer, so logging threads
+    don't wait on each other. A buffer is exported by its thread once it holds
+    ``size`` items, once its oldest is ``interval`` seconds old, or once it's
+    given an item from another request than the ones it holds. A background
+    flusher exports buffers that are due but whose threads have stopped
+    logging, or whose request has finished.
+    """
+
+    def __init__(
+        self,
+        consume: Callable[[Any], None],
+        size: int = DEFAULT_BUFFER_SIZE,
+        interval: float = DEFAULT_BUFFER_INTERVAL,
+        on_flusher_start: Optional[Callable[[], None]] = None,
+    ):
+        self.consume = consume
+        self.size = size
+        self.interval = interval
+        self.on_flusher_start = on_flusher_start
+        self.dropped = 0
+        self._reset()
+
+        reset_after_fork(self)
+
+    def _reset(self):
+        self._local = threading.local()
+        self._buffers: List[_Buffer] = []
+        self._registry_lock = threading.Lock()
+        self._drop_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _reset_after_fork(self):
+        # The child leaves whatever the parent had buffered to the parent.
+        self._reset()
+
+    def __len__(self):
+        return sum(len(buffer.items) for buffer in list(self._buffers))
+
+    def add(self, item, request=None):
+        """
+        Buffer ``item``, logged during ``request``, for the calling thread.
+        """
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._register()
+
+        now = time.monotonic()
+        if buffer.items and (
+            request is not buffer.request or now - buffer.since >= self.interval
+        ):
+            self._flush_buffer(buffer)
+        with buffer.lock:
+            if not buffer.items:
+                buffer.since = now
+                buffer.request = request
+            buffer.items.append(item)
+            full = len(buffer.items) >= self.size
+        if full:
+            self._flush_buffer(buffer)
+
+    def flush(self):
+        """
+        Export every thread's buffer, on the calling thread.
+        """
+        for buffer in list(self._buffers):
+            self._flush_buffer(buffer)
+
+    def _register(self) -> _Buffer:
+        buffer = self._local.buffer = _Buffer()
+        with self._registry_lock:
+            self._buffers.append(buffer)
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run, name="scout-thread-buffers", daemon=True
+                )
+                self._flusher.start()
+        return buffer
+
+    def _flush_buffer(self, buffer: _Buffer):
+        # The lock is held while the chunk is consumed, so a flush from another
+        # thread returns only once the chunk it found in flight is exported.
+        with buffer.lock:
+            items, buffer.items = buffer.items, []
+            buffer.request = None
+            for item in items:
+                try:
+                    self.consume(item)
+                except Exception:
+                    with self._drop_lock:
+                        self.dropped += 1
+
+    def _due(self, buffer: _Buffer, now: float) -> bool:
+        if not buffer.items:
+            return False
+        request = buffer.request
+        return (
+            now - buffer.since >= self.interval
+            or (request is not None and request.end_time is not None)
+            or not buffer.thread.is_alive()
+        )
+
+    def _run(self):
+        if self.on_flusher_start:
+            self.on_flusher_start()
+        tick = min(self.interval, _FLUSHER_TICK)
+        while True:
+            time.sleep(tick)
+            now = time.monotonic()
+            for buffer in list(self._buffers):
+                if self._due(buffer, now):
+                    self._flush_buffer(buffer)
+                if not buffer.thread.is_alive() and not buffer.items:
+                    with self._registry_lock:
+                        self._buffers.remove(buffer)
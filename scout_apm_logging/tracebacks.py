@@ -0,0 +1,158 @@
+"""
+Exception attributes for records logged with ``exc_info``, formatted as
+cheaply as the settings allow.
+
+Formatting a traceback reads the source of every frame, which adds up during
+an error storm. With a fingerprint window, a traceback is only formatted the
+first time it's seen in the window. Records of the same traceback after that
+only carry its fingerprint, which is worked out from the code locations of its
+frames without formatting anything.
+"""
+
+import hashlib
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from types import TracebackType
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+EXCEPTION_TYPE = "exception.type"
+EXCEPTION_MESSAGE = "exception.message"
+EXCEPTION_STACKTRACE = "exception.stacktrace"
+EXCEPTION_FINGERPRINT = "scout_exception_fingerprint"
+
+# Fingerprints remembered at once, keeping the most recently seen.
+DEFAULT_MAX_FINGERPRINTS = 1024
+
+# Put in place of the start of a stack trace cut to max_length.
+TRUNCATED = "...\n"
+
+
+def _chain(exc_info) -> Iterator[Tuple[type, Optional[TracebackType]]]:
+    # The exception and the ones it was raised from, as they're formatted.
+    seen = set()
+    exc_type, exc_value, exc_traceback = exc_info
+    while exc_type is not None and id(exc_value) not in seen:
+        seen.add(id(exc_value))
+        yield exc_type, exc_traceback
+        if exc_value is None:
+            return
+        exc_value = exc_value.__cause__ or (
+            None if exc_value.__suppress_context__ else exc_value.__context__
+        )
+        if exc_value is None:
+            return
+        exc_type, exc_traceback = type(exc_value), exc_value.__traceback__
+
+
+def fingerprint(exc_info) -> str:
+    """
+    A stable fingerprint of the exception's type and the code locations of
+    its traceback, and of the exceptions it was raised from.
+    """
+    parts = []
+    for exc_type, tb in _chain(exc_info):
+        parts.append(f"{exc_type.__module__}.{exc_type.__qualname__}")
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            parts.append(f"{code.co_filename}:{tb.tb_lineno}:{code.co_name}")
+            tb = tb.tb_next
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=8).hexdigest()
+
+
+def _code_locations(exc_info) -> tuple:
+    # Quicker to get than line numbers, which are worked out from the
+    # instruction offset, but only meaningful within this process.
+    locations: list = []
+    for exc_type, tb in _chain(exc_info):
+        locations.append(exc_type)
+        while tb is not None:
+            locations.append(tb.tb_frame.f_code)
+            locations.append(tb.tb_lasti)
+            tb = tb.tb_next
+    return tuple(locations)
+
+
+class TracebackFormatter:
+    """
+    Turns a record's ``exc_info`` into OTel exception attributes.
+
+    ``max_frames`` keeps only the innermost frames of each traceback, and
+    ``max_length`` cuts the stack trace down to its last characters. With a
+    ``fingerprint_window``, in seconds, every record gets the traceback's
+    fingerprint, and only the first record of a traceback in the window gets
+    its stack trace.
+    """
+
+    def __init__(
+        self,
+        max_frames: Optional[int] = None,
+        max_length: Optional[int] = None,
+        fingerprint_window: Optional[float] = None,
+        max_fingerprints: int = DEFAULT_MAX_FINGERPRINTS,
+    ):
+        self.max_frames = max_frames
+        self.max_length = max_length
+        self.fingerprint_window = fingerprint_window
+        self.max_fingerprints = max_fingerprints
+        # When each fingerprint's stack trace was last sent.
+        self._sent: "OrderedDict[str, float]" = OrderedDict()
+        # The fingerprint of each traceback's code locations.
+        self._fingerprints: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def attributes(self, exc_info) -> Dict[str, Any]:
+        exc_type, exc_value, exc_traceback = exc_info
+        attributes: Dict[str, Any] = {}
+        if exc_type is not None:
+            attributes[EXCEPTION_TYPE] = exc_type.__name__
+        if exc_value is not None and exc_value.args:
+            attributes[EXCEPTION_MESSAGE] = str(exc_value.args[0])
+        if exc_traceback is None:
+            return attributes
+
+        if self.fingerprint_window is not None:
+            key = attributes[EXCEPTION_FINGERPRINT] = self.fingerprint(exc_info)
+            if not self._first_in_window(key, self.fingerprint_window):
+                return attributes
+        attributes[EXCEPTION_STACKTRACE] = self.stacktrace(exc_info)
+        return attributes
+
+    def stacktrace(self, exc_info) -> str:
+        limit = -self.max_frames if self.max_frames else None
+        text = "".join(traceback.format_exception(*exc_info, limit=limit))
+        if self.max_length is not None and len(text) > self.max_length:
+            text = TRUNCATED + text[len(text) - self.max_length + len(TRUNCATED) :]
+        return text
+
+    def fingerprint(self, exc_info) -> str:
+        locations = _code_locations(exc_info)
+        with self._lock:
+            key = self._fingerprints.get(locations)
+            if key is not None:
+                self._fingerprints.move_to_end(locations)
+        if key is None:
+            key = fingerprint(exc_info)
+            with self._lock:
+                self._fingerprints[locations] = key
+                if len(self._fingerprints) > self.max_fingerprints:
+                    self._fingerprints.popitem(last=False)
+        return key
+
+    def _first_in_window(self, key: str, window: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            sent = self._sent.get(key)
+            if sent is not None and now - sent < window:
+                self._sent.move_to_end(key)
+                return False
+            self._sent[key] = now
+            self._sent.move_to_end(key)
+            if len(self._sent) > self.max_fingerprints:
+                self._sent.popitem(last=False)
+            return True
+
+
+# Formats every traceback in full, as records have always been exported.
+DEFAULT_FORMATTER = TracebackFormatter()
@@ -0,0 +1,165 @@
+"""
+Turns stdlib log records into OTel ones, in place of OTel's LoggingHandler.
+
+LoggingHandler finds a record's attributes by going through everything set on
+it, so the Scout attributes would have to be set on the caller's record, where
+every other handler would see them too. Here they're passed alongside it
+instead, and only the fields the OTel record needs are read.
+"""
+
+import inspect
+import logging
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Optional, Tuple
+
+from opentelemetry._logs import NoOpLogger, SeverityNumber
+from opentelemetry.context import get_current
+from opentelemetry.sdk._logs import Logger
+from opentelemetry.trace import get_current_span
+
+from scout_apm_logging.tracebacks import DEFAULT_FORMATTER, TracebackFormatter
+from scout_apm_logging.utils.log_record import (
+    exception_attributes,
+    extra_attributes,
+    structured_message,
+)
+
+CODE_FILE_PATH = "code.file.path"
+CODE_FUNCTION_NAME = "code.function.name"
+CODE_LINE_NUMBER = "code.line.number"
+
+# OTel's names for Python's levels, where they differ.
+SEVERITY_TEXTS = {"WARNING": "WARN", "CRITICAL": "FATAL"}
+
+# The first OTel severity of each of Python's levels, which get up to three
+# more for the levels just above them (e.g. 21 is INFO2).
+_BASE_SEVERITIES = {
+    10: SeverityNumber.DEBUG,
+    20: SeverityNumber.INFO,
+    30: SeverityNumber.WARN,
+    40: SeverityNumber.ERROR,
+    50: SeverityNumber.FATAL,
+}
+
+# Bodies that can be exported as they are, rather than as a string.
+_ANY_VALUE_TYPES = (type(None), bool, bytes, int, float, str, Sequence, Mapping)
+
+
+def severity_number(levelno: int) -> SeverityNumber:
+    if levelno < 10:
+        return SeverityNumber.UNSPECIFIED
+    if levelno > 53:
+        return SeverityNumber.FATAL4
+    base = _BASE_SEVERITIES[min(levelno // 10 * 10, 50)]
+    return SeverityNumber(base.value + min(levelno % 10, 3))
+
+
+def record_body(record: logging.LogRecord) -> Any:
+    # As LoggingHandler does, export a msg that isn't a template as it is.
+    if not record.args and not isinstance(record.msg, str):
+        if isinstance(record.msg, _ANY_VALUE_TYPES):
+            return record.msg
+        return str(record.msg)
+    return record.getMessage()
+
+
+if "timestamp" in inspect.signature(Logger.emit).parameters:
+
+    def _emit(logger, **fields):
+        logger.emit(context=get_current(), **fields)
+
+else:  # Older opentelemetry-sdk, where Logger.emit takes its own LogRecord
+    from opentelemetry.sdk._logs import LogRecord  # type: ignore[attr-defined]
+
+    def _emit(logger, **fields):
+        span_context = get_current_span().get_span_context()
+        logger.emit(
+            LogRecord(
+                trace_id=span_context.trace_id,
+                span_id=span_context.span_id,
+                trace_flags=span_context.trace_flags,
+                resource=logger.resource,
+                **fields,
+            )
+        )
+
+
+class OtelLogEmitter:
+    """
+    Emits stdlib records through ``logger_provider``, with the Scout
+    ``attributes`` and ``current_operation`` given for them. The records
+    themselves are left as they were.
+
+    When ``structured``, a record's message isn't formatted: the body is its
+    template, and its args and extras are typed attributes. Exceptions are
+    turned into attributes by ``tracebacks``.
+    """
+
+    def __init__(
+        self,
+        logger_provider,
+        structured: bool = False,
+        tracebacks: TracebackFormatter = DEFAULT_FORMATTER,
+    ):
+        self.logger_provider = logger_provider
+        self.structured = structured
+        self.tracebacks = tracebacks
+        self._loggers: Dict[str, Optional[Logger]] = {}
+        self._severities: Dict[Tuple[int, str], Tuple[SeverityNumber, str]] = {}
+
+    def emit(
+        self,
+        record: logging.LogRecord,
+        attributes: Optional[Mapping[str, Any]] = None,
+        current_operation: Optional[str] = None,
+    ):
+        try:
+            logger = self._loggers[record.name]
+        except KeyError:
+            logger = self.logger_provider.get_logger(record.name)
+            if isinstance(logger, NoOpLogger):
+                logger = None
+            self._loggers[record.name] = logger
+        if logger is None:
+            return
+
+        severity_key = (record.levelno, record.levelname)
+        severity = self._severities.get(severity_key)
+        if severity is None:
+            severity = self._severities[severity_key] = (
+                severity_number(record.levelno),
+                SEVERITY_TEXTS.get(record.levelname, record.levelname),
+            )
+
+        if self.structured:
+            template, record_attributes = structured_message(record)
+            body = template if record.args else record_body(record)
+        else:
+            record_attributes = extra_attributes(record)
+            body = record_body(record)
+        record_attributes[CODE_FILE_PATH] = record.pathname
+        record_attributes[CODE_FUNCTION_NAME] = record.funcName
+        record_attributes[CODE_LINE_NUMBER] = record.lineno
+        if attributes:
+            record_attributes.update(attributes)
+        if current_operation:
+            record_attributes["scout_current_operation"] = current_operation
+        record_attributes.update(exception_attributes(record, self.tracebacks))
+
+        _emit(
+            logger,
+            timestamp=int(record.created * 1e9),
+            observed_timestamp=time.time_ns(),
+            severity_number=severity[0],
+            severity_text=severity[1],
+            body=body,
+            attributes=record_attributes,
+        )
+
+    def flush(self):
+        pass
+
+    def close(self):
+        # The LoggerProvider is shut down on its own at exit.
+        self._loggers.clear()
@@ -0,0 +1,36 @@
+from typing import Dict, Optional
+
+
+class Transport:
+    GRPC = "grpc"
+    HTTP = "http"
+
+
+TRANSPORTS = (Transport.GRPC, Transport.HTTP)
+
+DEFAULT_ENDPOINTS = {
+    Transport.GRPC: "otlp.scoutotel.com:4317",
+    Transport.HTTP: "https://otlp.scoutotel.com:4318/v1/logs",
+}
+
+
+def create_log_exporter(
+    transport: str,
+    endpoint: str,
+    headers: Dict[str, str],
+    timeout: Optional[float] = None,
+    compression: Optional[str] = None,
+):
+    """
+    Create the OTLP log exporter for ``transport``. Each is imported only when
+    it's used, so the HTTP one never loads grpcio.
+    """
+    if transport == Transport.GRPC:
+        from scout_apm_logging.otlp_grpc import GrpcLogExporter
+
+        return GrpcLogExporter(endpoint, headers, timeout, compression)
+    if transport == Transport.HTTP:
+        from scout_apm_logging.otlp_http import HttpLogExporter
+
+        return HttpLogExporter(endpoint, headers, timeout, compression)
+    raise ValueError(f"Unknown transport: {transport}")
@@ -1 +1,11 @@
-from .operation_utils import get_operation_detail
+from .log_record import (
+    STANDARD_ATTRS,
+    QueuedRecord,
+    extra_attributes,
+    flatten_attributes,
+    interned,
+    structured_message,
+)
+from .operation_utils import OperationClassifier, get_operation_detail
+from .request_context import RequestContext
+from .tag_limits import TagLimits
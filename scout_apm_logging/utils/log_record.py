@@ -0,0 +1,216 @@
+import logging
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from scout_apm_logging.tracebacks import DEFAULT_FORMATTER, TracebackFormatter
+
+# Attributes every LogRecord has, and those formatting one adds.
+STANDARD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+_STANDARD_ATTR_COUNT = len(vars(logging.makeLogRecord({})))
+
+
+def extra_attributes(record: logging.LogRecord) -> Dict[str, Any]:
+    """
+    The attributes set on ``record`` beyond the standard ones, e.g. through
+    ``extra``. Most records have none, which is told from the number of their
+    attributes alone.
+    """
+    if isinstance(record, QueuedRecord):
+        return dict(record.extras) if record.extras else {}
+    record_vars = vars(record)
+    if len(record_vars) <= _STANDARD_ATTR_COUNT:
+        return {}
+    return {key: record_vars[key] for key in record_vars.keys() - STANDARD_ATTRS}
+
+
+def exception_attributes(
+    record: logging.LogRecord, tracebacks: TracebackFormatter = DEFAULT_FORMATTER
+) -> Dict[str, Any]:
+    """
+    The OTel exception attributes of the exception ``record`` was logged with,
+    if any. A QueuedRecord's were made when it was queued.
+    """
+    if isinstance(record, QueuedRecord):
+        return record.exception or {}
+    if record.exc_info and record.exc_info[0] is not None:
+        return tracebacks.attributes(record.exc_info)
+    return {}
+
+
+# Distinct strings kept by interned(), e.g. attribute keys and operation names.
+INTERN_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=INTERN_CACHE_SIZE)
+def interned(value: Optional[str]) -> Optional[str]:
+    """
+    The first of the strings equal to ``value`` that were seen lately, so
+    records that are kept around share one copy of the keys and values they
+    have in common. Unlike ``sys.intern``, only so many are kept.
+    """
+    return value
+
+
+class QueuedRecord:
+    """
+    The parts of a LogRecord that exporting it needs, for records that are
+    queued rather than exported straight away. It has no ``__dict__``, and
+    extras are only kept for records that have them, so a queue of them
+    takes a fraction of the memory of the LogRecords they stand for.
+
+    It's a snapshot of the record as it was logged, as QueueHandler makes:
+    the message is formatted straight away, so args changed afterwards, or
+    whose ``__str__`` needs the logging thread, are formatted as they were.
+    When ``structured``, the args and extras are kept as the attribute values
+    they're exported as instead, and the template as a string.
+
+    The exception is turned into its attributes by ``tracebacks`` straight
+    away too, and ``exc_info`` isn't kept: its traceback would keep every
+    frame, and their locals, alive for as long as the record is queued or
+    buffered. With ``tracebacks`` None the exception is left out.
+    """
+
+    # What's left of the record's exc_info once it's made into ``exception``.
+    exc_info = None
+
+    __slots__ = (
+        "name",
+        "msg",
+        "args",
+        "levelno",
+        "levelname",
+        "pathname",
+        "funcName",
+        "lineno",
+        "created",
+        "exception",
+        "extras",
+    )
+
+    def __init__(
+        self,
+        record: logging.LogRecord,
+        structured: bool = False,
+        tracebacks: Optional[TracebackFormatter] = DEFAULT_FORMATTER,
+    ):
+        self.name = record.name
+        self.levelno = record.levelno
+        self.levelname = record.levelname
+        self.pathname = record.pathname
+        self.funcName = record.funcName
+        self.lineno = record.lineno
+        self.created = record.created
+        self.exception: Optional[Dict[str, Any]] = None
+        if tracebacks is not None and record.exc_info and record.exc_info[0]:
+            self.exception = tracebacks.attributes(record.exc_info)
+        self.extras = extra_attributes(record) or None
+        if structured:
+            self.msg = str(record.msg) if record.args else record.msg
+            self.args = _snapshot_args(record.args)
+            if self.extras:
+                self.extras = _snapshot(self.extras)
+        elif record.args or isinstance(record.msg, str):
+            self.msg = record.getMessage()
+            self.args = None
+        else:
+            # Exported as it is, e.g. a dict as a map body.
+            self.msg = record.msg
+            self.args = None
+
+    def getMessage(self) -> str:
+        msg = str(self.msg)
+        if self.args:
+            msg = msg % self.args
+        return msg
+
+
+# Nested dicts deeper than this are sent as their string.
+MAX_FLATTEN_DEPTH = 4
+
+_PRIMITIVE_TYPES = (bool, str, int, float)
+
+
+def attribute_value(value: Any) -> Any:
+    """
+    ``value`` as an OTel attribute value: primitives and sequences of one
+    primitive type as they are, None as None, and anything else as a string.
+    """
+    if value is None or isinstance(value, _PRIMITIVE_TYPES):
+        return value
+    if isinstance(value, (list, tuple)):
+        types = {type(item) for item in value}
+        if len(types) <= 1 and types <= set(_PRIMITIVE_TYPES):
+            return tuple(value)
+    return str(value)
+
+
+def _snapshot(values: Mapping, depth: int = 0) -> Dict[Any, Any]:
+    # A copy of ``values`` as flatten_attributes reads it at ``depth``: the
+    # mappings it flattens are copied too, and the rest are attribute values.
+    return {
+        key: (
+            _snapshot(value, depth + 1)
+            if isinstance(value, Mapping) and depth < MAX_FLATTEN_DEPTH
+            else attribute_value(value)
+        )
+        for key, value in values.items()
+    }
+
+
+def _snapshot_args(args: Any) -> Any:
+    if not args:
+        return args
+    if isinstance(args, Mapping):
+        return _snapshot(args)
+    return tuple(_snapshot(dict(enumerate(args))).values())
+
+
+def flatten_attributes(
+    values: Mapping[str, Any], prefix: str = "", depth: int = 0
+) -> Dict[str, Any]:
+    """
+    ``values`` as typed attributes, with nested dicts flattened into dotted
+    keys, e.g. ``{"user": {"id": 5}}`` into ``{"user.id": 5}``. None values
+    are left out.
+    """
+    attributes: Dict[str, Any] = {}
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, Mapping) and depth < MAX_FLATTEN_DEPTH:
+            attributes.update(flatten_attributes(value, f"{name}.", depth + 1))
+            continue
+        value = attribute_value(value)
+        if value is not None:
+            attributes[name] = value
+    return attributes
+
+
+def arg_attributes(record: logging.LogRecord) -> Dict[str, Any]:
+    """
+    The record's ``args`` as typed ``scout_arg_<index>`` attributes, or
+    ``scout_arg_<key>`` for a mapping of them.
+    """
+    args = record.args
+    if not args:
+        return {}
+    if isinstance(args, Mapping):
+        return flatten_attributes(args, prefix="scout_arg_")
+    return flatten_attributes(
+        {str(index): value for index, value in enumerate(args)}, prefix="scout_arg_"
+    )
+
+
+def structured_message(record: logging.LogRecord) -> Tuple[str, Dict[str, Any]]:
+    """
+    The record's message template unformatted, and its args and extras as
+    typed attributes, for structured mode.
+    """
+    attributes = flatten_attributes(extra_attributes(record))
+    attributes.update(arg_attributes(record))
+    return str(record.msg), attributes
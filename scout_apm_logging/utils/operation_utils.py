@@ -1,9 +1,12 @@
-from typing import Optional
+import re
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Mapping, Optional
+
 from scout_apm.core.tracked_request import TrackedRequest
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class OperationDetail:
     name: str
     type: str
@@ -25,24 +28,72 @@ OPERATION_PREFIXES = {
     "Custom/": OperationType.CUSTOM,
 }
 
+# Operations classified by each classifier, keeping the most recently used.
+DEFAULT_CACHE_SIZE = 1024
+
+
+class OperationClassifier:
+    """
+    Finds the entrypoint of an operation from its prefix, e.g. "Controller/"
+    for a controller, with ``prefixes`` mapping any extra prefixes to their
+    entrypoint type. Where prefixes overlap the longest one wins.
+
+    The prefixes are compiled into one regex, and the detail for each
+    operation is cached, so the same OperationDetail is returned for it every
+    time.
+    """
+
+    def __init__(
+        self,
+        prefixes: Optional[Mapping[str, str]] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.prefixes = {**OPERATION_PREFIXES, **(prefixes or {})}
+        # Longest first, as the regex takes the first alternative that matches.
+        alternatives = sorted(self.prefixes, key=len, reverse=True)
+        self._match = re.compile("|".join(map(re.escape, alternatives))).match
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, operation: str) -> Optional[OperationDetail]:
+        match = self._match(operation)
+        if match is None:
+            return None
+        prefix = match.group()
+        return OperationDetail(
+            name=operation[len(prefix) :], type=self.prefixes[prefix]
+        )
+
+    def detail(
+        self,
+        record: TrackedRequest,
+        known: Optional[OperationDetail] = None,
+        scanned_spans: int = 0,
+    ) -> Optional[OperationDetail]:
+        """
+        The detail of a request's operation, or else of its latest span with
+        a known prefix.
+
+        ``known`` is the detail found when the request had ``scanned_spans``
+        complete spans, so only spans completed since are looked at.
+        """
+        # Check the operation attribute first
+        operation = getattr(record, "operation", None)
+        if operation:
+            return self.classify(operation)
+
+        # Fall back to checking spans
+        spans = getattr(record, "complete_spans", None) or []
+        classify = self.classify
+        for index in range(len(spans) - 1, scanned_spans - 1, -1):
+            result = classify(spans[index].operation)
+            if result:
+                return result
+
+        return known
+
+
+DEFAULT_CLASSIFIER = OperationClassifier()
+
 
 def get_operation_detail(record: TrackedRequest) -> Optional[OperationDetail]:
-    def extract_operation(operation: str) -> Optional[OperationDetail]:
-        for prefix, op_type in OPERATION_PREFIXES.items():
-            if operation.startswith(prefix):
-                return OperationDetail(name=operation[len(prefix) :], type=op_type)
-        return None
-
-    # Check the operation attribute first
-    operation = getattr(record, "operation", None)
-    if operation:
-        return extract_operation(operation)
-
-    # Fall back to checking spans
-    spans = getattr(record, "complete_spans", None) or []
-    for span in reversed(spans):
-        result = extract_operation(span.operation)
-        if result:
-            return result
-
-    return None
+    return DEFAULT_CLASSIFIER.detail(record)
@@ -0,0 +1,109 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from scout_apm.core.tracked_request import TrackedRequest
+
+from scout_apm_logging.utils.log_record import INTERN_CACHE_SIZE
+from scout_apm_logging.utils.operation_utils import (
+    DEFAULT_CLASSIFIER,
+    OperationClassifier,
+    OperationDetail,
+)
+from scout_apm_logging.utils.tag_limits import TagLimits
+
+
+@lru_cache(maxsize=INTERN_CACHE_SIZE)
+def tag_attribute(key: str) -> str:
+    # One string per tag key, however many requests and records have the tag.
+    return f"scout_tag_{key}"
+
+
+class RequestContext:
+    """
+    The Scout attributes attached to every record logged during a TrackedRequest.
+
+    Building them walks the request's spans and formats its timestamps, so a
+    context is kept for the request and only rebuilt once its operation, tags,
+    span count or end time change. A context rebuilt for the same request
+    only looks for its entrypoint in the spans completed since the last one.
+    ``tag_limits``, if given, are applied to the tags once for the request,
+    and again only if its tags change.
+    """
+
+    __slots__ = (
+        "request_id",
+        "operation",
+        "span_count",
+        "end_time",
+        "tags",
+        "limited_tags",
+        "operation_detail",
+        "attributes",
+    )
+
+    operation_detail: Optional[OperationDetail]
+
+    def __init__(
+        self,
+        scout_request: TrackedRequest,
+        classifier: OperationClassifier = DEFAULT_CLASSIFIER,
+        previous: Optional["RequestContext"] = None,
+        tag_limits: Optional[TagLimits] = None,
+    ):
+        self.request_id = scout_request.request_id
+        self.operation = scout_request.operation
+        self.span_count = len(scout_request.complete_spans)
+        self.end_time = scout_request.end_time
+        self.tags = dict(scout_request.tags)
+
+        if previous is not None and previous.request_id != self.request_id:
+            previous = None
+
+        if tag_limits is None:
+            self.limited_tags = self.tags
+        elif previous is not None and previous.tags == self.tags:
+            self.limited_tags = previous.limited_tags
+        else:
+            self.limited_tags = tag_limits.apply(self.tags)
+
+        if (
+            previous is not None
+            and not previous.operation
+            and previous.span_count <= self.span_count
+        ):
+            self.operation_detail = classifier.detail(
+                scout_request, previous.operation_detail, previous.span_count
+            )
+        else:
+            self.operation_detail = classifier.detail(scout_request)
+        self.attributes = self._build_attributes(scout_request)
+
+    def matches(self, scout_request: TrackedRequest) -> bool:
+        return (
+            self.request_id == scout_request.request_id
+            and self.operation == scout_request.operation
+            and self.span_count == len(scout_request.complete_spans)
+            and self.end_time == scout_request.end_time
+            and self.tags == scout_request.tags
+        )
+
+    def _build_attributes(self, scout_request: TrackedRequest) -> Dict[str, Any]:
+        attributes: Dict[str, Any] = {}
+
+        operation_detail = self.operation_detail
+        if operation_detail:
+            attributes[operation_detail.entrypoint_attribute] = operation_detail.name
+
+        attributes["scout_transaction_id"] = scout_request.request_id
+        attributes["scout_start_time"] = scout_request.start_time.isoformat()
+        # Add duration if the request is completed
+        if scout_request.end_time:
+            attributes["scout_end_time"] = scout_request.end_time.isoformat()
+            attributes["scout_duration"] = (
+                scout_request.end_time - scout_request.start_time
+            ).total_seconds()
+
+        for key, value in self.limited_tags.items():
+            attributes[tag_attribute(key)] = value
+
+        return attributes
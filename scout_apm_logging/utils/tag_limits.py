@@ -0,0 +1,84 @@
+import fnmatch
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+from scout_apm_logging.utils.log_record import attribute_value
+
+# Put at the end of tag values cut to max_value_length.
+TRUNCATED = "..."
+
+
+def _matcher(patterns: Optional[Iterable[str]]) -> Optional[Callable[[str], Any]]:
+    # One regex for all of the glob patterns, e.g. "http.*".
+    if patterns is None:
+        return None
+    if isinstance(patterns, str):
+        patterns = (patterns,)
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns)).match
+
+
+class TagLimits:
+    """
+    Limits on the TrackedRequest tags that are added to records: only keys
+    matching one of the ``allow`` patterns (if given) and none of the ``deny``
+    patterns, at most ``max_tags`` of them in the order they were set, and
+    values cut to ``max_value_length`` characters. Numbers and booleans are
+    kept as they are; anything else is measured by the text it's exported
+    as, and cut to a string if that's too long.
+
+    The limits are applied when a request's attributes are built, not for
+    each record. ``dropped_tags`` and ``truncated_values`` count what they
+    left out each time.
+    """
+
+    def __init__(
+        self,
+        max_tags: Optional[int] = None,
+        max_value_length: Optional[int] = None,
+        allow: Optional[Iterable[str]] = None,
+        deny: Optional[Iterable[str]] = None,
+    ):
+        self.max_tags = max_tags
+        self.max_value_length = max_value_length
+        self._allowed = _matcher(allow)
+        self._denied = _matcher(deny)
+        self.dropped_tags = 0
+        self.truncated_values = 0
+        self._count_lock = threading.Lock()
+
+    def apply(self, tags: Mapping[Any, Any]) -> Dict[Any, Any]:
+        limited: Dict[Any, Any] = {}
+        dropped = truncated = 0
+        for key, value in tags.items():
+            name = str(key)
+            if (
+                (self._allowed is not None and not self._allowed(name))
+                or (self._denied is not None and self._denied(name))
+                or (self.max_tags is not None and len(limited) >= self.max_tags)
+            ):
+                dropped += 1
+                continue
+            if self.max_value_length is not None:
+                # Lists, dicts, bytes and the like are exported as their
+                # text, so it's the text that's measured and cut.
+                value = attribute_value(value)
+                if isinstance(value, (str, tuple)):
+                    text = str(value)
+                    if len(text) > self.max_value_length:
+                        value = self._cut(text)
+                        truncated += 1
+            limited[key] = value
+        if dropped or truncated:
+            with self._count_lock:
+                self.dropped_tags += dropped
+                self.truncated_values += truncated
+        return limited
+
+    def _cut(self, value: str) -> str:
+        # The marker only fits if there's room for it; below that the value
+        # is cut short without one, so it's never over max_value_length.
+        length = self.max_value_length or 0
+        if length <= len(TRUNCATED):
+            return value[:length]
+        return value[: length - len(TRUNCATED)] + TRUNCATED
@@ -0,0 +1,173 @@
+"""
+Stand-in OTLP logs collectors, over gRPC and HTTP, for tests and benchmarks.
+"""
+
+import gzip
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import grpc
+from opentelemetry.proto.collector.logs.v1 import (
+    logs_service_pb2,
+    logs_service_pb2_grpc,
+)
+
+
+class CollectedRecords:
+    """What a stand-in collector has received so far."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.available = True
+        self.export_calls = 0
+        self.bytes_received = 0
+        self.records: list = []
+        # The resource each record was exported with.
+        self.resources: list = []
+        self._lock = threading.Lock()
+        self.port = None
+
+    def receive(self, request):
+        with self._lock:
+            self.export_calls += 1
+            self.bytes_received += request.ByteSize()
+            for resource_logs in request.resource_logs:
+                resource = resource_logs.resource
+                for scope_logs in resource_logs.scope_logs:
+                    self.records.extend(scope_logs.log_records)
+                    self.resources.extend([resource] * len(scope_logs.log_records))
+
+    def wait_for_records(self, count: int, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if len(self.records) >= count:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class StandInCollector(CollectedRecords, logs_service_pb2_grpc.LogsServiceServicer):
+    """
+    Accepts log exports over gRPC on a local port and keeps count of what
+    arrived.
+
+    ``delay`` slows every export down, and ``available`` can be switched off
+    to answer exports with UNAVAILABLE as an unreachable endpoint would.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(delay)
+        self._server = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://localhost:{self.port}"
+
+    def start(self):
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        logs_service_pb2_grpc.add_LogsServiceServicer_to_server(self, self._server)
+        self.port = self._server.add_insecure_port("localhost:0")
+        self._server.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.stop(grace=None)
+            self._server = None
+
+    def Export(self, request, context):
+        if self.delay:
+            time.sleep(self.delay)
+        if not self.available:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "collector unavailable")
+
+        self.receive(request)
+        return logs_service_pb2.ExportLogsServiceResponse()
+
+
+class StandInHTTPCollector(CollectedRecords):
+    """
+    Accepts log exports over OTLP/HTTP on a local port, the same way
+    StandInCollector does over gRPC. When not ``available`` it answers 503.
+    ``connections`` counts the connections clients opened.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(delay)
+        self.connections = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://localhost:{self.port}/v1/logs"
+
+    def start(self):
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                collector.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if collector.delay:
+                    time.sleep(collector.delay)
+                if not collector.available:
+                    self.respond(503)
+                    return
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                collector.receive(
+                    logs_service_pb2.ExportLogsServiceRequest.FromString(body)
+                )
+                self.respond(200)
+
+            def respond(self, status):
+                response = b""
+                if status == 200:
+                    response = (
+                        logs_service_pb2.ExportLogsServiceResponse().SerializeToString()
+                    )
+                self.send_response(status)
+                self.send_header("Content-Type", "application/x-protobuf")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("localhost", 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def attributes(log_record) -> dict:
+    """The attributes of an exported log record, or resource, as a plain dict."""
+    return {
+        attribute.key: getattr(
+            attribute.value, attribute.value.WhichOneof("value") or "string_value"
+        )
+        for attribute in log_record.attributes
+    }
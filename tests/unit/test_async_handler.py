@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import statistics
+import time
+from unittest.mock import patch
+
+import pytest
+from scout_apm.core.tracked_request import TrackedRequest
+
+from scout_apm_logging.async_handler import AsyncScoutOtelHandler, ContextLocal
+from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.log_queue import OverflowPolicy
+from scout_apm_logging.utils.request_context import RequestContext
+from tests.collector import StandInCollector
+
+RECORDS_PER_SECOND = 10_000
+SECONDS = 1.0
+
+
+def make_record(i):
+    return logging.makeLogRecord(
+        {
+            "name": "test.async",
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+            "msg": "record %s",
+            "args": (i,),
+        }
+    )
+
+
+def test_context_local_is_per_task():
+    local = ContextLocal("test")
+
+    async def set_and_read(value):
+        assert getattr(local, "value", None) is None
+        local.value = value
+        await asyncio.sleep(0)
+        return local.value
+
+    async def main():
+        return await asyncio.gather(set_and_read(1), set_and_read(2))
+
+    assert asyncio.run(main()) == [1, 2]
+    assert getattr(local, "value", None) is None
+
+
+def test_block_overflow_policy_is_refused():
+    with pytest.raises(ValueError):
+        AsyncScoutOtelHandler(
+            service_name="test-service", overflow_policy=OverflowPolicy.BLOCK
+        )
+
+
+@patch("scout_apm_logging.handler.RequestContext", wraps=RequestContext)
+def test_request_context_is_kept_per_task(mock_request_context):
+    handler = AsyncScoutOtelHandler(service_name="test-service")
+
+    async def log(name):
+        request = TrackedRequest.instance()
+        request.tag("task", name)
+        for i in range(3):
+            handler.emit(make_record(i))
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(log("a"), log("b"))
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        asyncio.run(main())
+        handler.flush()
+
+    assert mock_request_context.call_count == 2
+    tags = [
+        call.args[1]["scout_tag_task"] for call in mock_otel_handler.emit.mock_calls
+    ]
+    assert sorted(tags) == ["a"] * 3 + ["b"] * 3
+
+
+def test_event_loop_lag_under_load(monkeypatch):
+    records = int(RECORDS_PER_SECOND * SECONDS)
+    monkeypatch.setenv("OTEL_BLRP_SCHEDULE_DELAY", "100")
+    monkeypatch.setenv("OTEL_BLRP_MAX_QUEUE_SIZE", str(records))
+    ScoutOtelHandler.otel_handler = None
+
+    async def monitor_lag(lags, stop):
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def log(emit):
+        # 10 records every millisecond
+        start = time.perf_counter()
+        for i in range(0, records, 10):
+            for j in range(i, i + 10):
+                emit(make_record(j))
+            delay = start + (i + 10) / RECORDS_PER_SECOND - time.perf_counter()
+            await asyncio.sleep(max(delay, 0))
+
+    async def main(emit):
+        lags = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(monitor_lag(lags, stop))
+        await log(emit)
+        stop.set()
+        await monitor
+        return statistics.quantiles(lags, n=100)
+
+    # The same loop without logging, for how late this machine's timers fire
+    # anyway.
+    baseline = asyncio.run(main(lambda record: None))
+
+    with (
+        StandInCollector() as collector,
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+    ):
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_reporting_endpoint": collector.endpoint,
+        }.get
+        handler = AsyncScoutOtelHandler(service_name="test-service", queue_size=records)
+        quantiles = asyncio.run(main(handler.emit))
+        handler.flush()
+        provider = ScoutOtelHandler._logger_provider
+        provider.force_flush()
+        assert collector.wait_for_records(records)
+
+    ScoutOtelHandler.otel_handler = None
+    provider.shutdown()
+
+    assert handler.log_queue.dropped == 0
+    # The loop only queues records, so it keeps up with its own timers about
+    # as well as it does without logging. The bounds are relative, with room
+    # for noise, as a busy CI machine makes both runs late.
+    assert quantiles[49] < baseline[49] * 2 + 0.005
+    assert quantiles[98] < baseline[98] * 2 + 0.05
@@ -0,0 +1,190 @@
+import logging
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+from scout_apm_logging.dedup import LogDeduplicator
+from scout_apm_logging.utils.log_record import QueuedRecord
+
+
+def make_record(created, msg="Connection refused to %s", args=("db",), **kwargs):
+    record = logging.LogRecord(
+        name=kwargs.get("name", "app"),
+        level=kwargs.get("level", logging.WARNING),
+        pathname="",
+        lineno=0,
+        msg=msg,
+        args=args,
+        exc_info=kwargs.get("exc_info"),
+    )
+    record.created = created
+    return record
+
+
+def test_repeats_are_counted():
+    deduplicator = LogDeduplicator(window=10)
+
+    assert deduplicator.keep(make_record(100.0))
+    repeat = make_record(101.0)
+    assert not deduplicator.keep(repeat)
+    assert not deduplicator.keep(make_record(102.5))
+
+    assert deduplicator.pop_summaries(105.0) == []
+    [(summary, attributes, current_operation)] = deduplicator.pop_summaries(113.0)
+    assert isinstance(summary, QueuedRecord)
+    assert summary.msg == "Connection refused to db"
+    assert summary.created == 102.5
+    assert attributes == {
+        "scout_repeat_count": 2,
+        "scout_first_seen": "1970-01-01T00:01:40+00:00",
+        "scout_last_seen": "1970-01-01T00:01:42.500000+00:00",
+    }
+    assert current_operation is None
+    # The logged records are left as they were.
+    assert not hasattr(repeat, "scout_repeat_count")
+    assert deduplicator.pop_summaries(200.0) == []
+
+
+def test_summary_context():
+    deduplicator = LogDeduplicator(window=10)
+    context = MagicMock(return_value=({"scout_transaction_id": "req-1"}, "SQL/Query"))
+
+    assert deduplicator.keep(make_record(100.0), context=context)
+    assert not deduplicator.keep(make_record(101.0), context=context)
+    assert not deduplicator.keep(make_record(102.0), context=context)
+
+    # Only taken for the first repeat.
+    context.assert_called_once_with()
+    [(summary, attributes, current_operation)] = deduplicator.pop_summaries(200.0)
+    assert attributes["scout_transaction_id"] == "req-1"
+    assert attributes["scout_repeat_count"] == 2
+    assert current_operation == "SQL/Query"
+
+
+def test_flush_while_first_repeat_is_taken():
+    deduplicator = LogDeduplicator(window=10)
+    summaries = []
+    flusher = threading.Thread(
+        target=lambda: summaries.extend(deduplicator.pop_summaries(0, flush=True))
+    )
+
+    def context():
+        # A flush from another thread while the summary is being made.
+        flusher.start()
+        flusher.join(timeout=0.1)
+        return {"scout_transaction_id": "req-1"}, None
+
+    assert deduplicator.keep(make_record(100.0))
+    assert not deduplicator.keep(make_record(101.0), context=context)
+    flusher.join()
+
+    # It waited for the summary, rather than finding none and dropping the count.
+    [(summary, attributes, _)] = summaries
+    assert summary.msg == "Connection refused to db"
+    assert attributes["scout_repeat_count"] == 1
+    assert attributes["scout_transaction_id"] == "req-1"
+
+
+def test_summary_drops_traceback():
+    deduplicator = LogDeduplicator(window=10)
+    try:
+        raise ValueError("Bad value")
+    except ValueError:
+        exc_info = sys.exc_info()
+
+    deduplicator.keep(make_record(100.0, exc_info=exc_info))
+    deduplicator.keep(make_record(101.0, exc_info=exc_info))
+
+    [(summary, attributes, _)] = deduplicator.pop_summaries(200.0)
+    assert summary.exc_info is None
+    assert attributes["exception.type"] == "ValueError"
+    assert attributes["exception.message"] == "Bad value"
+
+
+def test_record_without_repeats_has_no_summary():
+    deduplicator = LogDeduplicator(window=10)
+
+    assert deduplicator.keep(make_record(100.0))
+
+    assert deduplicator.pop_summaries(200.0) == []
+
+
+def test_different_records_are_kept():
+    deduplicator = LogDeduplicator(window=10)
+
+    assert deduplicator.keep(make_record(100.0))
+    assert deduplicator.keep(make_record(100.0, args=("cache",)))
+    assert deduplicator.keep(make_record(100.0, msg="Other %s"))
+    assert deduplicator.keep(make_record(100.0, name="other"))
+    assert deduplicator.keep(make_record(100.0, level=logging.ERROR))
+    assert deduplicator.keep(make_record(100.0), operation="Controller/foo")
+    assert not deduplicator.keep(make_record(100.0), operation="Controller/foo")
+
+
+def test_unhashable_args():
+    deduplicator = LogDeduplicator(window=10)
+
+    assert deduplicator.keep(make_record(100.0, msg="%(a)s", args=({"a": [1]},)))
+    assert not deduplicator.keep(make_record(100.0, msg="%(a)s", args=({"a": [1]},)))
+    assert deduplicator.keep(make_record(100.0, msg="%(a)s", args=({"a": [2]},)))
+
+
+def test_new_window_after_expiry():
+    deduplicator = LogDeduplicator(window=10)
+    deduplicator.keep(make_record(100.0))
+    # Repeated often enough that it's never idle for a whole window
+    for created in range(101, 110):
+        assert not deduplicator.keep(make_record(float(created)))
+
+    assert deduplicator.keep(make_record(110.0))
+
+    [(summary, attributes, _)] = deduplicator.pop_summaries(110.0)
+    assert attributes["scout_repeat_count"] == 9
+    assert summary.created == 109.0
+
+
+def test_max_keys_evicts_least_recently_seen():
+    deduplicator = LogDeduplicator(window=10, max_keys=2)
+    deduplicator.keep(make_record(100.0, args=("a",)))
+    deduplicator.keep(make_record(100.0, args=("b",)))
+    deduplicator.keep(make_record(101.0, args=("a",)))
+    deduplicator.keep(make_record(101.0, args=("b",)))
+    deduplicator.keep(make_record(102.0, args=("a",)))
+
+    # "b" was seen least recently, so it makes room for "c"
+    assert deduplicator.keep(make_record(102.0, args=("c",)))
+
+    [(summary, attributes, _)] = deduplicator.pop_summaries(102.0)
+    assert summary.msg == "Connection refused to b"
+    assert attributes["scout_repeat_count"] == 1
+
+
+def test_flush_reports_everything():
+    deduplicator = LogDeduplicator(window=10)
+    deduplicator.keep(make_record(100.0))
+    deduplicator.keep(make_record(100.5))
+
+    [(_, attributes, _)] = deduplicator.pop_summaries(101.0, flush=True)
+    assert attributes["scout_repeat_count"] == 1
+
+
+def test_flusher_reports_without_further_records():
+    reported = threading.Event()
+    summaries = []
+
+    def report(summary):
+        summaries.append(summary)
+        reported.set()
+
+    deduplicator = LogDeduplicator(window=0.1, report=report)
+    now = time.time()
+    assert deduplicator.keep(make_record(now))
+    assert not deduplicator.keep(make_record(now))
+
+    # Nothing else is logged, the flusher reports the window once it's over.
+    assert reported.wait(timeout=5)
+    [(summary, attributes, _)] = summaries
+    assert summary.msg == "Connection refused to db"
+    assert attributes["scout_repeat_count"] == 1
+    assert deduplicator.pop_summaries(now + 1) == []
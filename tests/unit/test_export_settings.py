@@ -0,0 +1,54 @@
+import pytest
+
+from scout_apm_logging.export_settings import ExportPreset, ExportSettings
+
+
+def test_defaults_are_left_to_the_sdk():
+    settings = ExportSettings()
+
+    assert settings.processor_kwargs() == {}
+    assert settings.exporter_kwargs() == {}
+
+
+def test_preset():
+    settings = ExportSettings(preset=ExportPreset.HIGH_THROUGHPUT)
+
+    assert settings.processor_kwargs() == {
+        "max_export_batch_size": 2048,
+        "max_queue_size": 32768,
+        "schedule_delay_millis": 5000.0,
+        "export_timeout_millis": 30000.0,
+    }
+    assert settings.exporter_kwargs() == {
+        "timeout": 30.0,
+        "compression": "gzip",
+    }
+
+
+def test_settings_override_preset():
+    settings = ExportSettings(
+        preset=ExportPreset.LOW_LATENCY, batch_size="64", compression="GZIP"
+    )
+
+    assert settings.batch_size == 64
+    assert settings.schedule_delay == 200
+    assert settings.exporter_kwargs()["compression"] == "gzip"
+
+
+def test_unknown_preset():
+    with pytest.raises(ValueError, match="Unknown export preset: fast"):
+        ExportSettings(preset="fast")
+
+
+def test_unknown_compression():
+    with pytest.raises(ValueError, match="Unknown compression: zstd"):
+        ExportSettings(compression="zstd")
+
+
+def test_batch_size_over_max_queue_size():
+    with pytest.raises(ValueError, match="batch_size .* max_queue_size"):
+        ExportSettings(batch_size=4096, max_queue_size=1024)
+    # Including the preset's.
+    with pytest.raises(ValueError, match=r"\(2048, logs_max_queue_size\)"):
+        ExportSettings(preset="low-latency", batch_size=4096)
+    assert ExportSettings(batch_size=1024, max_queue_size=1024).batch_size == 1024
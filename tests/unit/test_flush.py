@@ -0,0 +1,96 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from scout_apm_logging.compat import LogRecordExportResult
+from scout_apm_logging.flush import (
+    ExportPipeline,
+    FlushResult,
+    deadline_after,
+    run_until,
+)
+from scout_apm_logging.flush_exporter import CountingLogExporter
+
+
+def test_flush_result_repr():
+    assert repr(FlushResult(3, 1)) == "FlushResult(flushed=3, abandoned=1)"
+
+
+def test_run_until_runs_calls_in_parallel():
+    started = time.monotonic()
+    calls = [lambda: time.sleep(0.2) for _ in range(5)]
+
+    assert run_until(calls, deadline_after(2))
+    assert time.monotonic() - started < 0.6
+
+
+def test_run_until_gives_up_at_deadline():
+    release = threading.Event()
+    on_thread_start = MagicMock()
+    started = time.monotonic()
+
+    assert not run_until(
+        [release.wait, lambda: None],
+        deadline_after(0.1),
+        on_thread_start=on_thread_start,
+    )
+    assert time.monotonic() - started < 0.5
+    assert on_thread_start.call_count == 2
+    release.set()
+
+
+@pytest.mark.parametrize(
+    "result, exported, failed",
+    [(LogRecordExportResult.SUCCESS, 3, 0), (LogRecordExportResult.FAILURE, 0, 3)],
+)
+def test_counting_exporter(result, exported, failed):
+    inner = MagicMock()
+    inner.export.return_value = result
+    exporter = CountingLogExporter(inner)
+
+    assert exporter.export([1, 2, 3]) == result
+    assert exporter.exported == exported
+    assert exporter.failed == failed
+    assert exporter.in_flight == 0
+
+
+def test_counting_exporter_counts_batches_in_flight():
+    release = threading.Event()
+    inner = MagicMock()
+    inner.export.side_effect = lambda batch: (
+        release.wait(),
+        LogRecordExportResult.SUCCESS,
+    )[1]
+    exporter = CountingLogExporter(inner)
+    thread = threading.Thread(target=exporter.export, args=([1, 2],))
+    thread.start()
+    while not inner.export.called:
+        time.sleep(0.001)
+
+    assert exporter.in_flight == 2
+    release.set()
+    thread.join()
+    assert exporter.in_flight == 0
+    assert exporter.exported == 2
+
+
+def test_counting_exporter_counts_exceptions_as_failed():
+    inner = MagicMock()
+    inner.export.side_effect = RuntimeError
+    exporter = CountingLogExporter(inner)
+
+    with pytest.raises(RuntimeError):
+        exporter.export([1])
+    assert exporter.failed == 1
+    assert exporter.in_flight == 0
+
+
+def test_pipeline_pending():
+    exporter = CountingLogExporter(MagicMock())
+    exporter.in_flight = 2
+    processor = MagicMock()
+    processor._batch_processor._queue = [1, 2, 3]
+
+    assert ExportPipeline(MagicMock(), processor, exporter).pending() == 5
@@ -0,0 +1,25 @@
+import gc
+import weakref
+from unittest.mock import MagicMock
+
+from scout_apm_logging import fork
+
+
+def test_reset_after_fork():
+    obj = MagicMock()
+    fork.reset_after_fork(obj)
+
+    fork._reset_all()
+
+    obj._reset_after_fork.assert_called_once_with()
+
+
+def test_reset_after_fork_holds_weakly():
+    obj = MagicMock()
+    fork.reset_after_fork(obj)
+    ref = weakref.ref(obj)
+
+    del obj
+    gc.collect()
+
+    assert ref() is None
@@ -0,0 +1,231 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from scout_apm_logging.compat import LogRecordExportResult
+from scout_apm_logging.green import (
+    RealThread,
+    RealThreadQueue,
+    thread_class,
+    threading_patched,
+)
+from scout_apm_logging.green_exporter import BatchingLogExporter
+from scout_apm_logging.log_queue import OverflowPolicy
+from tests.collector import StandInCollector
+
+RECORDS = 2_000
+
+# Logs from request greenlets of a gevent-patched process, while a monitor
+# greenlet measures how late its timers fire, and prints what it saw.
+GEVENT_APP = f"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import json
+import logging
+import time
+
+import gevent
+
+from scout_apm_logging.green import threading_patched
+from scout_apm_logging.handler import ScoutOtelHandler
+
+lags = []
+
+
+def monitor():
+    while True:
+        start = time.perf_counter()
+        gevent.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+def request(index):
+    for i in range({RECORDS} // 10):
+        handler.emit(
+            logging.makeLogRecord(
+                {{"name": "app", "msg": f"request {{index}} step {{i}}", "levelno": 20}}
+            )
+        )
+        gevent.sleep(0.005)
+
+
+handler = ScoutOtelHandler(service_name="gevent-app", batch_size=256)
+watcher = gevent.spawn(monitor)
+gevent.joinall([gevent.spawn(request, index) for index in range(10)])
+result = handler.flush(timeout=10)
+watcher.kill()
+lags.sort()
+print(
+    json.dumps(
+        {{
+            "patched": threading_patched(),
+            "real_thread_export": handler.real_thread_export,
+            "abandoned": result.abandoned,
+            "p99_lag": lags[int(len(lags) * 0.99)],
+        }}
+    )
+)
+"""
+
+
+def test_not_patched():
+    assert not threading_patched()
+    assert thread_class() is threading.Thread
+
+
+def test_real_thread():
+    release = threading.Event()
+    thread = RealThread(target=release.wait, args=(5,), name="ignored", daemon=True)
+    assert not thread.is_alive()
+
+    thread.start()
+    thread.join(0.05)
+    assert thread.is_alive()
+
+    release.set()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_queue_consumes_and_ticks():
+    consumed = []
+    on_tick = MagicMock()
+    on_worker_start = MagicMock()
+    log_queue = RealThreadQueue(
+        consumed.append, tick=0.01, on_tick=on_tick, on_worker_start=on_worker_start
+    )
+
+    for i in range(5):
+        assert log_queue.put(i)
+    assert log_queue.flush(timeout=5)
+    assert consumed == [0, 1, 2, 3, 4]
+    assert len(log_queue) == 0
+
+    # Ticks carry on while there's nothing to consume.
+    time.sleep(0.1)
+    assert on_tick.call_count > 1
+    on_worker_start.assert_called_once_with()
+
+
+def test_queue_unsupported_overflow_policy():
+    with pytest.raises(ValueError, match="Unsupported overflow policy: block"):
+        RealThreadQueue(lambda item: None, overflow_policy=OverflowPolicy.BLOCK)
+
+
+@pytest.mark.parametrize(
+    "overflow_policy, consumed",
+    [
+        (OverflowPolicy.DROP_NEWEST, [0, 1, 2]),
+        (OverflowPolicy.DROP_OLDEST, [2, 3, 4]),
+    ],
+)
+def test_queue_overflow(overflow_policy, consumed):
+    release = threading.Event()
+    items = []
+
+    def consume(item):
+        release.wait(5)
+        items.append(item)
+
+    log_queue = RealThreadQueue(consume, maxsize=3, overflow_policy=overflow_policy)
+    # Nothing's consumed until the worker has started.
+    log_queue._start_worker()
+    for i in range(5):
+        log_queue.put(i)
+
+    assert log_queue.dropped == 2
+    assert not log_queue.flush(timeout=0.05)
+    release.set()
+    assert log_queue.flush(timeout=5)
+    assert items == consumed
+
+
+def test_queue_counts_failed_items():
+    def consume(item):
+        raise RuntimeError("Conversion failed")
+
+    log_queue = RealThreadQueue(consume)
+    log_queue.put(1)
+
+    assert log_queue.flush(timeout=5)
+    assert log_queue.dropped == 1
+
+
+def test_batching_exporter_sends_full_batches():
+    inner = MagicMock()
+    exporter = BatchingLogExporter(
+        inner, max_export_batch_size=2, schedule_delay_millis=60000
+    )
+
+    assert exporter.export([1, 2, 3]) == LogRecordExportResult.SUCCESS
+    inner.export.assert_called_once_with([1, 2])
+    assert len(exporter) == 1
+
+    # Not due until the schedule delay is up.
+    exporter.send_due()
+    assert inner.export.call_count == 1
+
+    exporter.schedule_delay = 0
+    exporter.send_due()
+    inner.export.assert_called_with([3])
+    assert len(exporter) == 0
+
+
+def test_batching_exporter_drops_beyond_max_queue_size():
+    inner = MagicMock()
+    exporter = BatchingLogExporter(
+        inner, max_export_batch_size=10, max_queue_size=3, schedule_delay_millis=0
+    )
+
+    assert exporter.export([1, 2]) == LogRecordExportResult.SUCCESS
+    assert exporter.export([3, 4]) == LogRecordExportResult.FAILURE
+    assert exporter.dropped == 2
+
+    exporter.shutdown()
+    inner.export.assert_called_once_with([1, 2])
+    inner.shutdown.assert_called_once_with()
+
+
+def test_batching_exporter_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("OTEL_BLRP_MAX_EXPORT_BATCH_SIZE", "64")
+    monkeypatch.setenv("OTEL_BLRP_SCHEDULE_DELAY", "250")
+    exporter = BatchingLogExporter(MagicMock(), max_queue_size=100)
+
+    assert exporter.max_export_batch_size == 64
+    assert exporter.max_queue_size == 100
+    assert exporter.schedule_delay == 0.25
+
+
+def test_gevent_app_keeps_its_timers():
+    pytest.importorskip("gevent")
+
+    with StandInCollector(delay=0.05) as collector:
+        env = dict(
+            os.environ,
+            SCOUT_LOGS_INGEST_KEY="test-ingest-key",
+            SCOUT_LOGS_REPORTING_ENDPOINT=collector.endpoint,
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", GEVENT_APP],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=60,
+        )
+        seen = json.loads(result.stdout)
+
+        assert seen["patched"]
+        assert seen["real_thread_export"]
+        assert seen["abandoned"] == 0
+        assert len(collector.records) == RECORDS
+        # Export happens off the hub, so greenlets' timers fire about on time.
+        assert seen["p99_lag"] < 0.03
@@ -1,11 +1,23 @@
 import io
 import logging
-from unittest.mock import MagicMock, patch
+import multiprocessing
+import sys
+import threading
+import time
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
-from scout_apm.core.tracked_request import Span
+from scout_apm.core.tracked_request import Span, TrackedRequest
 
+from scout_apm_logging.green import RealThreadQueue
 from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.log_queue import OverflowPolicy
+from scout_apm_logging.routing import RoutingEmitter
+from scout_apm_logging.tracebacks import DEFAULT_FORMATTER
+from scout_apm_logging.utils.log_record import QueuedRecord
+from scout_apm_logging.utils.request_context import RequestContext
+from tests.collector import StandInCollector, StandInHTTPCollector
+from tests.collector import attributes as exported_attributes
 
 
 @pytest.fixture
@@ -15,12 +27,12 @@ def otel_scout_handler():
 
     with (
         patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
-        patch("scout_apm_logging.handler.OTLPLogExporter"),
-        patch("scout_apm_logging.handler.LoggerProvider"),
-        patch("scout_apm_logging.handler.BatchLogRecordProcessor"),
-        patch("scout_apm_logging.handler.Resource"),
+        patch("scout_apm_logging.handler.create_log_exporter"),
+        patch("opentelemetry.sdk._logs.LoggerProvider"),
+        patch("opentelemetry.sdk._logs.export.BatchLogRecordProcessor"),
+        patch("opentelemetry.sdk.resources.Resource"),
     ):
-        mock_scout_config.value.return_value = "test-ingest-key"
+        mock_scout_config.value.side_effect = {"logs_ingest_key": "test-ingest-key"}.get
         handler = ScoutOtelHandler(service_name="test-service")
         # Force initialization
         handler._initialize()
@@ -60,11 +72,15 @@ def test_emit_with_scout_request(mock_tracked_request, otel_scout_handler):
         otel_scout_handler.emit(record)
 
         mock_otel_handler.emit.assert_called_once()
-        assert record.scout_transaction_id == "test-id"
-        assert record.scout_start_time == "2024-03-06T12:00:00"
-        assert record.scout_end_time == "2024-03-06T12:00:01"
-        assert record.scout_tag_key == "value"
-        assert record.controller_entrypoint == "foobar"
+        emitted_record, attributes, _ = mock_otel_handler.emit.call_args.args
+        assert emitted_record is record
+        assert attributes["scout_transaction_id"] == "test-id"
+        assert attributes["scout_start_time"] == "2024-03-06T12:00:00"
+        assert attributes["scout_end_time"] == "2024-03-06T12:00:01"
+        assert attributes["scout_tag_key"] == "value"
+        assert attributes["controller_entrypoint"] == "foobar"
+        # The caller's record is left alone
+        assert not hasattr(record, "scout_transaction_id")
 
 
 @patch("scout_apm_logging.handler.TrackedRequest")
@@ -95,11 +111,33 @@ def test_emit_when_scout_request_contains_operation(
         otel_scout_handler.emit(record)
 
     mock_otel_handler.emit.assert_called_once()
-    assert record.scout_transaction_id == "test-id"
-    assert record.scout_start_time == "2024-03-06T12:00:00"
-    assert record.scout_end_time == "2024-03-06T12:00:01"
-    assert record.scout_tag_key == "value"
-    assert record.controller_entrypoint == "foobar"
+    _, attributes, _ = mock_otel_handler.emit.call_args.args
+    assert attributes["scout_transaction_id"] == "test-id"
+    assert attributes["scout_start_time"] == "2024-03-06T12:00:00"
+    assert attributes["scout_end_time"] == "2024-03-06T12:00:01"
+    assert attributes["scout_tag_key"] == "value"
+    assert attributes["controller_entrypoint"] == "foobar"
+    # It's on the resource instead.
+    assert "service.name" not in attributes
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_with_operation_prefixes(mock_tracked_request):
+    handler = ScoutOtelHandler(
+        service_name="test-service", operation_prefixes={"Task/": "task"}
+    )
+    mock_request = MagicMock()
+    mock_request.request_id = "test-id"
+    mock_request.tags = {}
+    mock_request.complete_spans = []
+    mock_request.operation = "Task/send_email"
+    mock_tracked_request.instance.return_value = mock_request
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        handler.emit(logging.makeLogRecord({"msg": "Test message"}))
+
+    _, attributes, _ = mock_otel_handler.emit.call_args.args
+    assert attributes["task_entrypoint"] == "send_email"
 
 
 @patch("scout_apm_logging.handler.TrackedRequest")
@@ -117,8 +155,7 @@ def test_emit_without_scout_request(mock_tracked_request, otel_scout_handler):
         )
         otel_scout_handler.emit(record)
 
-        mock_otel_handler.emit.assert_called_once()
-        assert not hasattr(record, "scout_transaction_id")
+        mock_otel_handler.emit.assert_called_once_with(record, None, None)
 
 
 def test_emit_already_handling_log(otel_scout_handler):
@@ -233,3 +270,1123 @@ def test_emit_handles_initialization_failure():
                 "Failed to initialize ScoutOtelHandler: "
                 "SCOUT_LOGS_INGEST_KEY is not set" in mock_stdout.getvalue()
             )
+
+
+@patch("scout_apm_logging.handler.RequestContext", wraps=RequestContext)
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_reuses_request_context(
+    mock_tracked_request, mock_request_context, otel_scout_handler
+):
+    mock_request = MagicMock()
+    mock_request.request_id = "test-id"
+    mock_request.tags = {"key": "value"}
+    mock_request.operation = "Controller/foobar"
+    mock_request.complete_spans = []
+    mock_tracked_request.instance.return_value = mock_request
+
+    def make_record():
+        return logging.LogRecord(
+            name="test",
+            level=logging.INFO,
+            pathname="",
+            lineno=0,
+            msg="Test message",
+            args=(),
+            exc_info=None,
+        )
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        for _ in range(3):
+            otel_scout_handler.emit(make_record())
+            _, attributes, _ = mock_otel_handler.emit.call_args.args
+            assert attributes["scout_tag_key"] == "value"
+        assert mock_request_context.call_count == 1
+
+        mock_request.tags["key"] = "other"
+        otel_scout_handler.emit(make_record())
+
+    assert mock_request_context.call_count == 2
+    _, attributes, _ = mock_otel_handler.emit.call_args.args
+    assert attributes["scout_tag_key"] == "other"
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_async_mode(mock_tracked_request, otel_scout_handler):
+    mock_request = MagicMock()
+    mock_request.request_id = "test-id"
+    mock_request.tags = {"key": "value"}
+    mock_request.operation = "Controller/foobar"
+    mock_request.complete_spans = []
+    mock_request.current_span.return_value.operation = "SQL/Query"
+    mock_tracked_request.instance.return_value = mock_request
+
+    handler = ScoutOtelHandler(service_name="test-service", async_mode=True)
+    record = logging.LogRecord(
+        name="test",
+        level=logging.INFO,
+        pathname="",
+        lineno=0,
+        msg="Test message",
+        args=(),
+        exc_info=None,
+    )
+    emitted = []
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        mock_otel_handler.emit.side_effect = lambda *args: emitted.append(
+            (threading.current_thread(), args)
+        )
+        handler.handle(record)
+        handler.flush()
+
+    [(thread, (emitted_record, attributes, current_operation))] = emitted
+    assert thread is not threading.current_thread()
+    assert isinstance(emitted_record, QueuedRecord)
+    assert emitted_record.getMessage() == "Test message"
+    assert attributes["scout_transaction_id"] == "test-id"
+    assert attributes["scout_tag_key"] == "value"
+    assert attributes["controller_entrypoint"] == "foobar"
+    assert current_operation == "SQL/Query"
+
+
+def test_emit_async_mode_formats_when_logged(otel_scout_handler):
+    handler = ScoutOtelHandler(service_name="test-service", async_mode=True)
+    state = {"step": 1}
+    released = threading.Event()
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        mock_otel_handler.emit.side_effect = lambda *args: released.wait(5)
+        handler.handle(logging.makeLogRecord({"msg": "one"}))
+        handler.handle(logging.makeLogRecord({"msg": "state=%s", "args": (state,)}))
+        # Changed while the record is still queued.
+        state["step"] = 2
+        released.set()
+        handler.flush()
+
+    emitted_record = mock_otel_handler.emit.call_args.args[0]
+    assert emitted_record.getMessage() == "state={'step': 1}"
+
+
+def test_handle_async_mode_skips_lock(otel_scout_handler):
+    handler = ScoutOtelHandler(service_name="test-service", async_mode=True)
+    handler.addFilter(lambda record: record.msg != "filtered")
+
+    with (
+        patch.object(ScoutOtelHandler, "otel_handler"),
+        patch.object(handler, "emit") as mock_emit,
+    ):
+        handler.acquire()
+        try:
+            # Would deadlock on another thread if the handler lock were taken
+            thread = threading.Thread(
+                target=lambda: [
+                    handler.handle(logging.makeLogRecord({"msg": msg}))
+                    for msg in ("kept", "filtered")
+                ]
+            )
+            thread.start()
+            thread.join(5)
+            assert not thread.is_alive()
+        finally:
+            handler.release()
+
+    mock_emit.assert_called_once()
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_thread_buffers(mock_tracked_request, otel_scout_handler):
+    mock_request = MagicMock()
+    mock_request.request_id = "test-id"
+    mock_request.tags = {}
+    mock_request.operation = "Controller/foobar"
+    mock_request.complete_spans = []
+    mock_request.end_time = None
+    mock_request.current_span.return_value = None
+    mock_tracked_request.instance.return_value = mock_request
+
+    handler = ScoutOtelHandler(
+        service_name="test-service", thread_buffer_size=10, thread_buffer_interval=60
+    )
+    records = [
+        logging.makeLogRecord({"msg": f"Test message {i}", "levelno": logging.INFO})
+        for i in range(3)
+    ]
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        for record in records:
+            handler.handle(record)
+        mock_otel_handler.emit.assert_not_called()
+        handler.flush()
+
+    emitted = [call.args for call in mock_otel_handler.emit.call_args_list]
+    assert [args[0].msg for args in emitted] == [record.msg for record in records]
+    assert emitted[0][1]["scout_transaction_id"] == "test-id"
+
+
+def test_emit_request_buffers(otel_scout_handler):
+    handler = ScoutOtelHandler(service_name="test-service", request_buffer_size=10)
+    request = TrackedRequest.instance()
+    request.start_span(operation="Controller/foobar")
+    early = logging.makeLogRecord({"msg": "early", "levelno": logging.INFO})
+    late = logging.makeLogRecord({"msg": "late", "levelno": logging.INFO})
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        handler.emit(early)
+        request.tag("user", "5")
+        handler.emit(late)
+        mock_otel_handler.emit.assert_not_called()
+        request.stop_span()
+        handler.flush()
+
+    emitted = [call.args for call in mock_otel_handler.emit.call_args_list]
+    assert [args[0].msg for args in emitted] == ["early", "late"]
+    # The early record gets the attributes the request only had at its end.
+    for _, attributes, current_operation in emitted:
+        assert attributes["scout_transaction_id"] == request.request_id
+        assert attributes["scout_end_time"] == request.end_time.isoformat()
+        assert attributes["scout_tag_user"] == "5"
+        assert attributes["controller_entrypoint"] == "foobar"
+        assert current_operation == "Controller/foobar"
+
+
+def test_emit_request_buffers_outside_request(otel_scout_handler):
+    handler = ScoutOtelHandler(service_name="test-service", request_buffer_size=10)
+    record = logging.makeLogRecord({"msg": "startup", "levelno": logging.INFO})
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        handler.emit(record)
+
+    # There's no request to wait for, so it's exported straight away.
+    assert len(handler.request_buffers) == 0
+    assert mock_otel_handler.emit.call_args.args[0].msg == "startup"
+
+
+def test_emit_tag_limits(otel_scout_handler):
+    handler = ScoutOtelHandler(
+        service_name="test-service",
+        max_tags=2,
+        max_tag_length=8,
+        tag_denylist=["secret.*"],
+    )
+    request = TrackedRequest.instance()
+    request.tag("secret.token", "abc")
+    request.tag("user", "5")
+    request.tag("path", "/a/very/long/path")
+    request.tag("extra", "x")
+    record = logging.makeLogRecord({"msg": "test", "levelno": logging.INFO})
+
+    with (
+        patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler,
+        patch.object(
+            handler.tag_limits, "apply", wraps=handler.tag_limits.apply
+        ) as mock_apply,
+    ):
+        for _ in range(3):
+            handler.emit(record)
+    request.stop_span()
+
+    attributes = mock_otel_handler.emit.call_args.args[1]
+    assert {k: v for k, v in attributes.items() if k.startswith("scout_tag_")} == {
+        "scout_tag_user": "5",
+        "scout_tag_path": "/a/ve...",
+    }
+    # Applied once for the request, not for each record.
+    assert mock_apply.call_count == 1
+    assert handler.tag_limits.dropped_tags == 2
+    assert handler.tag_limits.truncated_values == 1
+
+
+def test_rejected_handler_not_flushed_on_shutdown():
+    with pytest.raises(ValueError, match="async_mode") as rejected:
+        ScoutOtelHandler(
+            service_name="test-service", async_mode=True, thread_buffer_size=10
+        )
+    handler = ScoutOtelHandler(service_name="test-service")
+
+    # The traceback keeps the rejected handler alive, but it isn't flushed.
+    assert rejected.traceback
+    assert handler.shutdown(timeout=1).abandoned == 0
+
+
+def test_thread_buffers_not_with_async_mode():
+    with pytest.raises(ValueError, match="async_mode"):
+        ScoutOtelHandler(
+            service_name="test-service", async_mode=True, thread_buffer_size=10
+        )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"prefork": True},
+        {"overflow_policy": OverflowPolicy.BLOCK},
+        {"thread_buffer_size": 10},
+    ],
+)
+def test_real_thread_export_refuses(kwargs):
+    with pytest.raises(ValueError, match="real_thread_export"):
+        ScoutOtelHandler(service_name="test-service", real_thread_export=True, **kwargs)
+
+
+def test_real_thread_export_default():
+    with patch("scout_apm_logging.handler.threading_patched", return_value=True):
+        assert ScoutOtelHandler(service_name="test-service").real_thread_export
+        handler = ScoutOtelHandler(service_name="test-service", prefork=True)
+        assert not handler.real_thread_export
+    handler = ScoutOtelHandler(service_name="test-service")
+    assert not handler.real_thread_export
+    assert handler.log_queue is None
+
+
+@patch("scout_apm_logging.handler.atexit")
+def test_reset_after_fork(mock_atexit, otel_scout_handler):
+    exit_hook = MagicMock()
+    otel_handler = MagicMock()
+    initialization_lock = ScoutOtelHandler._initialization_lock
+    ScoutOtelHandler._logger_provider = MagicMock()
+    pipeline = MagicMock()
+    ScoutOtelHandler._pipelines = (pipeline,)
+    ScoutOtelHandler._exit_hook = exit_hook
+    ScoutOtelHandler.otel_handler = otel_handler
+
+    ScoutOtelHandler._reset_after_fork()
+
+    mock_atexit.unregister.assert_called_once_with(exit_hook)
+    pipeline.abandon_after_fork.assert_called_once_with()
+    otel_handler.close.assert_called_once()
+    assert ScoutOtelHandler._logger_provider is None
+    assert ScoutOtelHandler._pipelines == ()
+    assert ScoutOtelHandler._exit_hook is None
+    assert ScoutOtelHandler.otel_handler is None
+    assert ScoutOtelHandler._initialization_lock is not initialization_lock
+
+
+def _log_from_child(handler, index, results):
+    # What the child was left of the parent's pipeline, queue and threads,
+    # once any that were started again after the fork have had time to stop.
+    for thread in threading.enumerate():
+        if thread is not threading.main_thread():
+            thread.join(1)
+    inherited = {
+        "pipelines": len(ScoutOtelHandler._pipelines),
+        "otel_handler": ScoutOtelHandler.otel_handler is not None,
+        "queued": len(handler.log_queue),
+        "queue_worker": handler.log_queue._worker is not None,
+        "threads": [thread.name for thread in threading.enumerate()],
+    }
+    logger = logging.getLogger(f"test.fork.{index}")
+    logger.propagate = False
+    logger.addHandler(handler)
+    for i in range(5):
+        logger.warning("child %s record %s", index, i)
+    handler.log_queue.flush(5)
+    threads = threading.active_count()
+    handler.shutdown(timeout=5)
+    results.put((inherited, threads))
+
+
+def _exporter_threads():
+    # The handler's and the OTel SDK's threads, not the stand-in collector's.
+    return sorted(
+        thread.name
+        for thread in threading.enumerate()
+        if thread.name.startswith(("scout-", "OtelBatch"))
+    )
+
+
+def test_forked_children_export_their_own_logs(monkeypatch):
+    monkeypatch.setenv("OTEL_BLRP_SCHEDULE_DELAY", "50")
+    ScoutOtelHandler.otel_handler = None
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+
+    with (
+        StandInHTTPCollector() as collector,
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+    ):
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_reporting_endpoint": collector.endpoint,
+            "logs_transport": "http",
+        }.get
+        handler = ScoutOtelHandler(service_name="test-service", async_mode=True)
+        handler.emit(logging.makeLogRecord({"msg": "parent", "levelno": 30}))
+        handler.flush()
+        parent_provider = ScoutOtelHandler._logger_provider
+        [parent_pipeline] = ScoutOtelHandler._pipelines
+        parent_threads = _exporter_threads()
+
+        # Forked one after the other, each from a parent that has forked before.
+        children = []
+        for index in range(3):
+            child = context.Process(
+                target=_log_from_child, args=(handler, index, results)
+            )
+            child.start()
+            children.append((child, results.get(timeout=30)))
+            child.join(30)
+            assert child.exitcode == 0
+            assert _exporter_threads() == parent_threads
+
+        parent_provider.force_flush()
+        assert collector.wait_for_records(16)
+        # The children's records went out through pipelines of their own: the
+        # parent's still exports only its record, and holds nothing.
+        assert ScoutOtelHandler._pipelines == (parent_pipeline,)
+        assert parent_pipeline.pending() == 0
+        assert parent_pipeline.exporter.exported == 1
+
+    handler.shutdown(timeout=1)
+
+    # No pipeline, queued records, or exporter or worker threads came along
+    # with the fork, and every child ran as many threads as the first.
+    for _, (inherited, _) in children:
+        assert inherited == {
+            "pipelines": 0,
+            "otel_handler": False,
+            "queued": 0,
+            "queue_worker": False,
+            "threads": ["MainThread"],
+        }
+    assert len({threads for _, (_, threads) in children}) == 1
+
+    bodies = sorted(record.body.string_value for record in collector.records)
+    assert bodies == sorted(
+        ["parent"] + [f"child {c} record {i}" for c in range(3) for i in range(5)]
+    )
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_sampled_out(mock_tracked_request, otel_scout_handler):
+    mock_tracked_request.instance.return_value = None
+    handler = ScoutOtelHandler(service_name="test-service", sample_rates={"": 0.0})
+
+    with (
+        patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler,
+        patch.object(handler, "_get_request_context") as mock_get_request_context,
+    ):
+        handler.emit(logging.makeLogRecord({"name": "app", "levelno": logging.INFO}))
+        mock_otel_handler.emit.assert_not_called()
+        mock_get_request_context.assert_not_called()
+
+        handler.sampler._next_summary = 0
+        handler.emit(logging.makeLogRecord({"name": "app", "levelno": logging.ERROR}))
+
+    summary, error = [call.args[0] for call in mock_otel_handler.emit.call_args_list]
+    assert summary.scout_suppressed_sampled == 1
+    assert error.levelno == logging.ERROR
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_flush_reports_suppressed_records(mock_tracked_request, otel_scout_handler):
+    mock_tracked_request.instance.return_value = None
+    handler = ScoutOtelHandler(service_name="test-service", sample_rates={"": 0.0})
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        for _ in range(2):
+            handler.emit(logging.makeLogRecord({"name": "app", "levelno": 20}))
+        # Well within the summary interval
+        handler.flush()
+
+    [summary] = [call.args[0] for call in mock_otel_handler.emit.call_args_list]
+    assert summary.scout_suppressed_sampled == 2
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_collapses_duplicates(mock_tracked_request, otel_scout_handler):
+    mock_tracked_request.instance.return_value = None
+    handler = ScoutOtelHandler(service_name="test-service", dedup_window=60)
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        for _ in range(5):
+            handler.emit(
+                logging.makeLogRecord({"name": "app", "msg": "retrying", "args": ()})
+            )
+        assert mock_otel_handler.emit.call_count == 1
+
+        handler.flush()
+
+    first, summary = mock_otel_handler.emit.call_args_list
+    assert first.args[1] is None
+    assert summary.args[1]["scout_repeat_count"] == 4
+    assert not hasattr(first.args[0], "scout_repeat_count")
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_duplicate_summary_exported_without_further_records(
+    mock_tracked_request, otel_scout_handler
+):
+    mock_tracked_request.instance.return_value = None
+    handler = ScoutOtelHandler(service_name="test-service", dedup_window=0.1)
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        for _ in range(3):
+            handler.emit(
+                logging.makeLogRecord({"name": "app", "msg": "retrying", "args": ()})
+            )
+        # Nothing else is logged, and there's no flush.
+        deadline = time.monotonic() + 5
+        while mock_otel_handler.emit.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    _, summary = mock_otel_handler.emit.call_args_list
+    assert summary.args[1]["scout_repeat_count"] == 2
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_duplicate_summary_keeps_request_context(
+    mock_tracked_request, otel_scout_handler
+):
+    mock_request = MagicMock()
+    mock_request.request_id = "test-id"
+    mock_request.tags = {}
+    mock_request.operation = None
+    mock_request.complete_spans = []
+    mock_tracked_request.instance.return_value = mock_request
+    handler = ScoutOtelHandler(service_name="test-service", dedup_window=60)
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        records = [
+            logging.makeLogRecord({"name": "app", "msg": "retrying", "args": ()})
+            for _ in range(3)
+        ]
+        for record in records:
+            handler.emit(record)
+        handler.flush()
+
+    _, summary = mock_otel_handler.emit.call_args_list
+    assert summary.args[1]["scout_transaction_id"] == "test-id"
+    assert summary.args[1]["scout_repeat_count"] == 2
+    for record in records:
+        assert not hasattr(record, "scout_repeat_count")
+
+
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_emit_routed_records_skip_buffers(mock_tracked_request, otel_scout_handler):
+    mock_request = MagicMock()
+    mock_request.request_id = "test-id"
+    mock_request.tags = {}
+    mock_request.operation = None
+    mock_request.is_real_request = True
+    mock_tracked_request.instance.return_value = mock_request
+    handler = ScoutOtelHandler(
+        service_name="test-service",
+        routes=[{"name": "errors", "min_level": "ERROR"}],
+        thread_buffer_size=64,
+        request_buffer_size=16,
+    )
+
+    with patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler:
+        handler.emit(logging.makeLogRecord({"name": "app", "levelno": logging.INFO}))
+        error = logging.makeLogRecord({"name": "app", "levelno": logging.ERROR})
+        handler.emit(error)
+
+        # Exported right away, while the INFO record waits for its request.
+        [call] = mock_otel_handler.emit.call_args_list
+        assert call.args[0] is error
+        assert call.args[1]["scout_transaction_id"] == "test-id"
+        assert len(handler.request_buffers) == 1
+        assert len(handler.thread_buffers) == 0
+        handler.flush()
+
+
+def test_export_after_shutdown(otel_scout_handler):
+    handler = ScoutOtelHandler(service_name="test-service", telemetry=True)
+    record = logging.makeLogRecord({"name": "app", "msg": "late"})
+
+    # As if shutdown() detached the pipelines while the record was queued.
+    with patch.object(ScoutOtelHandler, "otel_handler", None):
+        handler._export(QueuedRecord(record), None, None)
+
+    assert handler.stats()["records"]["shutdown_dropped"] == 1
+
+
+def test_export_failure_is_handled(otel_scout_handler):
+    record = logging.makeLogRecord({"name": "app", "msg": "unsent"})
+
+    with (
+        patch.object(ScoutOtelHandler, "otel_handler") as mock_otel_handler,
+        patch.object(otel_scout_handler, "handleError") as mock_handle_error,
+    ):
+        mock_otel_handler.emit.side_effect = RuntimeError("Conversion failed")
+        otel_scout_handler._export(record, None, None)
+
+    mock_handle_error.assert_called_once_with(record)
+
+
+def test_setup_with_spool_dir(tmp_path):
+    ScoutOtelHandler.otel_handler = None
+
+    with (
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+        patch("scout_apm_logging.handler.create_log_exporter") as mock_exporter,
+        patch("scout_apm_logging.handler.SegmentSpool") as mock_spool,
+        patch("scout_apm_logging.spool_exporter.SpoolingLogExporter") as mock_spooling,
+        patch("opentelemetry.sdk._logs.LoggerProvider"),
+        patch(
+            "opentelemetry.sdk._logs.export.BatchLogRecordProcessor"
+        ) as mock_processor,
+        patch("opentelemetry.sdk.resources.Resource"),
+    ):
+        mock_scout_config.value.side_effect = {"logs_ingest_key": "test-ingest-key"}.get
+        handler = ScoutOtelHandler(
+            service_name="test-service", spool_dir=str(tmp_path), spool_max_bytes=1024
+        )
+        handler._initialize()
+
+    mock_spool.claim.assert_called_once_with(
+        str(tmp_path), max_bytes=1024, segment_bytes=handler.spool_segment_bytes
+    )
+    mock_spooling.assert_called_once_with(
+        mock_exporter.return_value, mock_spool.claim.return_value
+    )
+    mock_processor.assert_called_once()
+    assert mock_processor.call_args.args[0].exporter is mock_spooling.return_value
+    ScoutOtelHandler.otel_handler = None
+
+
+def test_setup_with_export_settings():
+    ScoutOtelHandler.otel_handler = None
+
+    with (
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+        patch("scout_apm_logging.handler.create_log_exporter") as mock_exporter,
+        patch("opentelemetry.sdk._logs.LoggerProvider"),
+        patch(
+            "opentelemetry.sdk._logs.export.BatchLogRecordProcessor"
+        ) as mock_processor,
+        patch("opentelemetry.sdk.resources.Resource"),
+    ):
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_export_preset": "low-latency",
+            "logs_batch_size": "256",
+            "logs_compression": "none",
+        }.get
+        handler = ScoutOtelHandler(service_name="test-service", compression="gzip")
+        handler._initialize()
+
+    mock_processor.assert_called_once_with(
+        ANY,
+        max_export_batch_size=256,
+        max_queue_size=2048,
+        schedule_delay_millis=200.0,
+        export_timeout_millis=5000.0,
+    )
+    assert mock_processor.call_args.args[0].exporter is mock_exporter.return_value
+    assert mock_exporter.call_args.kwargs["compression"] == "gzip"
+    assert mock_exporter.call_args.kwargs["timeout"] == 5.0
+    ScoutOtelHandler.otel_handler = None
+
+
+def test_setup_with_routes():
+    ScoutOtelHandler.otel_handler = None
+
+    with (
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+        patch("scout_apm_logging.handler.create_log_exporter") as mock_exporter,
+        patch("opentelemetry.sdk._logs.LoggerProvider"),
+        patch(
+            "opentelemetry.sdk._logs.export.BatchLogRecordProcessor"
+        ) as mock_processor,
+        patch("opentelemetry.sdk.resources.Resource"),
+    ):
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+        }.get
+        handler = ScoutOtelHandler(
+            service_name="test-service",
+            export_preset="high-throughput",
+            routes=[
+                {
+                    "name": "errors",
+                    "min_level": "ERROR",
+                    "export_preset": "low-latency",
+                    "endpoint": "https://errors.example.com:4317",
+                    "ingest_key": "errors-key",
+                }
+            ],
+        )
+        handler._initialize()
+
+    default, errors = mock_exporter.call_args_list
+    assert default.kwargs["endpoint"] == "otlp.scoutotel.com:4317"
+    assert default.kwargs["headers"] == {"x-scout-key": "test-ingest-key"}
+    assert errors.kwargs["endpoint"] == "https://errors.example.com:4317"
+    assert errors.kwargs["headers"] == {"x-scout-key": "errors-key"}
+    assert [
+        call.kwargs["schedule_delay_millis"]
+        for call in mock_processor.mock_calls
+        if call.kwargs
+    ] == [5000.0, 200.0]
+    assert isinstance(ScoutOtelHandler.otel_handler, RoutingEmitter)
+    ScoutOtelHandler.otel_handler = None
+
+
+def test_routes_not_with_prefork():
+    with pytest.raises(ValueError, match="prefork"):
+        ScoutOtelHandler(
+            service_name="test-service", prefork=True, routes=[{"name": "errors"}]
+        )
+
+
+def test_async_mode_routes_have_their_own_queues(otel_scout_handler):
+    handler = ScoutOtelHandler(
+        service_name="test-service",
+        async_mode=True,
+        routes=[{"name": "errors", "min_level": "ERROR"}],
+    )
+    error = logging.makeLogRecord({"name": "app", "levelno": logging.ERROR})
+    info = logging.makeLogRecord({"name": "app", "levelno": logging.INFO})
+
+    with (
+        patch.object(ScoutOtelHandler, "otel_handler"),
+        patch.object(handler.log_queue, "put") as mock_put,
+        patch.object(handler.route_queues[0], "put") as mock_route_put,
+    ):
+        handler.emit(error)
+        handler.emit(info)
+
+    assert mock_route_put.call_args.args[0][0].levelno == logging.ERROR
+    assert mock_put.call_args.args[0][0].levelno == logging.INFO
+
+
+def test_noisy_logger_does_not_delay_errors():
+    ScoutOtelHandler.otel_handler = None
+
+    with (
+        StandInCollector(delay=0.5) as bulk,
+        StandInCollector() as errors,
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+    ):
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_reporting_endpoint": bulk.endpoint,
+        }.get
+        handler = ScoutOtelHandler(
+            service_name="test-service",
+            export_preset="high-throughput",
+            routes=[
+                {
+                    "name": "errors",
+                    "min_level": "ERROR",
+                    "export_preset": "low-latency",
+                    "endpoint": errors.endpoint,
+                }
+            ],
+        )
+        for i in range(5000):
+            handler.emit(
+                logging.makeLogRecord(
+                    {"name": "app.noisy", "levelno": logging.INFO, "msg": "poll"}
+                )
+            )
+        handler.emit(
+            logging.makeLogRecord(
+                {"name": "app", "levelno": logging.ERROR, "msg": "failed"}
+            )
+        )
+
+        assert errors.wait_for_records(1, timeout=2)
+        assert [record.body.string_value for record in errors.records] == ["failed"]
+        assert not bulk.records
+
+        ScoutOtelHandler._logger_provider.shutdown()
+        for provider in ScoutOtelHandler._route_logger_providers:
+            provider.shutdown()
+    ScoutOtelHandler.otel_handler = None
+
+
+def _slow_collector_handler(collector, mock_scout_config, **kwargs):
+    ScoutOtelHandler.otel_handler = None
+    mock_scout_config.value.side_effect = {
+        "logs_ingest_key": "test-ingest-key",
+        "logs_reporting_endpoint": collector.endpoint,
+    }.get
+    # Nothing is exported until the handler is flushed.
+    handler = ScoutOtelHandler(
+        service_name="test-service", schedule_delay=60000, **kwargs
+    )
+    for i in range(10):
+        handler.emit(
+            logging.makeLogRecord(
+                {"name": "app", "msg": f"record {i}", "levelno": logging.INFO}
+            )
+        )
+    return handler
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_flush_within_timeout(mock_scout_config):
+    with StandInCollector(delay=1.0) as collector:
+        handler = _slow_collector_handler(collector, mock_scout_config)
+
+        start = time.monotonic()
+        result = handler.flush(timeout=0.2)
+        assert time.monotonic() - start < 0.5
+        assert (result.flushed, result.abandoned) == (0, 10)
+
+        # The export carries on, and a later flush sees it through.
+        result = handler.flush(timeout=5)
+        assert (result.flushed, result.abandoned) == (10, 0)
+        assert len(collector.records) == 10
+
+        handler.shutdown(timeout=1)
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_flush_without_timeout_does_not_wait_on_export(mock_scout_config):
+    with StandInCollector(delay=1.0) as collector:
+        handler = _slow_collector_handler(collector, mock_scout_config, async_mode=True)
+
+        # As logging.shutdown() and dictConfig call it.
+        start = time.monotonic()
+        result = handler.flush()
+        assert time.monotonic() - start < 0.5
+        # The queue was handed over, and the pipeline still has it to send.
+        assert (result.flushed, result.abandoned) == (0, 0)
+        assert len(handler.log_queue) == 0
+        assert ScoutOtelHandler._pipelines[0].pending() == 10
+
+        result = handler.flush(timeout=5)
+        assert (result.flushed, result.abandoned) == (10, 0)
+
+        handler.shutdown(timeout=1)
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_flush_async_mode_and_routes(mock_scout_config):
+    with StandInCollector() as collector, StandInCollector(delay=2.0) as slow:
+        handler = _slow_collector_handler(
+            collector,
+            mock_scout_config,
+            async_mode=True,
+            routes=[{"name": "slow", "loggers": ["slow"], "endpoint": slow.endpoint}],
+        )
+        handler.emit(
+            logging.makeLogRecord(
+                {"name": "slow", "msg": "slow", "levelno": logging.INFO}
+            )
+        )
+
+        start = time.monotonic()
+        result = handler.flush(timeout=0.5)
+        # The slow route doesn't hold up the other pipeline.
+        assert time.monotonic() - start < 1.0
+        assert (result.flushed, result.abandoned) == (10, 1)
+        assert len(collector.records) == 10
+
+        handler.shutdown(timeout=0)
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_real_thread_export(mock_scout_config):
+    with StandInCollector() as collector, StandInCollector() as errors:
+        handler = _slow_collector_handler(
+            collector,
+            mock_scout_config,
+            real_thread_export=True,
+            telemetry=True,
+            routes=[
+                {"name": "errors", "min_level": "ERROR", "endpoint": errors.endpoint}
+            ],
+        )
+        handler.emit(
+            logging.makeLogRecord(
+                {"name": "app", "msg": "failed", "levelno": logging.ERROR}
+            )
+        )
+        assert isinstance(handler.log_queue, RealThreadQueue)
+        assert [type(queue) for queue in handler.route_queues] == [RealThreadQueue]
+
+        result = handler.flush(timeout=5)
+        assert (result.flushed, result.abandoned) == (11, 0)
+        assert len(collector.records) == 10
+        assert len(errors.records) == 1
+        assert handler.stats()["records"]["batch_dropped"] == 0
+
+        handler.shutdown(timeout=1)
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_resource_per_service(mock_scout_config):
+    ScoutOtelHandler.otel_handler = None
+
+    with StandInCollector() as collector:
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_reporting_endpoint": collector.endpoint,
+            "logs_environment": "staging",
+            "revision_sha": "abc123",
+            "logs_container_id": "0123abcd",
+        }.get
+        api = ScoutOtelHandler(service_name="api", environment="production")
+        worker = ScoutOtelHandler(service_name="worker")
+        same_as_api = ScoutOtelHandler(service_name="api", environment="production")
+        for handler in (api, worker, same_as_api):
+            handler.emit(
+                logging.makeLogRecord(
+                    {"name": "app", "msg": handler.service_name, "levelno": 20}
+                )
+            )
+
+        # One pipeline, and an emitter through it for the worker's resource.
+        assert len(ScoutOtelHandler._pipelines) == 1
+        assert list(ScoutOtelHandler._service_emitters) == [worker.emitter_key]
+        assert same_as_api.resource_attributes is api.resource_attributes
+        assert api.flush(timeout=5).flushed == 3
+
+        resources = {
+            record.body.string_value: exported_attributes(resource)
+            for record, resource in zip(collector.records, collector.resources)
+        }
+        assert resources["api"]["deployment.environment.name"] == "production"
+        assert resources["worker"] == {
+            **resources["api"],
+            "service.name": "worker",
+            "deployment.environment.name": "staging",
+        }
+        assert resources["worker"]["vcs.ref.head.revision"] == "abc123"
+        assert resources["worker"]["container.id"] == "0123abcd"
+        # Resource attributes aren't repeated on the records.
+        assert all(
+            "service.name" not in exported_attributes(record)
+            for record in collector.records
+        )
+
+        api.shutdown(timeout=1)
+        assert ScoutOtelHandler._service_emitters == {}
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_structured_per_handler(mock_scout_config):
+    ScoutOtelHandler.otel_handler = None
+
+    with StandInCollector() as collector:
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_reporting_endpoint": collector.endpoint,
+        }.get
+        plain = ScoutOtelHandler(service_name="test-service")
+        structured = ScoutOtelHandler(service_name="test-service", structured=True)
+        for handler in (plain, structured):
+            handler.emit(
+                logging.LogRecord(
+                    "app", logging.INFO, __file__, 1, "templ %s", ("y",), None
+                )
+            )
+
+        assert plain.flush(timeout=5).flushed == 2
+        plain_record, structured_record = collector.records
+
+        # Each handler's records are converted with its own settings, through
+        # the same pipeline.
+        assert plain_record.body.string_value == "templ y"
+        assert "scout_arg_0" not in exported_attributes(plain_record)
+        assert structured_record.body.string_value == "templ %s"
+        assert exported_attributes(structured_record)["scout_arg_0"] == "y"
+        assert list(ScoutOtelHandler._service_emitters) == [structured.emitter_key]
+
+        plain.shutdown(timeout=1)
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_exception_settings_per_handler(mock_scout_config):
+    ScoutOtelHandler.otel_handler = None
+
+    with StandInCollector() as collector:
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_reporting_endpoint": collector.endpoint,
+        }.get
+        full = ScoutOtelHandler(service_name="test-service")
+        short = ScoutOtelHandler(
+            service_name="test-service",
+            exception_max_length=20,
+            exception_fingerprint_window=60,
+        )
+        for handler in (full, short, full, short):
+            try:
+                raise ValueError("Bad value")
+            except ValueError:
+                exc_info = sys.exc_info()
+            handler.emit(
+                logging.LogRecord(
+                    "app", logging.ERROR, __file__, 1, "failed", (), exc_info
+                )
+            )
+
+        assert full.flush(timeout=5).flushed == 4
+        stacktraces = [
+            exported_attributes(record).get("exception.stacktrace")
+            for record in collector.records
+        ]
+
+        # The first handler's records keep their whole stack trace every time,
+        # the second's are cut, and only sent once in the fingerprint window.
+        assert len(stacktraces[0]) > 20
+        assert stacktraces[2] == stacktraces[0]
+        assert len(stacktraces[1]) <= 20
+        assert stacktraces[3] is None
+        assert "scout_exception_fingerprint" in exported_attributes(
+            collector.records[3]
+        )
+
+        full.shutdown(timeout=1)
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_shutdown_within_timeout(mock_scout_config):
+    with StandInCollector(delay=2.0) as collector:
+        handler = _slow_collector_handler(collector, mock_scout_config)
+        exit_hook = ScoutOtelHandler._exit_hook
+        assert exit_hook == handler._shutdown_at_exit
+
+        with patch("scout_apm_logging.handler.atexit") as mock_atexit:
+            start = time.monotonic()
+            result = handler.shutdown(timeout=0.3)
+        assert time.monotonic() - start < 1.0
+        assert (result.flushed, result.abandoned) == (0, 10)
+        mock_atexit.unregister.assert_called_once_with(exit_hook)
+        assert ScoutOtelHandler.otel_handler is None
+        assert ScoutOtelHandler._pipelines == ()
+
+    ScoutOtelHandler.otel_handler = None
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_shutdown_flushes_buffered_records(mock_scout_config):
+    with StandInCollector() as collector:
+        handler = _slow_collector_handler(
+            collector, mock_scout_config, thread_buffer_size=100
+        )
+
+        result = handler.shutdown(timeout=5)
+
+        assert (result.flushed, result.abandoned) == (10, 0)
+        assert len(collector.records) == 10
+    ScoutOtelHandler.otel_handler = None
+
+
+@patch("scout_apm_logging.handler.atexit")
+@patch("scout_apm_logging.handler.scout_config")
+def test_exit_hook(mock_scout_config, mock_atexit, otel_scout_handler):
+    ScoutOtelHandler.otel_handler = None
+    ScoutOtelHandler._exit_hook = previous_hook = MagicMock()
+    mock_scout_config.value.side_effect = {
+        "logs_ingest_key": "test-ingest-key",
+        "logs_shutdown_timeout": "1.5",
+    }.get
+    handler = ScoutOtelHandler(service_name="test-service")
+
+    with (
+        patch("opentelemetry.sdk._logs.LoggerProvider") as mock_provider,
+        patch("opentelemetry.sdk._logs.export.BatchLogRecordProcessor"),
+    ):
+        handler._initialize()
+
+    # The provider's own exit hook would wait out the exporter's timeouts.
+    assert mock_provider.call_args.kwargs["shutdown_on_exit"] is False
+    mock_atexit.unregister.assert_called_once_with(previous_hook)
+    mock_atexit.register.assert_called_once_with(handler._shutdown_at_exit)
+    assert handler.shutdown_timeout == 1.5
+
+    with patch.object(handler, "shutdown") as mock_shutdown:
+        handler._shutdown_at_exit()
+    mock_shutdown.assert_called_once_with(1.5)
+    ScoutOtelHandler.otel_handler = None
+    ScoutOtelHandler._exit_hook = None
+
+
+def test_exception_settings(otel_scout_handler):
+    assert otel_scout_handler.tracebacks is DEFAULT_FORMATTER
+
+    handler = ScoutOtelHandler(
+        service_name="test-service",
+        exception_max_frames=20,
+        exception_fingerprint_window=60,
+    )
+
+    assert handler.tracebacks.max_frames == 20
+    assert handler.tracebacks.max_length is None
+    assert handler.tracebacks.fingerprint_window == 60
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_get_transport(mock_scout_config, otel_scout_handler):
+    mock_scout_config.value.side_effect = {"logs_transport": "http"}.get
+    otel_scout_handler.transport = None
+    otel_scout_handler.transport = otel_scout_handler._get_transport()
+    assert otel_scout_handler.transport == "http"
+    assert otel_scout_handler._get_endpoint() == (
+        "https://otlp.scoutotel.com:4318/v1/logs"
+    )
+
+    otel_scout_handler.transport = "grpc"
+    assert otel_scout_handler._get_transport() == "grpc"
+
+    otel_scout_handler.transport = "udp"
+    with pytest.raises(ValueError, match="Unknown transport: udp"):
+        otel_scout_handler._get_transport()
+
+
+def test_setup_structured():
+    ScoutOtelHandler.otel_handler = None
+
+    with (
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+        patch("scout_apm_logging.handler.create_log_exporter"),
+        patch("opentelemetry.sdk._logs.LoggerProvider"),
+        patch("opentelemetry.sdk._logs.export.BatchLogRecordProcessor"),
+        patch("opentelemetry.sdk.resources.Resource"),
+    ):
+        mock_scout_config.value.side_effect = {"logs_ingest_key": "test-ingest-key"}.get
+        handler = ScoutOtelHandler(service_name="test-service", structured=True)
+        handler._initialize()
+
+    assert ScoutOtelHandler.otel_handler.structured is True
+    ScoutOtelHandler.otel_handler = None
+
+
+@patch("scout_apm_logging.handler.scout_config")
+def test_prefork_shipper_per_service(mock_scout_config):
+    ScoutOtelHandler.otel_handler = None
+    mock_scout_config.value.side_effect = {"logs_ingest_key": "test-ingest-key"}.get
+
+    with patch("scout_apm_logging.shipper.ShipperClient") as mock_client_class:
+        mock_client_class.side_effect = lambda socket_path, **kwargs: MagicMock(
+            socket_path=socket_path, dropped=0, **kwargs
+        )
+        api = ScoutOtelHandler(service_name="api", prefork=True)
+        worker = ScoutOtelHandler(service_name="worker", prefork=True)
+        for handler in (api, worker, api):
+            handler.emit(logging.makeLogRecord({"name": "app", "levelno": 20}))
+
+    api_client = ScoutOtelHandler.otel_handler
+    [worker_client] = ScoutOtelHandler._service_emitters.values()
+    # Each service's records go to a shipper that exports them as its own.
+    assert (api_client.service_name, worker_client.service_name) == ("api", "worker")
+    assert api_client.socket_path != worker_client.socket_path
+    assert api_client.emit.call_count == 2
+    assert worker_client.emit.call_count == 1
+
+    api.shutdown(timeout=1)
+    for client in (api_client, worker_client):
+        client.flush.assert_called_once_with(ANY)
+        client.close.assert_called_once_with()
+
+
+def test_shutdown_flushes_every_handler(otel_scout_handler):
+    other = ScoutOtelHandler(service_name="test-service", async_mode=True)
+
+    with (
+        patch.object(ScoutOtelHandler, "otel_handler"),
+        patch.object(other, "_flush_held") as mock_flush_held,
+        patch.object(other, "_held", return_value=2),
+    ):
+        result = otel_scout_handler.shutdown(timeout=1)
+
+    # The other handler's queue is drained into the pipelines before they
+    # shut down, and what it still holds counts as abandoned.
+    mock_flush_held.assert_called_once_with(ANY)
+    assert result.abandoned == 2
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+# Only needed once a record is exported, so importing the package (e.g. to
+# configure logging) must not load them.
+DEFERRED_PACKAGES = ("opentelemetry", "grpc", "google.protobuf", "requests")
+
+
+def import_times(statement):
+    """
+    Run ``statement`` under ``python -X importtime`` and return the cumulative
+    import time in microseconds of every module it imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_defers_otel():
+    times = import_times("import scout_apm_logging")
+
+    assert "scout_apm_logging.handler" in times
+    deferred = [
+        name
+        for name in times
+        if any(name == p or name.startswith(f"{p}.") for p in DEFERRED_PACKAGES)
+    ]
+    assert deferred == []
+
+
+def test_dict_config_defers_otel():
+    times = import_times(
+        "import logging.config\n"
+        "logging.config.dictConfig({'version': 1, 'handlers': {'scout': {"
+        "'class': 'scout_apm_logging.ScoutOtelHandler',"
+        "'service_name': 'test-service'}}})"
+    )
+
+    assert "opentelemetry.sdk._logs" not in times
@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pytest
+
+from scout_apm_logging.log_queue import LogQueue, OverflowPolicy
+
+
+class BlockingConsumer:
+    """Holds the worker on its first item until released."""
+
+    def __init__(self):
+        self.items = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, item):
+        self.started.set()
+        self.release.wait(5)
+        self.items.append(item)
+
+
+def fill(log_queue, consumer, count):
+    # The first item is taken by the worker, the rest stay queued.
+    log_queue.put(0)
+    assert consumer.started.wait(5)
+    return [log_queue.put(i) for i in range(1, count + 1)]
+
+
+def test_consumes_items_in_order():
+    items = []
+    log_queue = LogQueue(items.append)
+
+    for i in range(100):
+        assert log_queue.put(i)
+
+    assert log_queue.flush(5)
+    assert items == list(range(100))
+    assert log_queue.dropped == 0
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError, match="Unknown overflow policy: nope"):
+        LogQueue(lambda item: None, overflow_policy="nope")
+
+
+def test_drop_newest():
+    consumer = BlockingConsumer()
+    log_queue = LogQueue(
+        consumer, maxsize=2, overflow_policy=OverflowPolicy.DROP_NEWEST
+    )
+
+    assert fill(log_queue, consumer, 4) == [True, True, False, False]
+    consumer.release.set()
+
+    assert log_queue.flush(5)
+    assert consumer.items == [0, 1, 2]
+    assert log_queue.dropped == 2
+
+
+def test_drop_oldest():
+    consumer = BlockingConsumer()
+    log_queue = LogQueue(
+        consumer, maxsize=2, overflow_policy=OverflowPolicy.DROP_OLDEST
+    )
+
+    assert fill(log_queue, consumer, 4) == [True, True, True, True]
+    consumer.release.set()
+
+    assert log_queue.flush(5)
+    assert consumer.items == [0, 3, 4]
+    assert log_queue.dropped == 2
+
+
+def test_block_times_out():
+    consumer = BlockingConsumer()
+    log_queue = LogQueue(
+        consumer, maxsize=1, overflow_policy=OverflowPolicy.BLOCK, block_timeout=0.05
+    )
+
+    assert fill(log_queue, consumer, 2) == [True, False]
+    consumer.release.set()
+
+    assert log_queue.flush(5)
+    assert consumer.items == [0, 1]
+    assert log_queue.dropped == 1
+
+
+def test_block_waits_for_space():
+    consumer = BlockingConsumer()
+    log_queue = LogQueue(
+        consumer, maxsize=1, overflow_policy=OverflowPolicy.BLOCK, block_timeout=5
+    )
+    fill(log_queue, consumer, 1)
+
+    threading.Timer(0.05, consumer.release.set).start()
+    assert log_queue.put(2)
+
+    assert log_queue.flush(5)
+    assert consumer.items == [0, 1, 2]
+    assert log_queue.dropped == 0
+
+
+def test_flush_times_out():
+    consumer = BlockingConsumer()
+    log_queue = LogQueue(consumer)
+    fill(log_queue, consumer, 1)
+
+    assert not log_queue.flush(0.01)
+    consumer.release.set()
+    assert log_queue.flush(5)
+
+
+def test_flush_before_start():
+    log_queue = LogQueue(lambda item: None)
+
+    assert log_queue.flush(0)
+
+
+def test_consume_errors_are_counted():
+    def consume(item):
+        raise RuntimeError("export failed")
+
+    log_queue = LogQueue(consume)
+    log_queue.put(1)
+
+    assert log_queue.flush(5)
+    assert log_queue.dropped == 1
+
+
+def test_on_worker_start():
+    worker_threads = []
+    log_queue = LogQueue(
+        lambda item: None,
+        on_worker_start=lambda: worker_threads.append(threading.current_thread()),
+    )
+    log_queue.put(1)
+
+    assert log_queue.flush(5)
+    assert worker_threads[0].name == "scout-log-queue"
+
+
+def test_reset_after_fork():
+    consumer = BlockingConsumer()
+    log_queue = LogQueue(consumer)
+    fill(log_queue, consumer, 2)
+    parent_worker = log_queue._worker
+
+    # What the child sees: the parent's queued items, but no worker thread
+    log_queue._reset_after_fork()
+    assert len(log_queue) == 0
+    assert log_queue._worker is None
+
+    consumer.release.set()
+    while consumer.items != [0]:
+        time.sleep(0.01)
+    log_queue.put(3)
+    assert log_queue.flush(5)
+    assert log_queue._worker is not parent_worker
+    assert consumer.items == [0, 3]
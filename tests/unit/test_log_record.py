@@ -0,0 +1,185 @@
+import gc
+import logging
+import sys
+import weakref
+
+import pytest
+
+from scout_apm_logging.utils.log_record import (
+    MAX_FLATTEN_DEPTH,
+    QueuedRecord,
+    arg_attributes,
+    attribute_value,
+    exception_attributes,
+    extra_attributes,
+    flatten_attributes,
+    interned,
+    structured_message,
+)
+
+
+def make_record(msg="Hello %s", args=("world",), **extras):
+    record = logging.LogRecord(
+        name="test",
+        level=logging.INFO,
+        pathname="/app/views.py",
+        lineno=12,
+        msg=msg,
+        args=args,
+        exc_info=None,
+    )
+    record.__dict__.update(extras)
+    return record
+
+
+def test_extra_attributes():
+    assert extra_attributes(make_record()) == {}
+    assert extra_attributes(make_record(user_id=5)) == {"user_id": 5}
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (5, 5),
+        (1.5, 1.5),
+        (True, True),
+        ("text", "text"),
+        (None, None),
+        ([1, 2], (1, 2)),
+        (("a", "b"), ("a", "b")),
+        ([1, "a"], "[1, 'a']"),
+        ({1, 2}, "{1, 2}"),
+        (ValueError("bad"), "bad"),
+    ],
+)
+def test_attribute_value(value, expected):
+    assert attribute_value(value) == expected
+
+
+def test_flatten_attributes():
+    assert flatten_attributes(
+        {"user": {"id": 5, "roles": ["admin"], "team": None}, "path": "/"}
+    ) == {"user.id": 5, "user.roles": ("admin",), "path": "/"}
+
+
+def test_flatten_attributes_depth():
+    nested = {"value": 1}
+    for _ in range(MAX_FLATTEN_DEPTH + 1):
+        nested = {"a": nested}
+
+    [(key, value)] = flatten_attributes(nested).items()
+
+    assert key == ".".join(["a"] * (MAX_FLATTEN_DEPTH + 1))
+    assert value == "{'value': 1}"
+
+
+def test_arg_attributes():
+    assert arg_attributes(make_record(args=())) == {}
+    assert arg_attributes(make_record(msg="%s of %d", args=("page", 3))) == {
+        "scout_arg_0": "page",
+        "scout_arg_1": 3,
+    }
+    # A single mapping is taken as the args by LogRecord.
+    record = make_record(msg="%(user)s", args=({"user": "alice"},))
+    assert arg_attributes(record) == {"scout_arg_user": "alice"}
+
+
+def test_structured_message():
+    record = make_record(
+        msg="Charged %s %.2f", args=("alice", 9.5), order={"id": 7, "items": 2}
+    )
+
+    template, attributes = structured_message(record)
+
+    assert template == "Charged %s %.2f"
+    assert attributes == {
+        "order.id": 7,
+        "order.items": 2,
+        "scout_arg_0": "alice",
+        "scout_arg_1": 9.5,
+    }
+
+
+def test_queued_record():
+    record = make_record(user_id=5)
+
+    queued = QueuedRecord(record)
+
+    assert not hasattr(queued, "__dict__")
+    for field in ("name", "levelno", "levelname", "pathname", "lineno", "created"):
+        assert getattr(queued, field) == getattr(record, field)
+    assert queued.getMessage() == "Hello world"
+    assert extra_attributes(queued) == {"user_id": 5}
+    assert QueuedRecord(make_record()).extras is None
+    # Bodies that aren't templates are kept as they are.
+    assert QueuedRecord(make_record(msg={"a": 1}, args=())).msg == {"a": 1}
+
+
+def test_queued_record_exception():
+    class Local:
+        pass
+
+    def fail():
+        local = Local()
+        ref = weakref.ref(local)
+        raise ValueError("Bad value", ref)
+
+    try:
+        fail()
+    except ValueError:
+        exc_info = sys.exc_info()
+    ref = exc_info[1].args[1]
+
+    record = make_record(args=())
+    record.exc_info = exc_info
+    queued = QueuedRecord(record)
+    del record, exc_info
+    gc.collect()
+
+    # The traceback, and the frames' locals with it, aren't kept.
+    assert queued.exc_info is None
+    assert ref() is None
+    attributes = exception_attributes(queued)
+    assert attributes["exception.type"] == "ValueError"
+    assert attributes["exception.message"] == "Bad value"
+    assert "in fail" in attributes["exception.stacktrace"]
+    assert exception_attributes(QueuedRecord(make_record())) == {}
+
+
+def test_queued_record_structured():
+    record = make_record(
+        msg="Charged %s %s", args=("alice", {"cart": {"items": [1, 2]}}), user_id=5
+    )
+
+    queued = QueuedRecord(record, structured=True)
+
+    assert structured_message(queued) == structured_message(record)
+
+
+@pytest.mark.parametrize("structured", [False, True])
+def test_queued_record_is_a_snapshot(structured):
+    state = {"step": 1}
+    order = {"id": 7}
+    record = make_record(msg="state=%s", args=(state,), order=order)
+
+    queued = QueuedRecord(record, structured)
+    state["step"] = 2
+    order["id"] = 8
+
+    if structured:
+        assert structured_message(queued)[1] == {
+            "order.id": 7,
+            "scout_arg_step": 1,
+        }
+    else:
+        assert queued.getMessage() == "state={'step': 1}"
+
+
+def test_interned():
+    first = "".join(["Controller/", "users"])
+    second = "".join(["Controller/", "users"])
+    assert first is not second
+
+    assert interned(first) is first
+    assert interned(second) is first
+    assert interned(None) is None
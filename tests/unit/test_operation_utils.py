@@ -1,6 +1,10 @@
 from typing import List, Optional
-from dataclasses import dataclass
+from dataclasses import FrozenInstanceError, dataclass
+
+import pytest
+
 from scout_apm_logging.utils.operation_utils import (
+    OperationClassifier,
     OperationDetail,
     OperationType,
     get_operation_detail,
@@ -87,3 +91,57 @@ def test_get_operation_detail_operation_priority():
     assert result == OperationDetail(
         name="TestController", type=OperationType.CONTROLLER
     )
+
+
+def test_operation_detail_is_frozen():
+    detail = OperationDetail(name="test", type="controller")
+    with pytest.raises(FrozenInstanceError):
+        detail.name = "other"  # type: ignore[misc]
+    assert not hasattr(detail, "__dict__")
+
+
+def test_classifier_custom_prefixes():
+    classifier = OperationClassifier({"Task/": "task", "Controller/Admin/": "admin"})
+
+    assert classifier.classify("Task/send_email") == OperationDetail(
+        name="send_email", type="task"
+    )
+    assert classifier.classify("Controller/Admin/users") == OperationDetail(
+        name="users", type="admin"
+    )
+    assert classifier.classify("Controller/users") == OperationDetail(
+        name="users", type=OperationType.CONTROLLER
+    )
+    assert classifier.classify("Task.send_email") is None
+
+
+def test_classifier_escapes_prefixes():
+    classifier = OperationClassifier({"Celery.*": "task"})
+
+    assert classifier.classify("Celery.*add").type == "task"
+    assert classifier.classify("Celery.add") is None
+
+
+def test_classifier_caches_details():
+    classifier = OperationClassifier(cache_size=2)
+
+    detail = classifier.classify("Controller/foobar")
+
+    assert classifier.classify("Controller/foobar") is detail
+    classifier.classify("Job/one")
+    classifier.classify("Job/two")
+    assert classifier.classify("Controller/foobar") is not detail
+
+
+def test_classifier_detail_from_new_spans():
+    classifier = OperationClassifier()
+    known = OperationDetail(name="TestController", type=OperationType.CONTROLLER)
+    spans = [MockSpan(operation="Job/ignored"), MockSpan(operation="Other/Op")]
+    record = MockTrackedRequest(complete_spans=spans)
+
+    assert classifier.detail(record, known, scanned_spans=1) is known
+
+    spans.append(MockSpan(operation="Job/TestJob"))
+    assert classifier.detail(record, known, scanned_spans=2) == OperationDetail(
+        name="TestJob", type=OperationType.JOB
+    )
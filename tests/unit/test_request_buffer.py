@@ -0,0 +1,113 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from scout_apm.core.tracked_request import TrackedRequest
+
+from scout_apm_logging.request_buffer import RequestBuffers, in_request
+
+
+def make_request(request_id):
+    return MagicMock(request_id=request_id, end_time=None)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_exports_requests_once_finished():
+    exported = []
+    flusher_threads = []
+    buffers = RequestBuffers(
+        lambda request, items: exported.append((request, items)),
+        on_flusher_start=lambda: flusher_threads.append(threading.current_thread()),
+    )
+    first, second = make_request("req-1"), make_request("req-2")
+
+    for i in range(3):
+        assert buffers.add(first, i)
+        assert buffers.add(second, i + 10)
+    assert len(buffers) == 6
+    time.sleep(0.2)
+    assert exported == []
+
+    first.end_time = time.time()
+    assert wait_for(lambda: exported == [(first, [0, 1, 2])])
+    assert len(buffers) == 3
+    assert flusher_threads[0] is not threading.current_thread()
+
+
+def test_in_request():
+    request = TrackedRequest()
+    # Made for code running outside of any request.
+    assert not in_request(request)
+
+    request.start_span(operation="Job/cleanup")
+    assert in_request(request)
+    request.stop_span()
+    assert in_request(request)
+
+    request = TrackedRequest()
+    request.is_real_request = True
+    assert in_request(request)
+
+
+def test_spills_full_requests():
+    exported = []
+    buffers = RequestBuffers(
+        lambda request, items: exported.append(items), max_records=2
+    )
+    request = make_request("req-1")
+
+    assert [buffers.add(request, i) for i in range(4)] == [True, True, False, False]
+    assert buffers.spilled == 2
+    buffers.flush()
+    assert exported == [[0, 1]]
+
+
+def test_spills_beyond_max_requests():
+    buffers = RequestBuffers(lambda request, items: None, max_requests=1)
+
+    assert buffers.add(make_request("req-1"), 0)
+    assert not buffers.add(make_request("req-2"), 0)
+    assert buffers.spilled == 1
+
+
+def test_exports_old_requests():
+    exported = []
+    buffers = RequestBuffers(
+        lambda request, items: exported.append(items), max_age=0.05
+    )
+
+    buffers.add(make_request("req-1"), 0)
+    assert wait_for(lambda: exported == [[0]])
+
+
+def test_flush_exports_unfinished_requests():
+    exported = []
+    buffers = RequestBuffers(lambda request, items: exported.append(items))
+
+    buffers.add(make_request("req-1"), 0)
+    buffers.add(make_request("req-2"), 1)
+    buffers.flush()
+
+    assert sorted(exported) == [[0], [1]]
+    assert len(buffers) == 0
+
+
+def test_failed_exports_are_counted():
+    def export(request, items):
+        raise RuntimeError("nope")
+
+    buffers = RequestBuffers(export)
+    request = make_request("req-1")
+    buffers.add(request, 0)
+    buffers.add(request, 1)
+    buffers.flush()
+
+    assert buffers.dropped == 2
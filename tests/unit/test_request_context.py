@@ -0,0 +1,153 @@
+import datetime as dt
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from scout_apm_logging.utils.request_context import RequestContext
+from scout_apm_logging.utils.tag_limits import TagLimits
+
+START_TIME = dt.datetime(2024, 3, 6, 12, 0, 0, tzinfo=dt.timezone.utc)
+
+
+@dataclass
+class MockSpan:
+    operation: str
+
+
+@dataclass
+class MockTrackedRequest:
+    request_id: str = "req-1"
+    start_time: dt.datetime = START_TIME
+    end_time: Optional[dt.datetime] = None
+    operation: Optional[str] = None
+    complete_spans: List[MockSpan] = field(default_factory=list)
+    tags: Dict[str, Any] = field(default_factory=dict)
+
+
+def test_attributes():
+    request = MockTrackedRequest(
+        operation="Controller/foobar",
+        end_time=START_TIME + dt.timedelta(seconds=2),
+        tags={"user": "alice"},
+    )
+    context = RequestContext(request)
+
+    assert context.attributes == {
+        "controller_entrypoint": "foobar",
+        "scout_transaction_id": "req-1",
+        "scout_start_time": "2024-03-06T12:00:00+00:00",
+        "scout_end_time": "2024-03-06T12:00:02+00:00",
+        "scout_duration": 2.0,
+        "scout_tag_user": "alice",
+    }
+
+
+def test_attributes_tag_limits():
+    request = MockTrackedRequest(tags={"user": "alice", "session": "x" * 100})
+    context = RequestContext(request, tag_limits=TagLimits(allow=["user"]))
+
+    assert context.attributes["scout_tag_user"] == "alice"
+    assert "scout_tag_session" not in context.attributes
+    # Changes are still spotted against the tags the request actually has.
+    assert context.matches(request)
+    request.tags["session"] = "y"
+    assert not context.matches(request)
+
+
+def test_tag_limits_applied_once_per_request():
+    limits = TagLimits(deny=["secret"])
+    request = MockTrackedRequest(tags={"user": "alice", "secret": "abc"})
+    context = RequestContext(request, tag_limits=limits)
+
+    # Rebuilt as spans complete, with the tags the request already had.
+    for i in range(5):
+        request.complete_spans.append(MockSpan(operation=f"SQL/Query{i}"))
+        context = RequestContext(request, previous=context, tag_limits=limits)
+    assert context.attributes["scout_tag_user"] == "alice"
+    assert limits.dropped_tags == 1
+
+    request.tags["plan"] = "pro"
+    context = RequestContext(request, previous=context, tag_limits=limits)
+    assert context.attributes["scout_tag_plan"] == "pro"
+    assert limits.dropped_tags == 2
+
+    other = MockTrackedRequest(request_id="req-2", tags={"secret": "def"})
+    RequestContext(other, previous=context, tag_limits=limits)
+    assert limits.dropped_tags == 3
+
+
+def test_attributes_unfinished_request():
+    context = RequestContext(MockTrackedRequest())
+
+    assert "scout_end_time" not in context.attributes
+    assert "scout_duration" not in context.attributes
+    assert "controller_entrypoint" not in context.attributes
+
+
+def test_matches_unchanged_request():
+    request = MockTrackedRequest(tags={"user": "alice"})
+    context = RequestContext(request)
+
+    assert context.matches(request)
+
+
+def test_matches_detects_changes():
+    request = MockTrackedRequest()
+    context = RequestContext(request)
+
+    request.complete_spans.append(MockSpan(operation="Controller/foobar"))
+    assert not context.matches(request)
+
+    context = RequestContext(request)
+    request.operation = "Controller/foobar"
+    assert not context.matches(request)
+
+    context = RequestContext(request)
+    request.tags["user"] = "alice"
+    assert not context.matches(request)
+
+    context = RequestContext(request)
+    request.tags["user"] = "bob"
+    assert not context.matches(request)
+
+    context = RequestContext(request)
+    request.end_time = START_TIME + dt.timedelta(seconds=1)
+    assert not context.matches(request)
+
+
+def test_matches_other_request():
+    context = RequestContext(MockTrackedRequest())
+
+    assert not context.matches(MockTrackedRequest(request_id="req-2"))
+
+
+def test_rebuilt_context_only_scans_new_spans():
+    request = MockTrackedRequest(
+        complete_spans=[MockSpan("Controller/foobar"), MockSpan("SQL/Query")]
+    )
+    context = RequestContext(request)
+    assert context.attributes["controller_entrypoint"] == "foobar"
+
+    # Spans already scanned aren't looked at again.
+    request.complete_spans[0] = MockSpan("Job/ignored")
+    request.complete_spans.append(MockSpan("SQL/Query"))
+    context = RequestContext(request, previous=context)
+    assert context.attributes["controller_entrypoint"] == "foobar"
+
+    request.complete_spans.append(MockSpan("Job/newer"))
+    context = RequestContext(request, previous=context)
+    assert context.attributes["job_entrypoint"] == "newer"
+    assert "controller_entrypoint" not in context.attributes
+
+
+def test_context_for_another_request_scans_all_spans():
+    context = RequestContext(
+        MockTrackedRequest(complete_spans=[MockSpan("Controller/foobar")])
+    )
+    request = MockTrackedRequest(
+        request_id="req-2",
+        complete_spans=[MockSpan("Job/other"), MockSpan("SQL/Query")],
+    )
+
+    context = RequestContext(request, previous=context)
+
+    assert context.attributes["job_entrypoint"] == "other"
@@ -0,0 +1,50 @@
+import os
+
+from scout_apm_logging.resource import create_resource, resource_attributes
+
+
+def test_resource_attributes():
+    nodename = os.uname().nodename
+
+    assert resource_attributes("test-service") == (
+        ("service.name", "test-service"),
+        ("service.instance.id", nodename),
+        ("host.name", nodename),
+    )
+    assert dict(
+        resource_attributes(
+            "test-service",
+            hostname="web-1",
+            environment="production",
+            revision_sha="abc123",
+            container_id="0123abcd",
+        )
+    ) == {
+        "service.name": "test-service",
+        "service.instance.id": nodename,
+        "host.name": "web-1",
+        "deployment.environment.name": "production",
+        "vcs.ref.head.revision": "abc123",
+        "container.id": "0123abcd",
+    }
+
+
+def test_resource_attributes_are_shared():
+    first = resource_attributes("test-service", environment="production")
+
+    assert resource_attributes("test-service", environment="production") is first
+    # Unset settings, however they're given, make the same attributes.
+    assert resource_attributes("test-service", revision_sha="") is (
+        resource_attributes("test-service", revision_sha=None)
+    )
+    assert resource_attributes("other-service") is not first
+
+
+def test_create_resource(monkeypatch):
+    monkeypatch.setenv("OTEL_RESOURCE_ATTRIBUTES", "service.name=from-env,team=logs")
+
+    resource = create_resource(resource_attributes("test-service"))
+
+    assert resource.attributes["service.name"] == "test-service"
+    assert resource.attributes["team"] == "logs"
+    assert resource.attributes["telemetry.sdk.language"] == "python"
@@ -0,0 +1,76 @@
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+
+from scout_apm_logging.routing import Route, Router, RoutingEmitter
+
+
+def test_route_matches_loggers_and_their_children():
+    route = Route("noisy", loggers=["app.noisy", "urllib3"])
+
+    assert route.matches("app.noisy", logging.INFO)
+    assert route.matches("app.noisy.poller", logging.DEBUG)
+    assert route.matches("urllib3", logging.WARNING)
+    assert not route.matches("app.noisyish", logging.INFO)
+    assert not route.matches("app", logging.INFO)
+
+
+def test_route_matches_levels():
+    route = Route("info", min_level="debug", max_level=logging.INFO)
+
+    assert route.matches("app", logging.DEBUG)
+    assert route.matches("app", logging.INFO)
+    assert not route.matches("app", logging.WARNING)
+    assert Route("all").matches("app", logging.NOTSET)
+
+
+def test_route_validation():
+    with pytest.raises(ValueError, match="Unknown level: loud"):
+        Route("loud", min_level="loud")
+    with pytest.raises(ValueError, match="Unknown transport: smtp"):
+        Route("mail", transport="smtp")
+    with pytest.raises(ValueError, match="Unknown export preset: fast"):
+        Route("fast", export_preset="fast")
+
+
+def test_route_export_settings():
+    route = Route("errors", export_preset="low-latency", batch_size=16)
+
+    assert route.export_settings.batch_size == 16
+    assert route.export_settings.schedule_delay == 200
+
+
+def test_router_picks_the_first_matching_route():
+    router = Router(
+        [
+            {"name": "errors", "min_level": "ERROR"},
+            Route("noisy", loggers="app.noisy"),
+        ]
+    )
+
+    assert router.index("app.noisy", logging.ERROR) == 0
+    assert router.index("app.noisy", logging.INFO) == 1
+    assert router.index("app", logging.INFO) is None
+
+
+def test_router_route_names_are_unique():
+    with pytest.raises(ValueError, match="unique"):
+        Router([{"name": "errors"}, {"name": "errors"}])
+
+
+def test_routing_emitter():
+    router = Router([{"name": "errors", "min_level": "ERROR"}])
+    errors, default = MagicMock(), MagicMock()
+    emitter = RoutingEmitter(router, [errors], default)
+    error = logging.makeLogRecord({"name": "app", "levelno": logging.ERROR})
+    info = logging.makeLogRecord({"name": "app", "levelno": logging.INFO})
+
+    emitter.emit(error, {"key": "value"}, "SQL/Query")
+    emitter.emit(info)
+    emitter.close()
+
+    errors.emit.assert_called_once_with(error, {"key": "value"}, "SQL/Query")
+    default.emit.assert_called_once_with(info, None, None)
+    errors.close.assert_called_once()
+    default.close.assert_called_once()
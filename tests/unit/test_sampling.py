@@ -0,0 +1,166 @@
+import logging
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scout_apm_logging.sampling import MAX_RATE_LIMIT_KEYS, LogSampler
+
+
+def make_record(name="app", level=logging.INFO, msg="Test message"):
+    return logging.LogRecord(
+        name=name,
+        level=level,
+        pathname="",
+        lineno=0,
+        msg=msg,
+        args=(),
+        exc_info=None,
+    )
+
+
+@patch("scout_apm_logging.sampling.random.random", return_value=0.5)
+def test_sample_rate_per_logger(mock_random):
+    sampler = LogSampler(sample_rates={"app.db": 0.1, "app.cache": 0.9})
+
+    assert not sampler.keep(make_record("app.db"))
+    assert not sampler.keep(make_record("app.db.queries"))
+    assert sampler.keep(make_record("app.cache"))
+    assert sampler.keep(make_record("app"))
+    assert sampler.sampled_out == 2
+
+
+@patch("scout_apm_logging.sampling.random.random", return_value=0.5)
+def test_sample_rate_per_level(mock_random):
+    sampler = LogSampler(sample_rates={"app": {"debug": 0.1}, "root": 0.2})
+
+    assert not sampler.keep(make_record("app", logging.DEBUG))
+    # INFO has no rate for "app", so it falls back to the root rate
+    assert not sampler.keep(make_record("app", logging.INFO))
+    assert not sampler.keep(make_record("other", logging.DEBUG))
+    assert sampler.sampled_out == 3
+
+
+@patch("scout_apm_logging.sampling.random.random", return_value=0.99)
+def test_keep_level_is_never_sampled(mock_random):
+    sampler = LogSampler(sample_rates={"": 0.0})
+
+    assert sampler.keep(make_record(level=logging.ERROR))
+    assert sampler.keep(make_record(level=logging.CRITICAL))
+    assert not sampler.keep(make_record(level=logging.WARNING))
+
+
+def test_errored_request_is_always_kept():
+    sampler = LogSampler(sample_rates={"": 0.0})
+    scout_request = MagicMock(tags={"error": "true"})
+
+    assert sampler.keep(make_record(), scout_request)
+    assert not sampler.keep(make_record(), MagicMock(tags={}))
+
+
+def test_rates_are_cached():
+    sampler = LogSampler(sample_rates={"app": 0.5})
+
+    with patch.object(
+        sampler, "_resolve_rate", wraps=sampler._resolve_rate
+    ) as mock_resolve:
+        for _ in range(3):
+            sampler.keep(make_record("app.views"))
+
+    mock_resolve.assert_called_once_with("app.views", logging.INFO)
+
+
+@patch("scout_apm_logging.sampling.time.monotonic")
+def test_rate_limit_per_template(mock_monotonic):
+    mock_monotonic.return_value = 100.0
+    sampler = LogSampler(rate_limit=1, rate_limit_burst=2)
+
+    kept = [sampler.keep(make_record(msg="retrying %s")) for _ in range(4)]
+    assert kept == [True, True, False, False]
+    # Another template has a bucket of its own
+    assert sampler.keep(make_record(msg="connected"))
+
+    mock_monotonic.return_value = 101.0
+    assert sampler.keep(make_record(msg="retrying %s"))
+    assert not sampler.keep(make_record(msg="retrying %s"))
+    assert sampler.rate_limited == 3
+
+
+def test_rate_limit_keys_are_bounded():
+    sampler = LogSampler(rate_limit=10)
+
+    for i in range(MAX_RATE_LIMIT_KEYS + 5):
+        sampler.keep(make_record(msg=f"message {i}"))
+
+    assert len(sampler._buckets) <= MAX_RATE_LIMIT_KEYS
+
+
+@patch("scout_apm_logging.sampling.time.monotonic")
+def test_pop_summary(mock_monotonic):
+    mock_monotonic.return_value = 0.0
+    sampler = LogSampler(sample_rates={"": 0.0}, summary_interval=60)
+    for _ in range(3):
+        sampler.keep(make_record())
+
+    assert sampler.pop_summary() is None
+
+    mock_monotonic.return_value = 60.0
+    summary = sampler.pop_summary()
+    assert summary.getMessage() == (
+        "Suppressed 3 log records (3 sampled out, 0 rate limited)"
+    )
+    assert summary.scout_suppressed_sampled == 3
+    assert summary.scout_suppressed_rate_limited == 0
+    assert sampler.sampled_out == 0
+
+    # Nothing was suppressed in the next interval
+    mock_monotonic.return_value = 120.0
+    assert sampler.pop_summary() is None
+
+
+@patch("scout_apm_logging.sampling.time.monotonic")
+def test_pop_summary_flush(mock_monotonic):
+    mock_monotonic.return_value = 0.0
+    sampler = LogSampler(sample_rates={"": 0.0}, summary_interval=60)
+    sampler.keep(make_record())
+
+    summary = sampler.pop_summary(flush=True)
+    assert summary.scout_suppressed_sampled == 1
+    assert sampler.pop_summary(flush=True) is None
+
+
+def test_counts_from_many_threads():
+    sampler = LogSampler(rate_limit=0.001, rate_limit_burst=100)
+    start = threading.Barrier(8)
+
+    def log():
+        start.wait()
+        for _ in range(1000):
+            sampler.keep(make_record(msg="retrying"))
+
+    threads = [threading.Thread(target=log) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each record either took one of the burst's tokens or was counted.
+    assert sampler.rate_limited == 8000 - 100
+
+
+@patch("scout_apm_logging.sampling.time.monotonic")
+def test_fractional_rate_limit(mock_monotonic):
+    mock_monotonic.return_value = 100.0
+    sampler = LogSampler(rate_limit=0.5)
+
+    assert sampler.rate_limit_burst == 1.0
+    kept = [sampler.keep(make_record(msg="retrying")) for _ in range(3)]
+    assert kept == [True, False, False]
+
+    mock_monotonic.return_value = 102.1
+    assert sampler.keep(make_record(msg="retrying"))
+
+
+def test_rate_limit_burst_below_one():
+    with pytest.raises(ValueError, match="rate_limit_burst"):
+        LogSampler(rate_limit=0.5, rate_limit_burst=0.5)
@@ -0,0 +1,376 @@
+import logging
+import os
+import socket
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+from scout_apm_logging.shipper import (
+    MAX_PENDING_BYTES,
+    LogShipper,
+    ShipperClient,
+    decode_record,
+    default_socket_path,
+    encode_record,
+    private_dir,
+    split_frames,
+)
+from scout_apm_logging.tracebacks import TracebackFormatter
+from tests.collector import StandInCollector, attributes
+
+
+def make_record(**extras):
+    record = logging.LogRecord(
+        name="test",
+        level=logging.WARNING,
+        pathname="/app/views.py",
+        lineno=12,
+        msg="Hello %s",
+        args=("world",),
+        exc_info=None,
+        func="index",
+    )
+    record.__dict__.update(extras)
+    return record
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # Unix socket paths have a short length limit, tmp_path can be too long.
+    path = f"/tmp/scout-logs-test-{os.getpid()}-{time.monotonic_ns()}.sock"
+    yield path
+    for leftover in (path, f"{path}.lock"):
+        if os.path.exists(leftover):
+            os.unlink(leftover)
+
+
+def test_default_socket_path():
+    path = default_socket_path("service", "key", "endpoint:4317")
+
+    assert path == default_socket_path("service", "key", "endpoint:4317")
+    assert path != default_socket_path("service", "other-key", "endpoint:4317")
+    assert path != default_socket_path("service", "key", "endpoint:4317", "staging")
+    assert path.endswith(".sock")
+    assert os.path.dirname(path) == private_dir()
+
+
+def test_private_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+
+    path = private_dir()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+    assert private_dir() == path
+
+    # One that others can get into isn't used.
+    os.chmod(path, 0o755)
+    with pytest.raises(PermissionError):
+        private_dir()
+
+
+def test_encode_decode_record():
+    record = make_record(scout_transaction_id="req-1", scout_duration=1.5)
+    record.__dict__["service.name"] = "test-service"
+    record.custom = object()
+
+    decoded = decode_record(split_frames(bytearray(encode_record(record)))[0])
+
+    assert decoded.name == "test"
+    assert decoded.levelno == logging.WARNING
+    assert decoded.levelname == "WARNING"
+    assert decoded.created == record.created
+    assert decoded.pathname == "/app/views.py"
+    assert decoded.funcName == "index"
+    assert decoded.lineno == 12
+    assert decoded.getMessage() == "Hello world"
+    assert decoded.scout_transaction_id == "req-1"
+    assert decoded.scout_duration == 1.5
+    assert getattr(decoded, "service.name") == "test-service"
+    assert decoded.custom == str(record.custom)
+
+
+def test_encode_decode_structured_record():
+    record = make_record(order={"id": 7, "skus": ["a", "b"]})
+
+    decoded = decode_record(
+        split_frames(bytearray(encode_record(record, structured=True)))[0]
+    )
+
+    assert decoded.getMessage() == "Hello %s"
+    assert decoded.scout_arg_0 == "world"
+    assert getattr(decoded, "order.id") == 7
+    assert getattr(decoded, "order.skus") == ["a", "b"]
+
+
+def test_encode_record_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record(exc_info=sys.exc_info())
+
+    decoded = decode_record(split_frames(bytearray(encode_record(record)))[0])
+
+    assert decoded.exc_info is None
+    assert getattr(decoded, "exception.type") == "ValueError"
+    assert getattr(decoded, "exception.message") == "boom"
+    assert "ValueError: boom" in getattr(decoded, "exception.stacktrace")
+
+
+def test_encode_record_exception_fingerprint():
+    tracebacks = TracebackFormatter(fingerprint_window=60)
+    records = []
+    for _ in range(2):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            records.append(make_record(exc_info=sys.exc_info()))
+
+    first, repeat = (
+        decode_record(
+            split_frames(bytearray(encode_record(record, tracebacks=tracebacks)))[0]
+        )
+        for record in records
+    )
+
+    assert "ValueError: boom" in getattr(first, "exception.stacktrace")
+    assert not hasattr(repeat, "exception.stacktrace")
+    assert repeat.scout_exception_fingerprint == first.scout_exception_fingerprint
+
+
+def test_split_frames():
+    frames = encode_record(make_record(index=1)) + encode_record(make_record(index=2))
+    buffer = bytearray(frames[:-5])
+
+    payloads = split_frames(buffer)
+
+    assert [decode_record(payload).index for payload in payloads] == [1]
+    assert len(buffer) > 0
+
+    buffer += frames[-5:]
+    assert [decode_record(payload).index for payload in split_frames(buffer)] == [2]
+    assert buffer == bytearray()
+
+
+def test_client_sends_records(socket_path):
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    client = ShipperClient(socket_path, "test-service", "key", "endpoint")
+
+    try:
+        client.emit(make_record())
+        connection, _ = listener.accept()
+        connection.settimeout(5)
+        buffer = bytearray()
+        while not (payloads := split_frames(buffer)):
+            buffer += connection.recv(65536)
+        assert decode_record(payloads[0]).getMessage() == "Hello world"
+        assert client.dropped == 0
+        connection.close()
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_client_reconnects_after_fork(socket_path):
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    listener.settimeout(5)
+    client = ShipperClient(socket_path, "test-service", "key", "endpoint")
+
+    try:
+        client.emit(make_record())
+        parent_connection, _ = listener.accept()
+
+        # As if the client had been inherited by a forked child
+        client._socket_pid = -1
+        client.emit(make_record())
+        child_connection, _ = listener.accept()
+
+        assert client._socket_pid == os.getpid()
+        parent_connection.close()
+        child_connection.close()
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_client_holds_pending_bytes_while_socket_is_full(socket_path):
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    client = ShipperClient(socket_path, "test-service", "key", "endpoint")
+    big = make_record(payload="x" * 64 * 1024)
+
+    try:
+        # Nothing reads from the connection, so the socket fills up.
+        while not client._pending:
+            client.emit(big)
+        while client.dropped == 0:
+            client.emit(big)
+        assert len(client._pending) <= MAX_PENDING_BYTES
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_client_drops_without_shipper(socket_path):
+    client = ShipperClient(
+        socket_path, "test-service", "key", "endpoint", spawn_shipper=False
+    )
+
+    client.emit(make_record())
+    client.close()
+
+    assert client.dropped == 1
+    assert client.shipper_process is None
+
+
+def test_only_one_shipper_acquires(socket_path):
+    first = LogShipper(socket_path, "test-service")
+    second = LogShipper(socket_path, "test-service")
+
+    try:
+        assert first.acquire()
+        assert not second.acquire()
+    finally:
+        first.release()
+
+    assert not os.path.exists(socket_path)
+    assert second.acquire()
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+    second.release()
+
+
+def test_lock_file_is_not_followed(socket_path, tmp_path):
+    target = tmp_path / "target"
+    target.write_text("keep")
+    os.symlink(target, f"{socket_path}.lock")
+    shipper = LogShipper(socket_path, "test-service")
+
+    with pytest.raises(OSError):
+        shipper.acquire()
+    assert target.read_text() == "keep"
+
+
+def test_client_holds_records_until_connected(socket_path):
+    client = ShipperClient(
+        socket_path, "test-service", "key", "endpoint", spawn_shipper=False
+    )
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        # As while a shipper is being started
+        for i in range(3):
+            client.emit(make_record(index=i))
+        assert client.dropped == 0
+
+        listener.bind(socket_path)
+        listener.listen()
+        listener.settimeout(5)
+        client.flush(5)
+        connection, _ = listener.accept()
+        connection.settimeout(5)
+        buffer = bytearray()
+        payloads = []
+        while len(payloads) < 3:
+            buffer += connection.recv(65536)
+            payloads += split_frames(buffer)
+        assert [decode_record(payload).index for payload in payloads] == [0, 1, 2]
+        connection.close()
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_client_starts_shipper(socket_path, monkeypatch):
+    monkeypatch.setenv("OTEL_BLRP_SCHEDULE_DELAY", "50")
+    with StandInCollector() as collector:
+        client = ShipperClient(
+            socket_path, "test-service", "test-ingest-key", collector.endpoint
+        )
+        try:
+            # Nobody is listening yet, so this record starts the shipper, and
+            # is held until it's listening.
+            client.emit(make_record(scout_transaction_id="first"))
+            assert client.shipper_process is not None
+            assert wait_for(lambda: os.path.exists(socket_path))
+
+            for i in range(10):
+                client.emit(make_record(scout_transaction_id=f"req-{i}"))
+
+            assert collector.wait_for_records(11)
+            assert client.dropped == 0
+        finally:
+            client.close()
+            if client.shipper_process:
+                client.shipper_process.terminate()
+                client.shipper_process.wait(10)
+
+    exported = collector.records[:11]
+    assert [attributes(r)["scout_transaction_id"] for r in exported] == ["first"] + [
+        f"req-{i}" for i in range(10)
+    ]
+    assert exported[0].body.string_value == "Hello world"
+    assert not os.path.exists(socket_path)
+
+
+def test_shipper_stays_up_for_connected_workers(socket_path, monkeypatch):
+    monkeypatch.setenv("OTEL_BLRP_SCHEDULE_DELAY", "50")
+    with StandInCollector() as collector:
+        env = dict(
+            os.environ,
+            SCOUT_LOGS_INGEST_KEY="test-ingest-key",
+            SCOUT_LOGS_REPORTING_ENDPOINT=collector.endpoint,
+        )
+        shipper = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "scout_apm_logging.shipper",
+                socket_path,
+                "--service-name",
+                "test-service",
+                "--idle-timeout",
+                "0.5",
+            ],
+            env=env,
+        )
+        client = ShipperClient(
+            socket_path, "test-service", "key", "endpoint", spawn_shipper=False
+        )
+        try:
+            assert wait_for(lambda: os.path.exists(socket_path))
+            client.emit(make_record(step="one"))
+            assert collector.wait_for_records(1)
+
+            # Well past the idle timeout, with the worker still connected
+            time.sleep(1.5)
+            assert shipper.poll() is None
+            client.emit(make_record(step="two"))
+            client.emit(make_record(step="three"))
+            assert collector.wait_for_records(3)
+            assert client.dropped == 0
+        finally:
+            client.close()
+
+        # Once the worker's gone it does idle out.
+        assert shipper.wait(10) == 0
+
+    assert [attributes(r)["step"] for r in collector.records] == [
+        "one",
+        "two",
+        "three",
+    ]
@@ -0,0 +1,183 @@
+import logging
+import os
+import time
+
+import pytest
+from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+
+from scout_apm_logging.spool import SegmentSpool
+from scout_apm_logging.spool_exporter import SpoolingLogExporter
+from scout_apm_logging.transport import create_log_exporter
+from tests.collector import StandInCollector, StandInHTTPCollector
+
+COLLECTORS = {"grpc": StandInCollector, "http": StandInHTTPCollector}
+
+
+def drain(spool):
+    payloads = []
+    while (entry := spool.peek()) is not None:
+        position, payload = entry
+        payloads.append(payload)
+        spool.commit(position)
+    return payloads
+
+
+def test_spool_is_first_in_first_out(tmp_path):
+    spool = SegmentSpool(str(tmp_path), segment_bytes=64)
+    payloads = [f"batch {i}".encode() for i in range(20)]
+    for payload in payloads:
+        assert spool.append(payload)
+
+    assert len(spool) == 20
+    assert len(os.listdir(tmp_path)) > 2
+    assert drain(spool) == payloads
+    assert len(spool) == 0
+    spool.close()
+
+
+def test_spool_picks_up_where_it_left_off(tmp_path):
+    spool = SegmentSpool(str(tmp_path), segment_bytes=64)
+    for i in range(10):
+        spool.append(f"batch {i}".encode())
+    for _ in range(3):
+        position, _ = spool.peek()
+        spool.commit(position)
+    spool.close()
+
+    spool = SegmentSpool(str(tmp_path), segment_bytes=64)
+    assert drain(spool) == [f"batch {i}".encode() for i in range(3, 10)]
+    spool.close()
+
+
+def test_spool_drops_oldest_past_max_bytes(tmp_path):
+    spool = SegmentSpool(str(tmp_path), max_bytes=1024, segment_bytes=256)
+    for i in range(200):
+        spool.append(f"batch {i:03}".encode())
+
+    segment_bytes = sum(
+        os.path.getsize(tmp_path / name)
+        for name in os.listdir(tmp_path)
+        if name.endswith(".seg")
+    )
+    assert segment_bytes <= 1024
+    assert spool.dropped > 0
+    assert len(spool) + spool.dropped == 200
+    assert drain(spool)[-1] == b"batch 199"
+    spool.close()
+
+
+def test_spool_drops_batch_larger_than_max_bytes(tmp_path):
+    spool = SegmentSpool(str(tmp_path), max_bytes=1024)
+
+    assert not spool.append(b"x" * 2048)
+    assert spool.dropped == 1
+    assert len(spool) == 0
+    spool.close()
+
+
+def test_spool_commit_skips_dropped_batch(tmp_path):
+    spool = SegmentSpool(str(tmp_path), max_bytes=256, segment_bytes=128)
+    spool.append(b"first")
+    position, _ = spool.peek()
+    # Fills the spool so the first segment is dropped while it's being sent.
+    for i in range(20):
+        spool.append(f"batch {i:02}".encode())
+
+    remaining = len(spool)
+    spool.commit(position)
+    assert len(spool) == remaining
+    spool.close()
+
+
+def test_claim_uses_a_free_slot(tmp_path):
+    first = SegmentSpool.claim(str(tmp_path))
+    second = SegmentSpool.claim(str(tmp_path))
+
+    assert first.directory == str(tmp_path / "0")
+    assert second.directory == str(tmp_path / "1")
+    first.close()
+    second.close()
+
+
+def make_provider(transport, collector, spool):
+    exporter = SpoolingLogExporter(
+        create_log_exporter(transport, collector.endpoint, {}, timeout=1),
+        spool,
+        min_backoff=0.05,
+        max_backoff=0.2,
+    )
+    provider = LoggerProvider()
+    provider.add_log_record_processor(BatchLogRecordProcessor(exporter))
+    logger = logging.getLogger("test_spool")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in logger.handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(LoggingHandler(logger_provider=provider))
+    return provider, logger, exporter
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("transport", COLLECTORS)
+def test_spooled_batches_are_sent_once_collector_is_back(tmp_path, transport):
+    with COLLECTORS[transport]() as collector:
+        collector.available = False
+        provider, logger, exporter = make_provider(
+            transport, collector, SegmentSpool(str(tmp_path))
+        )
+        try:
+            for i in range(50):
+                logger.info("record %s", i)
+            provider.force_flush()
+            assert len(exporter.spool) > 0
+            assert not collector.records
+
+            collector.available = True
+            assert collector.wait_for_records(50)
+            deadline = time.monotonic() + 5
+            while len(exporter.spool) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(exporter.spool) == 0
+
+            # With the spool empty, batches go straight out again.
+            logger.info("after")
+            provider.force_flush()
+            assert collector.wait_for_records(51)
+        finally:
+            provider.shutdown()
+
+    bodies = [record.body.string_value for record in collector.records]
+    assert bodies == [f"record {i}" for i in range(50)] + ["after"]
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_outage_loss_is_bounded_by_max_bytes(tmp_path):
+    with StandInCollector() as collector:
+        collector.available = False
+        spool = SegmentSpool(str(tmp_path), max_bytes=16384, segment_bytes=4096)
+        provider, logger, exporter = make_provider("grpc", collector, spool)
+        try:
+            for i in range(2000):
+                logger.info("record %s %s", i, "x" * 100)
+                if i % 10 == 0:
+                    provider.force_flush()
+            provider.force_flush()
+            assert spool.size_bytes <= 16384
+            assert spool.dropped > 0
+            spooled = len(spool)
+
+            collector.available = True
+            assert collector.wait_for_records(1)
+            deadline = time.monotonic() + 5
+            while len(spool) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(spool) == 0
+        finally:
+            provider.shutdown()
+
+    # Plus the batch that may have been in flight when its segment was dropped
+    assert spooled <= collector.export_calls <= spooled + 1
+    # What survived is the most recent part of the outage.
+    bodies = {record.body.string_value.split()[1] for record in collector.records}
+    assert "1999" in bodies
@@ -0,0 +1,98 @@
+from scout_apm_logging.utils.tag_limits import TRUNCATED, TagLimits
+
+
+def test_no_limits():
+    tags = {"user": "alice", "path": "/" * 1000}
+    limits = TagLimits()
+
+    assert limits.apply(tags) == tags
+    assert limits.dropped_tags == 0
+    assert limits.truncated_values == 0
+
+
+def test_max_tags_keeps_the_first_set():
+    tags = {f"tag{i}": i for i in range(10_000)}
+    limits = TagLimits(max_tags=3)
+
+    assert limits.apply(tags) == {"tag0": 0, "tag1": 1, "tag2": 2}
+    assert limits.dropped_tags == 9_997
+
+
+def test_max_value_length():
+    limits = TagLimits(max_value_length=10)
+
+    limited = limits.apply({"long": "x" * 1_000_000, "short": "abc", "number": 10**20})
+
+    assert limited["long"] == "x" * 7 + TRUNCATED
+    assert limited["short"] == "abc"
+    # Numbers are kept as they are.
+    assert limited["number"] == 10**20
+    assert limits.truncated_values == 1
+
+
+def test_max_value_length_shorter_than_marker():
+    limits = TagLimits(max_value_length=2)
+
+    assert limits.apply({"long": "abcdef", "short": "ab"}) == {
+        "long": "ab",
+        "short": "ab",
+    }
+    assert limits.truncated_values == 1
+
+
+def test_max_value_length_non_string_values():
+    limits = TagLimits(max_value_length=10)
+
+    limited = limits.apply(
+        {
+            "list": ["x" * 100, "y"],
+            "dict": {"key": "x" * 100},
+            "bytes": b"x" * 100,
+            "object": object(),
+            "short_list": [1, 2],
+            "flag": True,
+        }
+    )
+
+    assert all(
+        isinstance(value, str) and len(value) == 10
+        for key, value in limited.items()
+        if key not in ("short_list", "flag")
+    )
+    assert limited["list"] == "('xxxxx" + TRUNCATED
+    assert limited["short_list"] == (1, 2)
+    assert limited["flag"] is True
+    assert limits.truncated_values == 4
+
+
+def test_allow_and_deny():
+    limits = TagLimits(allow=["user*", "path"], deny=["user.email"])
+
+    limited = limits.apply(
+        {"user.id": 1, "user.email": "a@b.c", "path": "/", "pathological": "x"}
+    )
+
+    assert limited == {"user.id": 1, "path": "/"}
+    assert limits.dropped_tags == 2
+
+
+def test_single_pattern_string():
+    limits = TagLimits(deny="secret*")
+
+    assert limits.apply({"secret_key": "k", "user": "u"}) == {"user": "u"}
+
+
+def test_denied_tags_do_not_count_towards_max_tags():
+    limits = TagLimits(max_tags=2, deny=["noise*"])
+
+    tags = {f"noise{i}": i for i in range(100)}
+    tags.update({"user": 1, "path": 2, "extra": 3})
+
+    assert limits.apply(tags) == {"user": 1, "path": 2}
+    assert limits.dropped_tags == 101
+
+
+def test_non_string_keys():
+    limits = TagLimits(allow=["1*"])
+
+    assert limits.apply({1: "a", 12: "b", 2: "c"}) == {1: "a", 12: "b"}
@@ -0,0 +1,182 @@
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from scout_apm_logging.handler import ScoutOtelHandler
+from scout_apm_logging.telemetry import (
+    LATENCY_BOUNDS,
+    Counters,
+    ExportTelemetry,
+    Histogram,
+    register_metrics,
+)
+from scout_apm_logging.telemetry_exporter import (
+    InstrumentedLogExporter,
+    LogRecordExportResult,
+)
+from tests.collector import StandInCollector, StandInHTTPCollector
+
+
+def make_record(**fields):
+    return logging.makeLogRecord(
+        {"levelno": logging.INFO, "levelname": "INFO", **fields}
+    )
+
+
+def test_histogram():
+    histogram = Histogram((1, 2, 4, 8))
+    for value in [1] * 50 + [3] * 40 + [7] * 9 + [20]:
+        histogram.record(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["count"] == 100
+    assert snapshot["sum"] == 50 + 120 + 63 + 20
+    assert snapshot["max"] == 20
+    assert snapshot["p50"] == 1
+    assert snapshot["p90"] == 4
+    assert snapshot["p99"] == 8
+
+
+def test_histogram_past_last_bound():
+    histogram = Histogram((1, 2))
+    histogram.record(5)
+
+    assert histogram.snapshot()["p50"] == 5
+
+
+def test_empty_histogram():
+    snapshot = Histogram(LATENCY_BOUNDS).snapshot()
+
+    assert snapshot["count"] == 0
+    assert snapshot["mean"] == 0.0
+    assert snapshot["p99"] == 0.0
+
+
+def test_counters():
+    counters = Counters()
+    counters.add("handled")
+    counters.add("handled", 2)
+
+    assert counters.snapshot() == {"handled": 3}
+
+
+def test_instrumented_exporter():
+    telemetry = ExportTelemetry()
+    exporter = MagicMock()
+    exporter.export.side_effect = [
+        LogRecordExportResult.SUCCESS,
+        LogRecordExportResult.FAILURE,
+        RuntimeError("boom"),
+    ]
+    instrumented = InstrumentedLogExporter(exporter, telemetry)
+
+    instrumented.export([1, 2, 3])
+    instrumented.export([1])
+    with pytest.raises(RuntimeError):
+        instrumented.export([1, 2])
+
+    snapshot = telemetry.snapshot()
+    assert snapshot["records_exported"] == 3
+    assert snapshot["records_failed"] == 3
+    assert snapshot["batch_size"]["count"] == 3
+    assert snapshot["duration_seconds"]["count"] == 3
+
+
+def test_register_metrics():
+    reader = InMemoryMetricReader()
+    stats = {
+        "enrichment_seconds": {"count": 1, "p99": 0.001},
+        "records": {"handled": 5, "suppressed": 2},
+        "queue_depth": 3,
+        "export": {"records_exported": 3, "bytes_sent": 100},
+    }
+
+    register_metrics(lambda: stats, MeterProvider(metric_readers=[reader]))
+
+    points = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                for point in metric.data.data_points:
+                    key = tuple(sorted(point.attributes.items()))
+                    points[(metric.name, key)] = point.value
+    assert points[("scout_logs.records", (("outcome", "handled"),))] == 5
+    assert points[("scout_logs.records", (("outcome", "exported"),))] == 3
+    assert points[("scout_logs.bytes_sent", ())] == 100
+    assert points[("scout_logs.queue_depth", ())] == 3
+    assert points[("scout_logs.duration.p99", (("stage", "enrichment"),))] == 0.001
+
+
+def test_stats_without_telemetry():
+    assert ScoutOtelHandler(service_name="test-service").stats() == {}
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+@patch("scout_apm_logging.handler.TrackedRequest")
+def test_stats_counts_records(mock_tracked_request, async_mode):
+    mock_tracked_request.instance.return_value = None
+    handler = ScoutOtelHandler(
+        service_name="test-service",
+        async_mode=async_mode,
+        sample_rates={"noisy": 0.0},
+        dedup_window=60,
+        telemetry=True,
+    )
+
+    with patch.object(ScoutOtelHandler, "otel_handler"):
+        for name in ("app", "app", "noisy"):
+            handler.handle(make_record(name=name, msg="hello"))
+        if handler.log_queue is not None:
+            handler.log_queue.flush(5)
+        stats = handler.stats()
+
+    assert stats["records"] == {
+        "handled": 3,
+        "suppressed": 1,
+        "collapsed": 1,
+        "converted": 1,
+        **({"queue_dropped": 0} if async_mode else {}),
+    }
+    assert stats["enrichment_seconds"]["count"] == 1
+    assert stats["conversion_seconds"]["count"] == 1
+    assert ("queue_depth" in stats) == async_mode
+
+
+@pytest.mark.parametrize(
+    "collector_class", [StandInCollector, StandInHTTPCollector], ids=["grpc", "http"]
+)
+def test_stats_export(monkeypatch, collector_class):
+    monkeypatch.setenv("OTEL_BLRP_SCHEDULE_DELAY", "50")
+    ScoutOtelHandler.otel_handler = None
+    transport = "grpc" if collector_class is StandInCollector else "http"
+
+    with (
+        collector_class() as collector,
+        patch("scout_apm_logging.handler.scout_config") as mock_scout_config,
+    ):
+        mock_scout_config.value.side_effect = {
+            "logs_ingest_key": "test-ingest-key",
+            "logs_reporting_endpoint": collector.endpoint,
+        }.get
+        handler = ScoutOtelHandler(
+            service_name="test-service", transport=transport, telemetry=True
+        )
+        for i in range(10):
+            handler.emit(make_record(msg="record %s", args=(i,)))
+        provider = ScoutOtelHandler._logger_provider
+        provider.force_flush()
+        assert collector.wait_for_records(10)
+        export = handler.stats()["export"]
+
+    ScoutOtelHandler.otel_handler = None
+    ScoutOtelHandler._export_telemetry = None
+    provider.shutdown()
+
+    assert export["records_exported"] == 10
+    assert "records_failed" not in export
+    assert export["batch_size"]["sum"] == 10
+    assert export["bytes_sent"] > 0
@@ -0,0 +1,115 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from scout_apm_logging.thread_buffer import ThreadBuffers
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_exports_full_buffers():
+    items = []
+    buffers = ThreadBuffers(items.append, size=3, interval=60)
+
+    for i in range(7):
+        buffers.add(i)
+
+    assert items == [0, 1, 2, 3, 4, 5]
+    assert len(buffers) == 1
+    buffers.flush()
+    assert items == list(range(7))
+    assert len(buffers) == 0
+
+
+def test_buffers_are_per_thread():
+    items = []
+    buffers = ThreadBuffers(items.append, size=100, interval=60)
+
+    def log(name):
+        for i in range(10):
+            buffers.add((name, i))
+
+    threads = [threading.Thread(target=log, args=(name,)) for name in "abc"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert items == []
+    assert len(buffers) == 30
+    buffers.flush()
+    for name in "abc":
+        assert [i for n, i in items if n == name] == list(range(10))
+
+
+def test_exports_on_next_request():
+    items = []
+    buffers = ThreadBuffers(items.append, size=100, interval=60)
+    first, second = MagicMock(end_time=None), MagicMock(end_time=None)
+
+    buffers.add(1, first)
+    buffers.add(2, first)
+    assert items == []
+    buffers.add(3, second)
+    assert items == [1, 2]
+
+
+def test_flusher_exports_finished_requests():
+    items = []
+    buffers = ThreadBuffers(items.append, size=100, interval=60)
+    request = MagicMock(end_time=None)
+
+    buffers.add(1, request)
+    time.sleep(0.2)
+    assert items == []
+    request.end_time = time.time()
+    assert wait_for(lambda: items == [1])
+
+
+def test_flusher_exports_old_buffers():
+    items = []
+    flusher_threads = []
+    buffers = ThreadBuffers(
+        items.append,
+        size=100,
+        interval=0.05,
+        on_flusher_start=lambda: flusher_threads.append(threading.current_thread()),
+    )
+
+    buffers.add(1)
+    assert wait_for(lambda: items == [1])
+    assert flusher_threads[0] is not threading.current_thread()
+
+
+def test_flusher_exports_buffers_of_finished_threads():
+    items = []
+    buffers = ThreadBuffers(items.append, size=100, interval=60)
+
+    thread = threading.Thread(target=buffers.add, args=(1,))
+    thread.start()
+    thread.join()
+
+    assert wait_for(lambda: items == [1])
+    assert wait_for(lambda: not buffers._buffers)
+
+
+def test_failed_items_are_counted():
+    def consume(item):
+        if item == 1:
+            raise RuntimeError("nope")
+        items.append(item)
+
+    items = []
+    buffers = ThreadBuffers(consume, size=3, interval=60)
+    for i in range(3):
+        buffers.add(i)
+
+    assert items == [0, 2]
+    assert buffers.dropped == 1
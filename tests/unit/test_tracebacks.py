@@ -0,0 +1,113 @@
+import sys
+from unittest.mock import patch
+
+from scout_apm_logging.tracebacks import (
+    EXCEPTION_FINGERPRINT,
+    EXCEPTION_MESSAGE,
+    EXCEPTION_STACKTRACE,
+    EXCEPTION_TYPE,
+    TRUNCATED,
+    TracebackFormatter,
+    fingerprint,
+)
+
+
+def recurse(depth, message="bad value"):
+    if depth:
+        recurse(depth - 1, message)
+    raise ValueError(message)
+
+
+def exc_info_of(function, *args):
+    try:
+        function(*args)
+    except Exception:
+        return sys.exc_info()
+
+
+def raise_from(message):
+    try:
+        recurse(0, message)
+    except ValueError as exc:
+        raise RuntimeError("wrapped") from exc
+
+
+def test_fingerprint():
+    first = fingerprint(exc_info_of(recurse, 3))
+
+    # Messages and locals don't matter, only where it was raised from.
+    assert fingerprint(exc_info_of(recurse, 3, "other value")) == first
+    assert fingerprint(exc_info_of(recurse, 4)) != first
+    assert len(first) == 16
+
+
+def test_fingerprint_includes_the_cause():
+    assert fingerprint(exc_info_of(raise_from, "a")) == fingerprint(
+        exc_info_of(raise_from, "b")
+    )
+    assert fingerprint(exc_info_of(raise_from, "a")) != fingerprint(
+        exc_info_of(recurse, 0)
+    )
+
+
+def test_attributes():
+    attributes = TracebackFormatter().attributes(exc_info_of(recurse, 2))
+
+    assert attributes[EXCEPTION_TYPE] == "ValueError"
+    assert attributes[EXCEPTION_MESSAGE] == "bad value"
+    assert attributes[EXCEPTION_STACKTRACE].startswith("Traceback")
+    assert attributes[EXCEPTION_STACKTRACE].count("in recurse") == 3
+    assert EXCEPTION_FINGERPRINT not in attributes
+
+
+def test_max_frames():
+    formatter = TracebackFormatter(max_frames=2)
+
+    stacktrace = formatter.stacktrace(exc_info_of(recurse, 10))
+
+    assert stacktrace.count("File ") == 2
+    assert stacktrace.endswith("ValueError: bad value\n")
+
+
+def test_max_length():
+    formatter = TracebackFormatter(max_length=100)
+
+    stacktrace = formatter.stacktrace(exc_info_of(recurse, 10))
+
+    assert len(stacktrace) == 100
+    assert stacktrace.startswith(TRUNCATED)
+    assert stacktrace.endswith("ValueError: bad value\n")
+
+
+def test_fingerprint_window():
+    formatter = TracebackFormatter(fingerprint_window=60)
+    exc_info = exc_info_of(recurse, 2)
+
+    with patch("scout_apm_logging.tracebacks.time.monotonic", return_value=0):
+        first = formatter.attributes(exc_info)
+        repeat = formatter.attributes(exc_info_of(recurse, 2, "other value"))
+        other = formatter.attributes(exc_info_of(recurse, 3))
+    with patch("scout_apm_logging.tracebacks.time.monotonic", return_value=61):
+        later = formatter.attributes(exc_info)
+
+    assert EXCEPTION_STACKTRACE in first
+    assert EXCEPTION_STACKTRACE not in repeat
+    assert repeat[EXCEPTION_FINGERPRINT] == first[EXCEPTION_FINGERPRINT]
+    assert repeat[EXCEPTION_MESSAGE] == "other value"
+    assert EXCEPTION_STACKTRACE in other
+    assert EXCEPTION_STACKTRACE in later
+
+
+def test_fingerprints_are_bounded():
+    formatter = TracebackFormatter(fingerprint_window=60, max_fingerprints=1)
+
+    for depth in (1, 2, 1):
+        assert EXCEPTION_STACKTRACE in formatter.attributes(exc_info_of(recurse, depth))
+
+
+def test_formatter_fingerprint_is_the_stable_one():
+    formatter = TracebackFormatter(fingerprint_window=60)
+    exc_info = exc_info_of(raise_from, "a")
+
+    assert formatter.fingerprint(exc_info) == fingerprint(exc_info)
+    assert formatter.fingerprint(exc_info_of(raise_from, "b")) == fingerprint(exc_info)
@@ -0,0 +1,164 @@
+import logging
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+from opentelemetry._logs import SeverityNumber
+from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+from opentelemetry.sdk._logs.export import SimpleLogRecordProcessor
+
+try:
+    from opentelemetry.sdk._logs.export import InMemoryLogRecordExporter
+except ImportError:  # opentelemetry-sdk < 1.38
+    from opentelemetry.sdk._logs.export import (  # type: ignore[attr-defined,no-redef]
+        InMemoryLogExporter as InMemoryLogRecordExporter,
+    )
+
+from scout_apm_logging.tracebacks import (
+    EXCEPTION_MESSAGE,
+    EXCEPTION_STACKTRACE,
+    EXCEPTION_TYPE,
+)
+from scout_apm_logging.translate import (
+    CODE_FILE_PATH,
+    CODE_FUNCTION_NAME,
+    CODE_LINE_NUMBER,
+    OtelLogEmitter,
+    record_body,
+    severity_number,
+)
+
+
+def make_record(**extras):
+    record = logging.LogRecord(
+        name="test",
+        level=logging.WARNING,
+        pathname="/app/views.py",
+        lineno=12,
+        msg="Hello %s",
+        args=("world",),
+        exc_info=None,
+        func="index",
+    )
+    record.__dict__.update(extras)
+    return record
+
+
+@pytest.fixture
+def exported():
+    exporter = InMemoryLogRecordExporter()
+    provider = LoggerProvider()
+    provider.add_log_record_processor(SimpleLogRecordProcessor(exporter))
+    emitter = OtelLogEmitter(provider)
+
+    def emit(record, *args):
+        emitter.emit(record, *args)
+        [log_data] = exporter.get_finished_logs()
+        exporter.clear()
+        return log_data.log_record
+
+    yield emit
+    provider.shutdown()
+
+
+@pytest.mark.parametrize(
+    "levelno, expected",
+    [
+        (0, SeverityNumber.UNSPECIFIED),
+        (logging.DEBUG, SeverityNumber.DEBUG),
+        (logging.INFO, SeverityNumber.INFO),
+        (logging.INFO + 1, SeverityNumber.INFO2),
+        (logging.INFO + 7, SeverityNumber.INFO4),
+        (logging.WARNING, SeverityNumber.WARN),
+        (logging.ERROR, SeverityNumber.ERROR),
+        (logging.CRITICAL, SeverityNumber.FATAL),
+        (100, SeverityNumber.FATAL4),
+    ],
+)
+def test_severity_number(levelno, expected):
+    assert severity_number(levelno) == expected
+
+
+def test_record_body():
+    assert record_body(make_record()) == "Hello world"
+    assert record_body(make_record(msg={"event": "login"}, args=())) == {
+        "event": "login"
+    }
+    assert record_body(make_record(msg=ValueError("bad"), args=())) == "bad"
+
+
+def test_emit(exported):
+    record = make_record(user_id=5)
+
+    log_record = exported(record, {"scout_transaction_id": "req-1"}, "SQL/Query")
+
+    assert log_record.body == "Hello world"
+    assert log_record.severity_number == SeverityNumber.WARN
+    assert log_record.severity_text == "WARN"
+    assert log_record.timestamp == int(record.created * 1e9)
+    assert dict(log_record.attributes) == {
+        "user_id": 5,
+        CODE_FILE_PATH: "/app/views.py",
+        CODE_FUNCTION_NAME: "index",
+        CODE_LINE_NUMBER: 12,
+        "scout_transaction_id": "req-1",
+        "scout_current_operation": "SQL/Query",
+    }
+
+
+def test_emit_leaves_record_alone(exported):
+    record = make_record()
+    before = dict(vars(record))
+
+    exported(record, {"scout_transaction_id": "req-1"}, "SQL/Query")
+
+    assert vars(record) == before
+
+
+def test_emit_exception(exported):
+    try:
+        raise ValueError("bad value")
+    except ValueError:
+        record = make_record(exc_info=sys.exc_info())
+
+    attributes = exported(record).attributes
+
+    assert attributes[EXCEPTION_TYPE] == "ValueError"
+    assert attributes[EXCEPTION_MESSAGE] == "bad value"
+    assert "raise ValueError" in attributes[EXCEPTION_STACKTRACE]
+
+
+def test_emit_structured():
+    exporter = InMemoryLogRecordExporter()
+    provider = LoggerProvider()
+    provider.add_log_record_processor(SimpleLogRecordProcessor(exporter))
+    record = make_record(user={"id": 5})
+    record.getMessage = MagicMock()  # type: ignore[method-assign]
+
+    OtelLogEmitter(provider, structured=True).emit(record, None, None)
+
+    [log_data] = exporter.get_finished_logs()
+    assert log_data.log_record.body == "Hello %s"
+    assert log_data.log_record.attributes["scout_arg_0"] == "world"
+    assert log_data.log_record.attributes["user.id"] == 5
+    record.getMessage.assert_not_called()
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_emit_matches_logging_handler(exported):
+    exporter = InMemoryLogRecordExporter()
+    provider = LoggerProvider()
+    provider.add_log_record_processor(SimpleLogRecordProcessor(exporter))
+    record = make_record(user_id=5)
+
+    LoggingHandler(logger_provider=provider).emit(record)
+    [expected] = exporter.get_finished_logs()
+    expected = expected.log_record
+    log_record = exported(record)
+
+    assert log_record.body == expected.body
+    assert log_record.severity_number == expected.severity_number
+    assert log_record.severity_text == expected.severity_text
+    assert log_record.timestamp == expected.timestamp
+    assert log_record.attributes["user_id"] == expected.attributes["user_id"]
+    assert log_record.attributes[CODE_LINE_NUMBER] == 12
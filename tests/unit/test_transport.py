@@ -0,0 +1,111 @@
+import logging
+import subprocess
+import sys
+
+import pytest
+from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+from opentelemetry.sdk._logs.export import SimpleLogRecordProcessor
+
+from scout_apm_logging.otlp_grpc import GrpcLogExporter
+from scout_apm_logging.otlp_http import HttpLogExporter, logs_url
+from scout_apm_logging.transport import create_log_exporter
+from tests.collector import StandInCollector, StandInHTTPCollector
+
+
+def test_create_log_exporter():
+    grpc_exporter = create_log_exporter("grpc", "localhost:4317", {})
+    http_exporter = create_log_exporter("http", "localhost:4318", {})
+
+    assert isinstance(grpc_exporter, GrpcLogExporter)
+    assert isinstance(http_exporter, HttpLogExporter)
+    grpc_exporter.shutdown()
+    http_exporter.shutdown()
+
+
+def test_create_log_exporter_unknown_transport():
+    with pytest.raises(ValueError, match="Unknown transport: udp"):
+        create_log_exporter("udp", "localhost:4317", {})
+
+
+@pytest.mark.parametrize(
+    "endpoint, url",
+    [
+        ("otlp.example.com:4318", "https://otlp.example.com:4318/v1/logs"),
+        ("http://localhost:4318/", "http://localhost:4318/v1/logs"),
+        (
+            "https://otlp.example.com/custom/logs",
+            "https://otlp.example.com/custom/logs",
+        ),
+    ],
+)
+def test_logs_url(endpoint, url):
+    assert logs_url(endpoint) == url
+
+
+def test_http_transport_does_not_import_grpc():
+    code = (
+        "import sys\n"
+        "from scout_apm_logging.handler import ScoutOtelHandler\n"
+        "from scout_apm_logging.transport import create_log_exporter\n"
+        "create_log_exporter('http', 'localhost:4318', {})\n"
+        "assert 'grpc' not in sys.modules, 'grpc was imported'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_http_exporter(compression):
+    with StandInHTTPCollector() as collector:
+        exporter = HttpLogExporter(
+            collector.endpoint, {"x-scout-key": "key"}, compression=compression
+        )
+        provider = LoggerProvider()
+        provider.add_log_record_processor(SimpleLogRecordProcessor(exporter))
+        handler = LoggingHandler(logger_provider=provider)
+        for i in range(3):
+            handler.emit(
+                logging.makeLogRecord(
+                    {"msg": f"record {i}", "levelno": logging.INFO, "levelname": "INFO"}
+                )
+            )
+        provider.shutdown()
+
+    bodies = [record.body.string_value for record in collector.records]
+    assert bodies == ["record 0", "record 1", "record 2"]
+    # One connection was kept alive for every export.
+    assert collector.connections == 1
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+@pytest.mark.parametrize(
+    "collector_class", [StandInCollector, StandInHTTPCollector], ids=["grpc", "http"]
+)
+def test_bytes_sent(collector_class, compression):
+    exporter_class = (
+        GrpcLogExporter if collector_class is StandInCollector else HttpLogExporter
+    )
+    with collector_class() as collector:
+        exporter = exporter_class(
+            collector.endpoint, {}, timeout=0.5, compression=compression
+        )
+        sent: list = []
+        exporter.on_sent = sent.append
+        provider = LoggerProvider()
+        provider.add_log_record_processor(SimpleLogRecordProcessor(exporter))
+        handler = LoggingHandler(logger_provider=provider)
+        record = logging.makeLogRecord(
+            {"msg": "x" * 1000, "levelno": logging.INFO, "levelname": "INFO"}
+        )
+        handler.emit(record)
+        collector.available = False
+        handler.emit(record)
+        provider.shutdown()
+
+    # Only the exported request is counted, as it was sent over the wire.
+    [size] = sent
+    if compression == "gzip":
+        assert size < collector.bytes_received
+    else:
+        assert size == collector.bytes_received